@@ -27,7 +27,11 @@ import pytesseract
 from pdf2image import convert_from_path
 from PIL import Image
 import logging
-import pyodbc
+
+from src.database import repository
+from src.extraction.table_cache import read_tables
+from src.utils.helpers import clean_number
+from src.scraper.driver_pool import get_driver_pool
 
 # -----------------------------------------------------Partie 1 : Configuration des logs ----------------------------------------------------------------------
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"   # Ne montrer aucun message, sauf les erreurs graves (TensorFlow )
@@ -42,56 +46,9 @@ societes_assurances = [
 
 # -----------------------------------------------------Partie 2 : Gestion Base de données ---------------------------------------------------------------------
 def create_cmf_database_and_table():
-    try:
-        # Connect to SQL Server (Windows Auth)
-        connection = pyodbc.connect(
-            'DRIVER={ODBC Driver 18 for SQL Server};'
-            'SERVER=localhost;'
-            'Trusted_Connection=yes;'
-            'Encrypt=no;',
-            autocommit=True  # Disable encryption to avoid SSL certificate issues
-        )
-        cursor = connection.cursor()
-        
-        logging.info("Création/mise à jour de la base de données 'cmf'...")
-        print("Création/mise à jour de la base de données 'cmf'...")
-        
-        # 1️⃣ Create database if it doesn't exist
-        cursor.execute("""
-        IF DB_ID('cmf') IS NULL
-            CREATE DATABASE cmf
-        """)
-        
-        # Switch to the database
-        cursor.execute("USE cmf")
-        
-        # 2️⃣ Create table if it doesn't exist
-        cursor.execute("""
-        IF OBJECT_ID('document', 'U') IS NULL
-        CREATE TABLE document (
-            id INT IDENTITY(1,1) PRIMARY KEY,
-            Societe NVARCHAR(255) NOT NULL,
-            Nom NVARCHAR(255) NOT NULL,
-            Annee INT NOT NULL,
-            URL NVARCHAR(512) NOT NULL,
-            CONSTRAINT unique_document UNIQUE (Societe, Nom, Annee)
-        )
-        """)
-        
-        # Commit changes
-        connection.commit()
-        
-        logging.info("Base de données 'cmf' et table 'document' prêtes.")
-        print("Base de données 'cmf' et table 'document' prêtes.")
-        
-        # Return connection and cursor in case you want to use them
-        return connection, cursor
+    # Connexion prêtée par le pool du repository (schéma créé une seule fois par processus)
+    return repository.connect()
 
-    except Exception as e:
-        logging.error(f"Erreur lors de la création de la base : {e}")
-        print(f"Erreur lors de la création de la base : {e}")
-        return None, None
-    
 # -----------------------------------------------------Partie 3 : Fonctions à utiliser dans la logique du main code --------------------------------------------------------
     
 
@@ -103,14 +60,7 @@ def fetch_star_2024_pdf():
     nom = "Etats financiers au 31/12"
     annee = 2024
     
-    chrome_options = Options()  # crée un objet chrome_options qui permet de configurer un navigateur web automatisé (Google Chrome). 
-    chrome_options.add_argument("--headless=new")  # sans interface visible
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    service = Service(ChromeDriverManager().install(), log_path=os.devnull)
-    
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver = get_driver_pool().acquire()
     try:
         driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
         pdfs = extract_pdfs_from_page(driver, societe)
@@ -134,7 +84,7 @@ def fetch_star_2024_pdf():
         print(f"ERREUR lors de la récupération du PDF Sté. TUNISIENNE D'ASSURANCES ET DE REASSURANCES - STAR - 2024: {str(e)}")
         return None, None
     finally:
-        driver.quit()
+        get_driver_pool().release(driver)
 
  # *********** Fonction N°2(Appel FN°5-4): La fonction d'ajout du doc dans la base : ************
 
@@ -489,19 +439,7 @@ def is_scanned_pdf(pdf_path):
         return True
 
 
-# ***********  Fonction N°11:  Cette fonction c'est pour forcer que le type des cellule soit numérique et non pas une chaine: ************
-
-def clean_number(text):
-    """Converts French-formatted numbers (Par exemple: '1 234,56') to int, forcing integer type."""
-    if isinstance(text, str):
-        # Remove spaces, replace comma with dot, remove non-numeric suffixes
-        cleaned = re.sub(r'\s+', '', text).replace(',', '.').rstrip('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        try:
-            # Convert directly to int after handling decimal
-            return int(float(cleaned))
-        except ValueError:
-            return text
-    return int(text) if isinstance(text, (int, float)) else text
+# ***********  Fonction N°11:  clean_number (type numérique des cellules) : importée de src.utils.helpers ************
 
 
 # *********** Fonction N°12:(PDF natifs) convertit les cellules en int : ************
@@ -527,7 +465,7 @@ def extract_native_pdf(pdf_path, page_num):
     try:
         logging.info(f"Extraction du tableau de la page {page_num} (PDF natif)")
         print(f"\n Extraction du tableau de la page {page_num}...")
-        tables = camelot.read_pdf(pdf_path, flavor='stream', pages=str(page_num))
+        tables = read_tables(pdf_path, page_num, flavor='stream')
         
         if tables.n == 0:
             logging.warning(f"Aucun tableau détecté à la page {page_num}")
@@ -679,24 +617,15 @@ def export_to_excel(tables, output_name):
 # *********** Fonction N°16: Traitement d'une sté spécifique pour extraire et enregistrer ses PDFs : ************
 
 def process_societe(societe, connection, cursor):
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    service = Service(ChromeDriverManager().install(), log_path=os.devnull)
-    
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
-    
-    pdfs = extract_pdfs_from_page(driver, societe)
+    with get_driver_pool().driver() as driver:
+        driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
+        pdfs = extract_pdfs_from_page(driver, societe)
     inserted_count = 0
     
     for pdf in pdfs:
         if insert_pdf_info_cmf(connection, cursor, pdf["societe"], pdf["nom"], pdf["annee"], pdf["url"]):
             inserted_count += 1
     
-    driver.quit()
     return inserted_count
 
 
@@ -725,17 +654,9 @@ def check_missing_documents(connection, cursor):
                 logging.info(f"Documents manquants pour {societe}: Années {sorted(missing_years)}")
                 print(f"Documents manquants pour {societe}: Années {sorted(missing_years)}")
                 
-                chrome_options = Options()
-                chrome_options.add_argument("--headless=new")
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--disable-gpu")
-                service = Service(ChromeDriverManager().install(), log_path=os.devnull)
-                
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-                driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
-                
-                pdfs = extract_pdfs_from_page(driver, societe)
+                with get_driver_pool().driver() as driver:
+                    driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
+                    pdfs = extract_pdfs_from_page(driver, societe)
                 inserted_count = 0
                 
                 for pdf in pdfs:
@@ -743,7 +664,6 @@ def check_missing_documents(connection, cursor):
                         if insert_pdf_info_cmf(connection, cursor, pdf["societe"], pdf["nom"], pdf["annee"], pdf["url"]):
                             inserted_count += 1
                 
-                driver.quit()
                 total_inserted += inserted_count
                 logging.info(f"Résultat pour {societe}: {inserted_count} documents manquants ajoutés")
                 print(f"=== Résultat pour {societe}: {inserted_count} documents manquants ajoutés ===")
@@ -27,7 +27,11 @@ import pytesseract
 from pdf2image import convert_from_path
 from PIL import Image
 import logging
-import pyodbc
+
+from src.database import repository
+from src.extraction.table_cache import read_tables
+from src.utils.helpers import clean_number
+from src.scraper.driver_pool import get_driver_pool, build_driver
 
 # -----------------------------------------------------Partie 1 : Configuration des logs ----------------------------------------------------------------------
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
@@ -41,80 +45,14 @@ societes_assurances = [
 
 # -----------------------------------------------------Partie 2 : Gestion Base de données ---------------------------------------------------------------------
 def create_cmf_database_and_table():
-    try:
-        connection = pyodbc.connect(
-            'DRIVER={ODBC Driver 18 for SQL Server};'
-            'SERVER=localhost;'
-            'Trusted_Connection=yes;'
-            'Encrypt=no;',
-            autocommit=True
-        )
-        cursor = connection.cursor()
-        
-        logging.info("Création/mise à jour de la base de données 'cmf'...")
-        print("Création/mise à jour de la base de données 'cmf'...")
-        
-        cursor.execute("""
-        IF DB_ID('cmf') IS NULL
-            CREATE DATABASE cmf
-        """)
-        
-        cursor.execute("USE cmf")
-        
-        cursor.execute("""
-        IF OBJECT_ID('document', 'U') IS NULL
-        CREATE TABLE document (
-            id INT IDENTITY(1,1) PRIMARY KEY,
-            Societe NVARCHAR(255) NOT NULL,
-            Nom NVARCHAR(255) NOT NULL,
-            Annee INT NOT NULL,
-            URL NVARCHAR(512) NOT NULL,
-            CONSTRAINT unique_document UNIQUE (Societe, Nom, Annee)
-        )
-        """)
-
-        cursor.execute("""
-        IF OBJECT_ID('financial_data', 'U') IS NULL
-        CREATE TABLE financial_data (
-            id INT IDENTITY(1,1) PRIMARY KEY,
-            document_id INT NOT NULL,
-            category NVARCHAR(255),
-            subcategory NVARCHAR(255),
-            code NVARCHAR(50),
-            description NVARCHAR(MAX),
-            level INT,
-            is_total BIT,
-            value_n FLOAT,
-            value_n_1 FLOAT,
-            FOREIGN KEY (document_id) REFERENCES document(id) ON DELETE CASCADE
-        )
-        """)
-        
-        connection.commit()
-        
-        logging.info("Base de données 'cmf', tables 'document' et 'financial_data' prêtes.")
-        print("Base de données 'cmf', tables 'document' et 'financial_data' prêtes.")
-        
-        return connection, cursor
-
-    except Exception as e:
-        logging.error(f"Erreur lors de la création de la base : {e}")
-        print(f"Erreur lors de la création de la base : {e}")
-        return None, None
+    # Connexion prêtée par le pool du repository (schéma créé une seule fois par processus)
+    return repository.connect()
 
 # -----------------------------------------------------Partie 3 : Fonctions utilitaires ---------------------------------------------------------------------
 
 def init_driver():
-    chrome_options = Options()
-    # chrome_options.add_argument("--headless=new") # Disable headless for interactivity visibility if needed, or keep provided user preference. Keeping headless for speed unless debugging.
-    # User might want to see it? User didn't specify, but CLI usually implies headless or console interaction.
-    # Let's keep headless to be clean, but show progress in console.
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    service = Service(ChromeDriverManager().install(), log_path=os.devnull)
-    return webdriver.Chrome(service=service, options=chrome_options)
+    # Headless Chrome, chemin chromedriver mis en cache (pas de résolution "LATEST" à chaque lancement)
+    return build_driver()
 
 def get_all_companies(driver):
     print("⏳ Chargement de la liste des sociétés...")
@@ -285,7 +223,7 @@ def insert_financial_data(cursor, doc_id, hierarchical_data):
             ))
             count += 1
             
-        cursor.commit() # Note: pyodbc cursor commit might be needed depending on autocommit setting
+        cursor.connection.commit()
         print(f"✅ {count} lignes insérées dans la table financial_data")
         return True
         
@@ -448,14 +386,6 @@ def download_pdf(url, societe, nom, annee):
         print(f" Erreur téléchargement : {str(e)}")
         return None
 
-def clean_number(text):
-    if isinstance(text, str):
-        cleaned = re.sub(r'\s+', '', text).replace(',', '.').rstrip('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        try:
-            return int(float(cleaned))
-        except ValueError:
-            return text
-    return int(text) if isinstance(text, (int, float)) else text
 
 # ===================================================================================================
 # NOUVELLE SECTION : Extraction et structuration hiérarchique du bilan
@@ -607,7 +537,7 @@ def extract_hierarchical_table(pdf_path, page_num, is_scanned):
         
         else:
             # Extraction native avec Camelot
-            tables = camelot.read_pdf(pdf_path, flavor='stream', pages=str(page_num))
+            tables = read_tables(pdf_path, page_num, flavor='stream')
             
             if tables.n == 0:
                 print(" Aucun tableau détecté")
@@ -912,24 +842,15 @@ def search_and_extract_dynamic(connection, cursor, societe, annee):
         print(f"❌ ERREUR : {str(e)}")
 
 def process_societe(societe, connection, cursor):
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    service = Service(ChromeDriverManager().install(), log_path=os.devnull)
-    
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
-    
-    pdfs = extract_pdfs_from_page(driver, societe)
+    with get_driver_pool().driver() as driver:
+        driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
+        pdfs = extract_pdfs_from_page(driver, societe)
     inserted_count = 0
     
     for pdf in pdfs:
         if insert_pdf_info_cmf(connection, cursor, pdf["societe"], pdf["nom"], pdf["annee"], pdf["url"]):
             inserted_count += 1
     
-    driver.quit()
     return inserted_count
 
 def check_missing_documents(connection, cursor):
@@ -949,17 +870,9 @@ def check_missing_documents(connection, cursor):
             if missing_years:
                 print(f"⚠️ Documents manquants : {sorted(missing_years)}")
                 
-                chrome_options = Options()
-                chrome_options.add_argument("--headless=new")
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--disable-gpu")
-                service = Service(ChromeDriverManager().install(), log_path=os.devnull)
-                
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-                driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
-                
-                pdfs = extract_pdfs_from_page(driver, societe)
+                with get_driver_pool().driver() as driver:
+                    driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
+                    pdfs = extract_pdfs_from_page(driver, societe)
                 inserted_count = 0
                 
                 for pdf in pdfs:
@@ -967,7 +880,6 @@ def check_missing_documents(connection, cursor):
                         if insert_pdf_info_cmf(connection, cursor, pdf["societe"], pdf["nom"], pdf["annee"], pdf["url"]):
                             inserted_count += 1
                 
-                driver.quit()
                 total_inserted += inserted_count
                 print(f"✅ {inserted_count} documents ajoutés")
             else:
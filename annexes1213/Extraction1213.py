@@ -32,8 +32,6 @@ import glob
 import subprocess
 
 import requests
-import mysql.connector
-from mysql.connector import Error
 
 
 from selenium import webdriver
@@ -53,8 +51,25 @@ from pdf2image import convert_from_path
 from PIL import Image, ImageOps, ImageFilter
 from pathlib import Path
 THIS_DIR = Path(__file__).resolve().parent
-NV12_SCRIPT = THIS_DIR / "NorVal12.py"
-NV13_SCRIPT = THIS_DIR / "NorVal13.py"
+
+# Accès au package src/ quand le script est lancé directement
+import sys
+if str(THIS_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(THIS_DIR.parent))
+from src.database import repository
+from src.database.db_manager import database_enabled, get_document_id, insert_financial_data_annexe
+from src.extraction.page_index import get_page_index
+from src.extraction.table_cache import read_tables
+from src.extraction.parquet_exporter import export_statement
+from src.utils.numbers import DASH_CHARS, parse_number, parse_numbers
+from src.scraper.driver_pool import build_driver, get_driver_pool
+from src.scraper.pdf_downloader import download_to_store
+from src.extraction.ocr_cache import ocr_page
+from src.extraction.ocr_pool import iter_ocr_pages
+from src.utils.pipeline import Pipeline, Stage, SkipStage, STATUS_FAILED, summarize
+from src.utils.validation_report import is_headless
+from annexes1213 import NorVal12, NorVal13
+from contextlib import closing
 
 
 from openpyxl import Workbook
@@ -83,13 +98,6 @@ OCR_PSM = "6"
 # Excel styling
 HEADER_COLOR = "0070C0"
 
-# MySQL
-MYSQL_HOST = "localhost"
-MYSQL_USER = "root"
-MYSQL_PASSWORD = ""
-MYSQL_DB = "cmf"
-
-
 # ---------------------------------------------- Logs ----------------------------------------------
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
 os.environ["GLOG_minloglevel"] = "3"
@@ -104,35 +112,8 @@ logging.basicConfig(
 
 # ---------------------------------------------- DB ----------------------------------------------
 def create_cmf_database_and_table():
-    try:
-        connection = mysql.connector.connect(host=MYSQL_HOST, user=MYSQL_USER, password=MYSQL_PASSWORD)
-        cursor = connection.cursor()
-
-        logging.info("Création/mise à jour base 'cmf'...")
-        print("Création/mise à jour base 'cmf'...")
-
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {MYSQL_DB}")
-        cursor.execute(f"USE {MYSQL_DB}")
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS document (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                Societe VARCHAR(255) NOT NULL,
-                Nom VARCHAR(255) NOT NULL,
-                Annee INT NOT NULL,
-                URL VARCHAR(512) NOT NULL,
-                UNIQUE KEY unique_document (Societe, Nom, Annee)
-            )
-            """
-        )
-        connection.commit()
-        logging.info("Base 'cmf' et table 'document' prêtes.")
-        print("Base 'cmf' et table 'document' prêtes.")
-        return connection, cursor
-    except Error as e:
-        logging.error(f"Erreur création base : {e}")
-        print(f"Erreur création base : {e}")
-        return None, None
+    # Connexion prêtée par le pool du repository (MySQL par défaut, CMF_DB_BACKEND pour changer)
+    return repository.connect(default_backend="mysql")
 
 
 def normalize_url(url: str) -> str:
@@ -169,10 +150,10 @@ def extract_year_from_text(text: str):
 
 def check_document_exists(cursor, societe, nom, annee: int) -> bool:
     try:
-        query = "SELECT COUNT(*) FROM document WHERE Societe = %s AND Nom = %s AND Annee = %s"
+        query = "SELECT COUNT(*) FROM document WHERE Societe = ? AND Nom = ? AND Annee = ?"
         cursor.execute(query, (societe, nom, annee))
         return (cursor.fetchone()[0] or 0) > 0
-    except Error as e:
+    except Exception as e:
         logging.error(f"Erreur vérification document : {e}")
         print(f"Erreur vérification document : {e}")
         return False
@@ -196,7 +177,7 @@ def insert_pdf_info_cmf(connection, cursor, societe, nom_document, annee, url) -
         cursor.execute(
             """
             INSERT INTO document (Societe, Nom, Annee, URL)
-            VALUES (%s, %s, %s, %s)
+            VALUES (?, ?, ?, ?)
             """,
             (societe, nom_document, annee_int, normalized_url),
         )
@@ -205,7 +186,7 @@ def insert_pdf_info_cmf(connection, cursor, societe, nom_document, annee, url) -
         print(f"AJOUTÉ : {nom_document} ({annee})")
         return True
 
-    except Error as e:
+    except Exception as e:
         logging.error(f"Erreur insertion : {e}")
         print(f"Erreur insertion : {e}")
         return False
@@ -224,14 +205,7 @@ def now_ts() -> str:
 
 # ---------------------------------------------- Selenium / Scraping ----------------------------------------------
 def make_driver():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-    service = Service(ChromeDriverManager().install(), log_path=os.devnull)
-    return webdriver.Chrome(service=service, options=chrome_options)
+    return build_driver(window_size="1920,1080")
 
 
 def extract_pdfs_from_page(driver, societe: str):
@@ -315,15 +289,10 @@ def download_pdf(url, societe, nom, annee):
         safe_soc = safe_filename(societe)
         safe_nom = safe_filename(nom)
         filename = f"{safe_soc}_{safe_nom}_{annee}.pdf"
-        filepath = os.path.join(os.getcwd(), filename)
-
-        response = requests.get(url, stream=True, timeout=90)
-        response.raise_for_status()
-        with open(filepath, "wb") as f:
-            f.write(response.content)
-
-        print(f"PDF téléchargé : {filepath}")
-        logging.info(f"PDF téléchargé : {filepath}")
+        # store PDF adressé par contenu (streaming + reprise + retries, pas de doublon sur disque)
+        filepath = download_to_store(url, filename)
+        if filepath:
+            logging.info(f"PDF téléchargé : {filepath}")
         return filepath
     except Exception as e:
         logging.error(f"Erreur téléchargement : {str(e)}")
@@ -336,34 +305,16 @@ def fetch_pdf_for_societe_annee(societe, annee, doc_names_acceptes):
     Cherche sur CMF le PDF correspondant à l'année et à un des noms acceptés.
     Retourne: (pdf_path, pdf_url, pdf_nom_reel)
     """
-    driver = make_driver()
+    driver = get_driver_pool().acquire()
     try:
         driver.get(CMF_URL)
         pdfs = extract_pdfs_from_page(driver, societe)
 
-        pdfs_annee = [p for p in pdfs if str(p.get("annee", "")).isdigit() and int(p["annee"]) == int(annee)]
-        if not pdfs_annee:
+        pdf = select_accepted_document(pdfs, annee, doc_names_acceptes)
+        if pdf is None:
             print(f"Document {societe} {annee} non trouvé (aucun PDF année {annee})")
             return None, None, None
 
-        # 1) match exact
-        for wanted in doc_names_acceptes:
-            for pdf in pdfs_annee:
-                if pdf["nom"].strip().lower() == wanted.strip().lower():
-                    pdf_path = download_pdf(pdf["url"], pdf["societe"], pdf["nom"], pdf["annee"])
-                    return pdf_path, pdf["url"], pdf["nom"]
-
-        # 2) contient un des libellés
-        lowered_acceptes = [w.strip().lower() for w in doc_names_acceptes]
-        for pdf in pdfs_annee:
-            name_low = pdf["nom"].strip().lower()
-            if any(w in name_low for w in lowered_acceptes):
-                pdf_path = download_pdf(pdf["url"], pdf["societe"], pdf["nom"], pdf["annee"])
-                return pdf_path, pdf["url"], pdf["nom"]
-
-        # 3) fallback 1er PDF de l'année
-        pdf = pdfs_annee[0]
-        print(f"⚠️ Aucun nom exact trouvé. Fallback sur le 1er PDF de {annee}: {pdf['nom']}")
         pdf_path = download_pdf(pdf["url"], pdf["societe"], pdf["nom"], pdf["annee"])
         return pdf_path, pdf["url"], pdf["nom"]
 
@@ -373,7 +324,7 @@ def fetch_pdf_for_societe_annee(societe, annee, doc_names_acceptes):
         return None, None, None
     finally:
         try:
-            driver.quit()
+            get_driver_pool().release(driver)
         except Exception:
             pass
 
@@ -409,13 +360,9 @@ def preprocess_for_ocr(img: Image.Image) -> Image.Image:
 
 
 def ocr_page_text(pdf_path: str, page_num_1based: int) -> str:
-    images = convert_from_path(pdf_path, first_page=page_num_1based, last_page=page_num_1based, dpi=OCR_DPI)
-    if not images:
-        return ""
-    img = preprocess_for_ocr(images[0])
     config = f"--psm {OCR_PSM}"
     try:
-        txt = pytesseract.image_to_string(img, lang=OCR_LANG, config=config)
+        txt = ocr_page(pdf_path, page_num_1based, OCR_DPI, lang=OCR_LANG, config=config, preprocess=preprocess_for_ocr)
         return normalize_text_light(txt)
     except Exception:
         return ""
@@ -438,7 +385,7 @@ def detect_annexes_by_table_content(pdf_path: str, candidate_pages):
     for p in candidate_pages:
         for flavor in flavors:
             try:
-                tables = camelot.read_pdf(pdf_path, flavor=flavor, pages=str(p))
+                tables = read_tables(pdf_path, p, flavor=flavor)
                 if tables.n == 0:
                     continue
 
@@ -474,28 +421,19 @@ def search_sections_in_pdf(pdf_path: str):
     """
     results = {}
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_path)
-        num_pages = len(pdf_reader.pages)
+        # Index partagé avec search_table_in_pdf : le PDF n'est lu qu'une fois
+        index = get_page_index(pdf_path)
+        num_pages = index.num_pages
         print(f"Analyse PDF : {num_pages} pages")
 
         # 1) natif
         for num in ANNEXES:
             key = f"Annexe_{num}"
-            kws = annexe_keywords(num)
-            found = False
-
-            for i in range(num_pages):
-                text = pdf_reader.pages[i].extract_text() or ""
-                if not text.strip():
-                    continue
-                t = normalize_text_light(text)
-                if any(kw in t for kw in kws):
-                    results[key] = (i + 1, False)
-                    print(f"{key} trouvée (natif) page {i + 1}")
-                    found = True
-                    break
-
-            if not found:
+            page, _ = index.locate(f"ann{num}", ocr=False)
+            if page is not None:
+                results[key] = (page, False)
+                print(f"{key} trouvée (natif) page {page}")
+            else:
                 results[key] = (None, None)
 
         if all(results.get(f"Annexe_{n}", (None, None))[0] for n in ANNEXES):
@@ -503,18 +441,24 @@ def search_sections_in_pdf(pdf_path: str):
 
         # 2) OCR dernières pages
         last_pages = list(range(max(1, num_pages - 10) + 1, num_pages + 1))
-        for num in ANNEXES:
-            key = f"Annexe_{num}"
-            if results.get(key, (None, None))[0] is not None:
-                continue
-
-            print(f"Tentative OCR pour {key} (dernières pages)...")
-            kws = annexe_keywords(num)
-            for p in last_pages:
-                txt = ocr_page_text(pdf_path, p)
-                if txt and any(kw in txt for kw in kws):
-                    results[key] = (p, True)
-                    print(f"{key} trouvée (OCR) page {p}")
+        missing = [num for num in ANNEXES if results.get(f"Annexe_{num}", (None, None))[0] is None]
+        for num in missing:
+            print(f"Tentative OCR pour Annexe_{num} (dernières pages)...")
+
+        # pages OCR en parallèle (pool de process), rendues dans l'ordre ; arrêt dès que tout est trouvé
+        ocr_results = iter_ocr_pages(
+            pdf_path, last_pages, OCR_DPI,
+            lang=OCR_LANG, config=f"--psm {OCR_PSM}", preprocess=preprocess_for_ocr
+        )
+        with closing(ocr_results):
+            for p, txt in ocr_results:
+                txt = normalize_text_light(txt)
+                for num in missing:
+                    key = f"Annexe_{num}"
+                    if results[key][0] is None and txt and any(kw in txt for kw in annexe_keywords(num)):
+                        results[key] = (p, True)
+                        print(f"{key} trouvée (OCR) page {p}")
+                if all(results[f"Annexe_{n}"][0] for n in missing):
                     break
 
         if all(results.get(f"Annexe_{n}", (None, None))[0] for n in ANNEXES):
@@ -537,7 +481,6 @@ def search_sections_in_pdf(pdf_path: str):
 
 
 # ---------------------------------------------- Nettoyage tableaux ----------------------------------------------
-DASH_CHARS = {"-", "‐", "–", "—", "−"}  # différents tirets / minus unicode
 
 
 def _normalize_text_cell(x):
@@ -571,64 +514,37 @@ def _is_dash_only(x) -> bool:
 def clean_number(val):
     """
     Convertit en int/float si possible, sinon renvoie la string nettoyée.
-    Gère:
-      - espaces, NBSP
-      - virgules décimales
-      - séparateurs de milliers (espaces, points)
-      - tirets unicode comme signe négatif
-      - parenthèses => négatif
-      - '-' seul => vide
+    Règles de src.utils.numbers (espaces, NBSP, virgules, séparateurs de milliers,
+    tirets unicode et parenthèses => négatif) ; '-' seul => vide
     """
     if val is None:
         return ""
     if isinstance(val, float) and pd.isna(val):
         return ""
     if isinstance(val, (int, float)) and not isinstance(val, bool):
-        try:
-            if isinstance(val, float) and abs(val - int(val)) < 1e-9:
-                return int(val)
-            return val
-        except Exception:
-            return val
+        if isinstance(val, float) and val.is_integer():
+            return int(val)
+        return val
 
     s = _normalize_text_cell(val)
-    if s == "":
-        return ""
-    if s in DASH_CHARS:
+    if s == "" or s in DASH_CHARS:
         return ""
 
-    negative = False
-    if s.startswith("(") and s.endswith(")"):
-        negative = True
-        s = s[1:-1].strip()
-
-    if s and (s[0] in DASH_CHARS):
-        negative = True
-        s = s[1:].strip()
+    num = parse_number(s)
+    if num is None:
+        return s
+    return int(num) if num.is_integer() else num
 
-    s = re.sub(r"[A-Za-z]", "", s).strip()
 
-    s = s.replace("\u00a0", " ").replace(" ", "")
-    if s.count(",") == 1 and s.count(".") == 0:
-        s = s.replace(",", ".")
-    else:
-        s = s.replace(",", "")
-
-    if s.count(".") > 1:
-        s = s.replace(".", "")
+def clean_number_column(series):
+    """clean_number sur toute une colonne (montants analysés en une passe)"""
+    values, parsed = parse_numbers(series)
+    out = [
+        (int(v) if v.is_integer() else float(v)) if ok else clean_number(x)
+        for x, v, ok in zip(series.tolist(), values.tolist(), parsed.tolist())
+    ]
+    return pd.Series(out, index=series.index, name=series.name, dtype=object)
 
-    if not re.fullmatch(r"\d+(\.\d+)?", s):
-        return _normalize_text_cell(val)
-
-    try:
-        num = float(s)
-        if abs(num - int(num)) < 1e-9:
-            num = int(num)
-        if negative:
-            return -num
-        return num
-    except Exception:
-        return _normalize_text_cell(val)
 
 def _excel_2010_exe_path():
     candidates = [
@@ -1244,7 +1160,7 @@ def clean_table_general(df: pd.DataFrame) -> pd.DataFrame:
 
     # conversion numérique
     for c in df.columns:
-        df[c] = df[c].apply(clean_number)
+        df[c] = clean_number_column(df[c])
 
     # ✅ réparation spécifique mais générale: Vie/Total décalé
     df = _repair_single_branch_shift(df, first_col_name="CATEGORIES")
@@ -1325,8 +1241,10 @@ def _force_numeric_cells_only(df: pd.DataFrame) -> pd.DataFrame:
     cols = list(df.columns)
 
     for c in cols[1:]:
-        df[c] = df[c].apply(lambda x: clean_number(x))
-        df[c] = df[c].apply(lambda v: v if isinstance(v, (int, float)) and not isinstance(v, bool) else "")
+        values, parsed = parse_numbers(df[c])
+        df[c] = pd.Series(
+            [(int(v) if v.is_integer() else v) if ok else "" for v, ok in zip(values.tolist(), parsed.tolist())],
+            index=df.index, dtype=object)
 
     return df
 
@@ -1336,13 +1254,14 @@ def extract_native_pdf(pdf_path, page_num):
 
         tables = None
         try:
-            tables = camelot.read_pdf(pdf_path, flavor="stream", pages=str(page_num))
+            tables = read_tables(pdf_path, page_num, flavor="stream")
         except Exception:
             tables = None
 
+        # stream puis lattice (le second appel relançait stream à l'identique)
         if tables is None or tables.n == 0:
             try:
-                tables = camelot.read_pdf(pdf_path, flavor="stream", pages=str(page_num))
+                tables = read_tables(pdf_path, page_num, flavor="lattice")
             except Exception:
                 tables = None
 
@@ -1384,13 +1303,11 @@ def extract_scanned_pdf(pdf_path, page_num):
     try:
         print(f"\nExtraction tableau page {page_num} (scanné/OCR)...")
 
-        images = convert_from_path(pdf_path, first_page=page_num, last_page=page_num, dpi=OCR_DPI)
-        if not images:
+        text = ocr_page(pdf_path, page_num, OCR_DPI, lang=OCR_LANG, config=f"--psm {OCR_PSM}", preprocess=preprocess_for_ocr)
+        if not text:
             print(f"Impossible convertir page {page_num}")
             return None
 
-        image = preprocess_for_ocr(images[0])
-        text = pytesseract.image_to_string(image, lang=OCR_LANG, config=f"--psm {OCR_PSM}")
         lines = [line.strip() for line in text.split("\n") if line.strip()]
 
         table_data = []
@@ -1435,6 +1352,63 @@ def _safe_save_workbook(wb: Workbook, path: str) -> str:
         return new_path
 
 
+def build_annexe_workbook(tables) -> Workbook:
+    """Workbook stylé d'une annexe : une feuille par (nom, DataFrame)"""
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    header_fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type="solid")
+    header_font = Font(color="FFFFFF", bold=True)
+    data_font = Font(name="Arial", size=10)
+
+    border = Border(
+        left=Side(style="thin"),
+        right=Side(style="thin"),
+        top=Side(style="thin"),
+        bottom=Side(style="thin"),
+    )
+
+    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    data_alignment_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    data_alignment_left = Alignment(horizontal="left", vertical="center", wrap_text=True)
+
+    for name, df in tables:
+        ws = wb.create_sheet(title=str(name)[:31])
+
+        for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
+            for c_idx, value in enumerate(row, 1):
+                cell = ws.cell(row=r_idx, column=c_idx)
+
+                if isinstance(value, float) and pd.isna(value):
+                    cell.value = ""
+                else:
+                    cell.value = value
+
+                cell.font = data_font
+                cell.border = border
+
+                if r_idx == 1:
+                    cell.fill = header_fill
+                    cell.font = header_font
+                    cell.alignment = header_alignment
+                else:
+                    # ✅ ne pas centrer les noms de lignes (col 1)
+                    cell.alignment = data_alignment_left if c_idx == 1 else data_alignment_center
+
+        # auto width
+        for col in ws.columns:
+            max_length = 0
+            for cell in col:
+                if cell.value is not None and str(cell.value) != "":
+                    max_length = max(max_length, len(str(cell.value)))
+            ws.column_dimensions[get_column_letter(col[0].column)].width = min(60, (max_length + 2) * 1.2)
+
+        for r in range(1, ws.max_row + 1):
+            ws.row_dimensions[r].height = 18
+
+    return wb
+
+
 def export_to_excel(tables, output_name, societe):
     try:
         safe_societe = safe_filename(societe)
@@ -1442,59 +1416,7 @@ def export_to_excel(tables, output_name, societe):
         os.makedirs(dossier, exist_ok=True)
         chemin_final = os.path.join(dossier, output_name)
 
-        wb = Workbook()
-        wb.remove(wb.active)
-
-        header_fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True)
-        data_font = Font(name="Arial", size=10)
-
-        border = Border(
-            left=Side(style="thin"),
-            right=Side(style="thin"),
-            top=Side(style="thin"),
-            bottom=Side(style="thin"),
-        )
-
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        data_alignment_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        data_alignment_left = Alignment(horizontal="left", vertical="center", wrap_text=True)
-
-        for name, df in tables:
-            ws = wb.create_sheet(title=str(name)[:31])
-
-            for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-                for c_idx, value in enumerate(row, 1):
-                    cell = ws.cell(row=r_idx, column=c_idx)
-
-                    if isinstance(value, float) and pd.isna(value):
-                        cell.value = ""
-                    else:
-                        cell.value = value
-
-                    cell.font = data_font
-                    cell.border = border
-
-                    if r_idx == 1:
-                        cell.fill = header_fill
-                        cell.font = header_font
-                        cell.alignment = header_alignment
-                    else:
-                        # ✅ ne pas centrer les noms de lignes (col 1)
-                        cell.alignment = data_alignment_left if c_idx == 1 else data_alignment_center
-
-            # auto width
-            for col in ws.columns:
-                max_length = 0
-                for cell in col:
-                    if cell.value is not None and str(cell.value) != "":
-                        max_length = max(max_length, len(str(cell.value)))
-                ws.column_dimensions[get_column_letter(col[0].column)].width = min(60, (max_length + 2) * 1.2)
-
-            for r in range(1, ws.max_row + 1):
-                ws.row_dimensions[r].height = 18
-
-        saved_path = _safe_save_workbook(wb, chemin_final)
+        saved_path = _safe_save_workbook(build_annexe_workbook(tables), chemin_final)
         print(f"✅ Excel créé : {saved_path}")
         logging.info(f"Fichier Excel créé : {saved_path}")
         return True, saved_path
@@ -1505,186 +1427,241 @@ def export_to_excel(tables, output_name, societe):
         return False, None
 
 
-import subprocess
-import sys
-
-def run_c_normalisation(excel_annexe_path: str, ann: str = "12", year: int = 2024) -> int:
-    """
-    Lance C.py en lui passant le chemin Excel (ex: 12E2024.xlsx).
-    Attend la fin, puis ouvre le NV généré (12NV2024.xlsx) dans Excel 2010.
-    """
-    try:
-        excel_annexe_path = os.path.abspath(excel_annexe_path)
-        folder = os.path.dirname(excel_annexe_path)
-
-        cmd = [sys.executable, str(NV12_SCRIPT), excel_annexe_path]
-        print(f"➡️ Lancement C.py : {' '.join(cmd)}")
-        res = subprocess.run(cmd, capture_output=False)
-        rc = int(res.returncode or 0)
-
-        # Ouvrir automatiquement le fichier NV (si créé)
-        nv_path = _find_latest_nv_file(folder, ann=str(ann), year=int(year))
-        if nv_path and os.path.exists(nv_path):
-            opened = _open_in_excel_2010(nv_path)
-            if not opened:
-                print(f"⚠️ Impossible d'ouvrir automatiquement: {nv_path} (ouvre-le manuellement).")
-        else:
-            print("⚠️ Aucun fichier NV trouvé après exécution de C.py.")
-
-        return rc
-
-    except Exception as e:
-        print(f"❌ Erreur lancement C.py : {e}")
-        logging.error(f"Erreur lancement C.py : {e}")
-        return 1
+# ---------------------------------------------- Pipeline Annexes ----------------------------------------------
+SECTION_DISPLAY = {"Annexe_12": "Annexe 12", "Annexe_13": "Annexe 13"}
 
 
-def run_b_processing(excel_annexe13_path: str) -> int:
+def select_accepted_document(documents, annee, doc_names_acceptes=DOC_NAMES_ACCEPTES):
     """
-    Lance B.py en lui passant le chemin de l'Excel Annexe 13 (ex: 13E2024.xlsx).
-    Retourne le code de retour de B.py.
+    Document de l'année parmi une liste {url, nom, annee, societe} :
+    nom exact accepté, puis nom contenant un libellé accepté, puis 1er PDF de l'année.
     """
-    try:
-        excel_annexe13_path = os.path.abspath(excel_annexe13_path)
-
-        if not os.path.exists(excel_annexe13_path):
-            print(f"⚠️ Annexe 13 introuvable: {excel_annexe13_path} -> B.py non lancé.")
-            return 1
-
-        cmd = [sys.executable, str(NV13_SCRIPT), excel_annexe13_path]
-        print(f"➡️ Lancement B.py : {' '.join(cmd)}")
-        res = subprocess.run(cmd, capture_output=False)
-        return int(res.returncode or 0)
-
-    except Exception as e:
-        print(f"❌ Erreur lancement B.py : {e}")
-        logging.error(f"Erreur lancement B.py : {e}")
-        return 1
+    pdfs_annee = [p for p in documents or [] if str(p.get("annee", "")).isdigit() and int(p["annee"]) == int(annee)]
+    if not pdfs_annee:
+        return None
 
+    for wanted in doc_names_acceptes:
+        for pdf in pdfs_annee:
+            if pdf["nom"].strip().lower() == wanted.strip().lower():
+                return pdf
+
+    lowered_acceptes = [w.strip().lower() for w in doc_names_acceptes]
+    for pdf in pdfs_annee:
+        if any(w in pdf["nom"].strip().lower() for w in lowered_acceptes):
+            return pdf
+
+    pdf = pdfs_annee[0]
+    print(f"⚠️ Aucun nom exact trouvé. Fallback sur le 1er PDF de {annee}: {pdf['nom']}")
+    return pdf
+
+
+def _stage_document(ctx, inputs):
+    """PDF ciblé : fourni par l'appelant, choisi dans sa liste de documents, sinon recherché sur le site CMF"""
+    if ctx.get("pdf_path"):
+        pdf_path, pdf_url, pdf_nom = ctx["pdf_path"], ctx.get("pdf_url"), ctx.get("pdf_nom")
+    elif ctx.get("documents") is not None:
+        doc = select_accepted_document(ctx["documents"], ctx["annee"])
+        if doc is None:
+            print(f"Document {ctx['societe']} {ctx['annee']} non trouvé (aucun PDF année {ctx['annee']})")
+            pdf_path, pdf_url, pdf_nom = None, None, None
+        else:
+            pdf_path = download_pdf(doc["url"], doc["societe"], doc["nom"], doc["annee"])
+            pdf_url, pdf_nom = doc["url"], doc["nom"]
+    else:
+        pdf_path, pdf_url, pdf_nom = fetch_pdf_for_societe_annee(ctx["societe"], ctx["annee"], DOC_NAMES_ACCEPTES)
 
-# ---------------------------------------------- Main ----------------------------------------------
-def main():
-    start_time = time.time()
-    logging.info(f"Démarrage script - {time.strftime('%H:%M:%S')}")
-    print(f"\n=== Démarrage {time.strftime('%H:%M:%S')} ===")
+    if not (pdf_path and os.path.exists(pdf_path)):
+        logging.warning("PDF non disponible")
+        raise SkipStage("PDF non disponible → extraction annulée")
+    return {"pdf_path": pdf_path, "url": pdf_url, "nom": pdf_nom}
 
-    # 1) Télécharger le PDF ciblé (société + année + type document)
-    pdf_path, pdf_url, pdf_nom_reel = fetch_pdf_for_societe_annee(SOCIETE, ANNEE, DOC_NAMES_ACCEPTES)
 
-    # 2) DB
+def _stage_document_record(ctx, inputs):
+    """Insertion de l'info du PDF dans cmf.document"""
+    if not database_enabled():
+        raise SkipStage("DB désactivée")
+    doc = inputs["document"]
+    if not (doc["url"] and doc["nom"]):
+        raise SkipStage("URL / nom du document inconnus")
     connection, cursor = create_cmf_database_and_table()
     if not connection or not cursor:
         logging.error("Échec connexion base")
-        print("Échec connexion base")
-        return
-
+        raise RuntimeError("Échec connexion base")
     try:
-        # 3) Insérer l'info du PDF téléchargé
-        if pdf_url and pdf_nom_reel:
-            insert_pdf_info_cmf(connection, cursor, SOCIETE, pdf_nom_reel, ANNEE, pdf_url)
-
-        # 4) Stop si pas de PDF
-        if not (pdf_path and os.path.exists(pdf_path)):
-            print("PDF non disponible → extraction annulée")
-            logging.warning("PDF non disponible")
-            return
-
-        print(f"\n=== Analyse PDF {SOCIETE} {ANNEE} ===")
-        sections_found = search_sections_in_pdf(pdf_path)
-
-        if not sections_found:
-            print("Aucune annexe détectée (12/13).")
-            logging.warning("Aucune annexe détectée (12/13).")
-            return
-
-        annexe12_export_path = None  # 12E2024.xlsx
-        annexe13_export_path = None  # 13E2024.xlsx
-
-        # 5) Extraction + export pour chaque annexe détectée
-        for section_key, (page_num, is_scanned) in sections_found.items():
-            section_display = {"Annexe_12": "Annexe 12", "Annexe_13": "Annexe 13"}.get(section_key, section_key)
-            print(f"\n--- {section_display} (page {page_num}) ---")
-            logging.info(f"{section_display} page {page_num}")
-
-            # extraction table
-            if is_scanned:
+        return insert_pdf_info_cmf(connection, cursor, ctx["societe"], doc["nom"], ctx["annee"], doc["url"])
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def _stage_facts(section_key, tables_stage):
+    """Tableaux de l'annexe dans la table de faits financial_data_annexe12 / 13"""
+    def run(ctx, inputs):
+        if not database_enabled():
+            raise SkipStage("DB désactivée")
+        doc = inputs["document"]
+        connection, cursor = create_cmf_database_and_table()
+        if not connection or not cursor:
+            raise RuntimeError("Échec connexion base")
+        try:
+            doc_id = get_document_id(cursor, ctx["societe"], doc["nom"], ctx["annee"])
+            if doc_id is None:
+                raise SkipStage("Document absent de cmf.document")
+            count = insert_financial_data_annexe(connection, doc_id, section_key[-2:], inputs[tables_stage])
+            if count is None:
+                raise RuntimeError(f"Échec insertion {SECTION_DISPLAY.get(section_key, section_key)}")
+            print(f"💾 {count} montants {SECTION_DISPLAY.get(section_key, section_key)} insérés (document {doc_id})")
+            return count
+        finally:
+            cursor.close()
+            connection.close()
+    return run
+
+
+def _stage_sections(ctx, inputs):
+    pdf_path = inputs["document"]["pdf_path"]
+    print(f"\n=== Analyse PDF {ctx['societe']} {ctx['annee']} ===")
+    sections_found = search_sections_in_pdf(pdf_path)
+    if not sections_found:
+        logging.warning("Aucune annexe détectée (12/13).")
+        raise SkipStage("Aucune annexe détectée (12/13)")
+    return {"pdf_path": pdf_path, "sections": sections_found}
+
+
+def _stage_tables(section_key):
+    def run(ctx, inputs):
+        pdf_path = inputs["sections"]["pdf_path"]
+        found = inputs["sections"]["sections"].get(section_key)
+        section_display = SECTION_DISPLAY.get(section_key, section_key)
+        if not found:
+            raise SkipStage(f"{section_display} non détectée")
+
+        page_num, is_scanned = found
+        print(f"\n--- {section_display} (page {page_num}) ---")
+        logging.info(f"{section_display} page {page_num}")
+
+        if is_scanned:
+            tables = extract_scanned_pdf(pdf_path, page_num)
+        else:
+            tables = extract_native_pdf(pdf_path, page_num)
+            # fallback OCR si natif échoue
+            if not tables:
+                print("⚠️ Extraction natif vide -> tentative OCR fallback...")
                 tables = extract_scanned_pdf(pdf_path, page_num)
-            else:
-                tables = extract_native_pdf(pdf_path, page_num)
-                # fallback OCR si natif échoue
-                if not tables:
-                    print("⚠️ Extraction natif vide -> tentative OCR fallback...")
-                    tables = extract_scanned_pdf(pdf_path, page_num)
 
-            if not tables:
-                print(f"❌ Aucun tableau exploitable pour {section_display}")
-                logging.warning(f"Aucun tableau exploitable pour {section_display}")
-                continue
+        if not tables:
+            logging.warning(f"Aucun tableau exploitable pour {section_display}")
+            raise SkipStage(f"Aucun tableau exploitable pour {section_display}")
+        return tables
+    return run
+
+
+def _stage_excel(section_key, tables_stage):
+    def run(ctx, inputs):
+        tables = inputs[tables_stage]
+        section_display = SECTION_DISPLAY.get(section_key, section_key)
+        # ✅ Noms courts demandés : 12E2024.xlsx / 13E2024.xlsx
+        output_name = f"{section_key[-2:]}E{ctx['annee']}.xlsx"
+
+        ok, saved_path = export_to_excel(tables, output_name, ctx["societe"])
+        export_statement(tables, ctx["societe"], ctx["annee"], "annexe" + section_key[-2:])
+
+        if not ok or not saved_path:
+            logging.error(f"Échec export {section_display}")
+            raise RuntimeError(f"Échec export {section_display}")
+        print(f"✅ Export réussi: {saved_path}")
+        logging.info(f"Export réussi: {saved_path}")
+        return saved_path
+    return run
+
+
+def _stage_validation12(ctx, inputs):
+    """NorVal12 sur le DataFrame extrait (1ère feuille de 12E), NV écrit à côté de 12E"""
+    excel_path = os.path.abspath(inputs["annexe12_excel"])
+    folder = os.path.dirname(excel_path)
+    df = inputs["annexe12_tables"][0][1]
+
+    print(f"➡️ Normalisation / validation Annexe 12 : {excel_path}")
+    rc = NorVal12.run_from_dataframe(df, os.path.join(folder, f"12NV{ctx['annee']}.xlsx"), ann="12")
+
+    # Ouvrir automatiquement le fichier NV (si créé), sauf en mode headless (batch, serveur)
+    nv_path = _find_latest_nv_file(folder, ann="12", year=int(ctx["annee"]))
+    if nv_path and os.path.exists(nv_path):
+        if is_headless():
+            print(f"📄 NV Annexe 12 : {nv_path}")
+        elif not _open_in_excel_2010(nv_path):
+            print(f"⚠️ Impossible d'ouvrir automatiquement: {nv_path} (ouvre-le manuellement).")
+    else:
+        print("⚠️ Aucun fichier NV trouvé après normalisation Annexe 12.")
 
-            # ✅ Noms courts demandés
-            if section_key == "Annexe_12":
-                output_name = f"12E{ANNEE}.xlsx"
-            elif section_key == "Annexe_13":
-                output_name = f"13E{ANNEE}.xlsx"
-            else:
-                output_name = f"{section_key}_E{ANNEE}.xlsx"
+    print(f"✅ NorVal12 (Annexe 12) terminé avec code retour = {rc}")
+    logging.info(f"NorVal12 (Annexe 12) terminé avec code retour = {rc}")
+    return int(rc or 0)
 
-            ok, saved_path = export_to_excel(tables, output_name, SOCIETE)
 
-            if not ok or not saved_path:
-                print(f"❌ Échec export {section_display}")
-                logging.error(f"Échec export {section_display}")
-                continue
+def _stage_validation13(ctx, inputs):
+    """NorVal13 sur le workbook 13E reconstruit en mémoire (pas de relecture du fichier)"""
+    excel_path = os.path.abspath(inputs["annexe13_excel"])
+    print(f"➡️ Normalisation / validation Annexe 13 : {excel_path}")
+    rc = NorVal13.run_from_workbook(build_annexe_workbook(inputs["annexe13_tables"]), excel_path)
+    print(f"✅ NorVal13 (Annexe 13) terminé avec code retour = {rc}")
+    logging.info(f"NorVal13 (Annexe 13) terminé avec code retour = {rc}")
+    return int(rc or 0)
 
-            print(f"✅ Export réussi: {saved_path}")
-            logging.info(f"Export réussi: {saved_path}")
-
-            # mémoriser chemins
-            if section_key == "Annexe_12":
-                annexe12_export_path = saved_path
-            elif section_key == "Annexe_13":
-                annexe13_export_path = saved_path
-
-        # 6) Lancer C.py seulement sur Annexe 12 (si extrait)
-        if annexe12_export_path and os.path.exists(annexe12_export_path):
-            rc_c = run_c_normalisation(annexe12_export_path)
-            print(f"✅ C.py (Annexe 12) terminé avec code retour = {rc_c}")
-            logging.info(f"C.py (Annexe 12) terminé avec code retour = {rc_c}")
-
-            # ✅ Scénario demandé : si Annexe 12 validée (rc==0) => lancer B.py sur Annexe 13
-            if rc_c == 0:
-                if annexe13_export_path and os.path.exists(annexe13_export_path):
-                    rc_b = run_b_processing(annexe13_export_path)
-                    print(f"✅ B.py (Annexe 13) terminé avec code retour = {rc_b}")
-                    logging.info(f"B.py (Annexe 13) terminé avec code retour = {rc_b}")
-                else:
-                    print("ℹ️ Annexe 13 non exportée -> B.py non lancé.")
-                    logging.info("Annexe 13 non exportée -> B.py non lancé.")
-            else:
-                print("ℹ️ Annexe 12 non validée -> B.py non lancé.")
-                logging.info("Annexe 12 non validée -> B.py non lancé.")
 
-        else:
-            print("ℹ️ Annexe 12 non exportée -> C.py non lancé.")
-            logging.info("Annexe 12 non exportée -> C.py non lancé.")
+def build_annexes_pipeline():
+    """
+    document ─┬─ document_record
+              └─ sections ─┬─ annexe12_tables ─┬─ annexe12_excel ─┐
+                           │                   └──────────────────┴─ annexe12_validation ─┐
+                           └─ annexe13_tables ─┬─ annexe13_excel ─────────────────────────┴─ annexe13_validation
+                                               └──────────────────────────────────────────┘
+    annexe12_db / annexe13_db : tableaux → financial_data_annexe12 / 13 (après document_record).
+    Les étapes base sont ignorées quand CMF_DB_BACKEND n'est pas défini.
+    Annexe 13 n'est validée que si l'Annexe 12 est valide (code retour 0).
+    """
+    return Pipeline("annexes1213", [
+        Stage("document", _stage_document),
+        Stage("document_record", _stage_document_record, requires=["document"]),
+        Stage("sections", _stage_sections, requires=["document"]),
+        Stage("annexe12_tables", _stage_tables("Annexe_12"), requires=["sections"]),
+        Stage("annexe13_tables", _stage_tables("Annexe_13"), requires=["sections"]),
+        Stage("annexe12_excel", _stage_excel("Annexe_12", "annexe12_tables"), requires=["annexe12_tables"]),
+        Stage("annexe13_excel", _stage_excel("Annexe_13", "annexe13_tables"), requires=["annexe13_tables"]),
+        Stage("annexe12_validation", _stage_validation12, requires=["annexe12_tables", "annexe12_excel"]),
+        Stage("annexe13_validation", _stage_validation13,
+              requires=["annexe13_tables", "annexe13_excel", "annexe12_validation"],
+              when=lambda inputs: inputs["annexe12_validation"] == 0),
+        Stage("annexe12_db", _stage_facts("Annexe_12", "annexe12_tables"),
+              requires=["document", "document_record", "annexe12_tables"]),
+        Stage("annexe13_db", _stage_facts("Annexe_13", "annexe13_tables"),
+              requires=["document", "document_record", "annexe13_tables"]),
+    ])
+
+
+def run_annexes(societe: str, annee: int, documents=None, pdf_path=None, pdf_url=None, pdf_nom=None) -> int:
+    """
+    Extraction + normalisation + validation des annexes 12/13 dans le process appelant.
+    documents : liste déjà récupérée par l'appelant (évite une nouvelle recherche Selenium).
+    Retourne 0 si aucune étape n'a échoué, 1 sinon.
+    """
+    start_time = time.time()
+    logging.info(f"Démarrage annexes {societe} {annee} - {time.strftime('%H:%M:%S')}")
+    print(f"\n=== Démarrage {time.strftime('%H:%M:%S')} ===")
 
-        print(f"\n=== Terminé en {time.time() - start_time:.2f} s ===")
-        logging.info(f"Script terminé en {time.time() - start_time:.2f} s")
+    context = {"societe": societe, "annee": int(annee), "documents": documents,
+               "pdf_path": pdf_path, "pdf_url": pdf_url, "pdf_nom": pdf_nom}
+    results = build_annexes_pipeline().run(context)
 
-    except Exception as e:
-        logging.error(f"ERREUR GLOBALE : {str(e)}")
-        print(f"\n=== ERREUR GLOBALE : {str(e)} ===")
+    print("\n" + summarize(results))
+    print(f"\n=== Terminé en {time.time() - start_time:.2f} s ===")
+    logging.info(f"Annexes terminées en {time.time() - start_time:.2f} s")
+    return 1 if any(r.status == STATUS_FAILED for r in results.values()) else 0
 
-    finally:
-        try:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
-                logging.info("Connexion MySQL fermée")
-                print("\n=== MySQL fermé ===")
-        except Exception:
-            pass
 
+# ---------------------------------------------- Main ----------------------------------------------
+def main():
+    return run_annexes(SOCIETE, ANNEE)
 
 
 def run_for(societe: str, annee: int) -> int:
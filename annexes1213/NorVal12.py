@@ -31,6 +31,16 @@ from openpyxl import load_workbook
 from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 
+# Accès au package src/ quand le script est lancé directement
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT_DIR not in sys.path:
+    sys.path.insert(0, _ROOT_DIR)
+from src.utils.numbers import parse_number as _parse_amount, parse_numbers
+from src.utils.identities import Statement, get_identities
+from src.utils.validation_report import (STATUS_VALID, STATUS_INVALID, STATUS_ERROR, correction, is_headless,
+                                         write_corrections_report)
+from src.utils.watcher import wait_for_save
+
 
 # ----------------------------- CONFIG -----------------------------
 # Tes libellés canoniques COMAR (Annexe 12)
@@ -111,7 +121,7 @@ def _similar(a: str, b: str) -> float:
 
 def _extract_number_only(x):
     """
-    Garde uniquement le montant:
+    Garde uniquement le montant (premier montant du texte, règles de src.utils.numbers):
     - Supporte: espaces, NBSP, virgules, points, parenthèses, signes -, etc.
     - Si pas de nombre -> "" (vide)
     """
@@ -120,52 +130,15 @@ def _extract_number_only(x):
     if isinstance(x, float) and pd.isna(x):
         return ""
     if isinstance(x, (int, float)) and not isinstance(x, bool):
-        try:
-            if isinstance(x, float) and abs(x - int(x)) < 1e-9:
-                return int(x)
-            return x
-        except Exception:
-            return x
-
-    s = str(x).strip()
-    if s == "":
-        return ""
-
-    s = s.replace("\u00a0", " ").replace(" ", "")
-
-    negative = False
-    if s.startswith("(") and s.endswith(")"):
-        negative = True
-        s = s[1:-1]
-
-    s = s.replace("−", "-").replace("–", "-").replace("—", "-").replace("‐", "-")
+        if isinstance(x, float) and x.is_integer():
+            return int(x)
+        return x
 
-    m = re.search(r"-?\d[\d\.,]*", s)
-    if not m:
-        return ""
-
-    num = m.group(0)
-
-    # normaliser séparateurs
-    # si beaucoup de points/virgules: on enlève tout sauf chiffres et dernier séparateur
-    num = num.replace(",", ".")
-    # garder chiffres et points
-    num = re.sub(r"[^0-9\.\-]", "", num)
-
-    # si plusieurs points -> c'est sûrement des milliers => enlever tous les points
-    if num.count(".") > 1:
-        num = num.replace(".", "")
-
-    try:
-        if num in ("", "-", "."):
-            return ""
-        val = float(num)
-        if negative:
-            val = -val
-        # COMAR: montants entiers
-        return int(round(val))
-    except Exception:
+    val = _parse_amount(x, search=True)
+    if val is None:
         return ""
+    # COMAR: montants entiers
+    return int(round(val))
 
 
 def _to_number_or_none(x):
@@ -184,6 +157,17 @@ def _to_number_or_none(x):
     except Exception:
         return None
 
+def _c1_total_minus_vie(vie_values, total_values):
+    """
+    C1 = TOTAL - VIE par ligne ("annexe12" dans config/identities.json, vide = 0).
+    Retourne (C1 arrondis à l'unité, lignes invalides : C1 arrondi != 0)
+    """
+    statement = Statement(range(len(vie_values)), None, ["VIE", "TOTAL"],
+                          [[vie, total] for vie, total in zip(vie_values, total_values)])
+    c1 = get_identities("annexe12").evaluate(statement)["C1"]
+    return [int(round(x)) for x in c1.residuals], c1.failed.tolist()
+
+
 def _open_in_excel(path: str):
     try:
         os.startfile(os.path.abspath(path))
@@ -198,16 +182,15 @@ def _open_in_excel(path: str):
 
 
 
-def _wait_for_ctrl_s(file_path: str, last_mtime: float, poll_sec: float = 1.0):
-    print("Corrige dans Excel puis fais Ctrl+S (puis reviens ici).")
-    while True:
-        time.sleep(poll_sec)
-        try:
-            mt = os.path.getmtime(file_path)
-            if mt > last_mtime:
-                return
-        except Exception:
-            pass
+def _wait_for_ctrl_s(file_path: str, last_mtime: float = None, poll_sec: float = 1.0):
+    """Attend la sauvegarde du fichier (inotify sous Linux, sinon mtime toutes les poll_sec)"""
+    print("🟡 Corrige dans Excel puis fais Ctrl+S (ensuite reviens ici).")
+    try:
+        if last_mtime is not None and os.path.getmtime(file_path) > last_mtime:
+            return  # déjà sauvegardé
+    except OSError:
+        pass
+    wait_for_save(file_path, poll_interval=poll_sec)
 
 
 # ----------------------------- NORMALISATION -----------------------------
@@ -263,8 +246,10 @@ def _clean_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     for c in ["VIE", "TOTAL"]:
         if c in df.columns:
-            df[c] = df[c].apply(_extract_number_only)
-            df[c] = df[c].replace("", pd.NA)
+            values, parsed = parse_numbers(df[c], search=True)
+            # COMAR: montants entiers, vide -> NA
+            df[c] = pd.Series([int(round(v)) if ok else pd.NA for v, ok in zip(values.tolist(), parsed.tolist())],
+                              index=df.index, dtype=object)
     return df
 
 
@@ -398,7 +383,7 @@ def _close_excel():
         pass
 
 
-def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12") -> int:
+def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12", interactive: bool = None) -> int:
     """
     Validation demandée:
       - Colonne C1 insérée juste après TOTAL
@@ -411,7 +396,11 @@ def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12") -> int:
             * sinon -> normal (sans couleur)
       - Nettoyage auto: lettres/symboles supprimés (on garde uniquement le nombre)
       - Boucle: tant que invalide -> ouvrir Excel 2010, attendre Ctrl+S, fermer l'Excel lancé, revalider
+      - interactive=False (ou CMF_HEADLESS=1): une seule passe, rapport <NV>.corrections.json,
+        retourne 0 (valide) / 1 (invalide)
     """
+    if interactive is None:
+        interactive = not is_headless()
     import os
     import re
     import time
@@ -451,38 +440,7 @@ def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12") -> int:
         Nettoyage agressif: garde uniquement le montant numérique.
         Ex: "12 300 DT" -> 12300 ; "(1 000)" -> -1000 ; "abc" -> None
         """
-        if x is None:
-            return None
-        if isinstance(x, (int, float)) and not isinstance(x, bool):
-            return float(x)
-
-        s = str(x).strip()
-        if not s:
-            return None
-
-        s = s.replace("\u00a0", " ").replace(" ", "")
-        s = s.replace("−", "-").replace("–", "-").replace("—", "-").replace("‐", "-")
-
-        neg = False
-        if s.startswith("(") and s.endswith(")"):
-            neg = True
-            s = s[1:-1]
-
-        m = re.search(r"-?\d[\d\.,]*", s)
-        if not m:
-            return None
-
-        num = m.group(0).replace(",", ".")
-        num = re.sub(r"[^0-9\.\-]", "", num)
-
-        if num.count(".") > 1:
-            num = num.replace(".", "")
-
-        try:
-            v = float(num)
-            return -v if neg else v
-        except Exception:
-            return None
+        return _parse_amount(x, search=True)
 
     def _file_writable(path: str) -> bool:
         try:
@@ -500,17 +458,6 @@ def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12") -> int:
             time.sleep(0.8)
         return False
 
-    def _wait_for_ctrl_s(path: str, last_mtime: float):
-        print("🟡 Corrige dans Excel puis fais Ctrl+S (ensuite reviens ici).")
-        while True:
-            time.sleep(1.0)
-            try:
-                mt = os.path.getmtime(path)
-                if mt > last_mtime:
-                    return
-            except Exception:
-                pass
-
     def _delete_rows_vie_total(ws, col_cat: int):
         to_del = []
         for r in range(2, ws.max_row + 1):
@@ -566,14 +513,26 @@ def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12") -> int:
 
         invalid_rows = []
         invalid_count = 0
+        corrections = []
 
+        # ✅ nettoyage auto (supprime lettres/symboles) puis C1 de toutes les lignes en une passe
+        rows = []
         for r in range(2, ws.max_row + 1):
             cat = ws.cell(r, col_cat).value
             if cat is None or str(cat).strip() == "":
                 continue
+            rows.append(r)
+            for c in (col_vie, col_total):
+                # écrire les valeurs nettoyées dans la feuille
+                # (comme ça si c'est juste "DT" ou autre, ça se corrige automatiquement)
+                value = _to_num_aggressive(ws.cell(r, c).value)
+                ws.cell(r, c).value = int(round(value)) if value is not None else None
+
+        c1_values, c1_invalid = _c1_total_minus_vie([ws.cell(r, col_vie).value for r in rows],
+                                                    [ws.cell(r, col_total).value for r in rows])
 
+        for r, c1, invalid in zip(rows, c1_values, c1_invalid):
             vie_cell = ws.cell(r, col_vie)
-            tot_cell = ws.cell(r, col_total)
             c1_cell = ws.cell(r, col_c1)
 
             # was red last cycle?
@@ -584,19 +543,6 @@ def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12") -> int:
                 and str(vie_cell.fill.start_color.rgb).upper().endswith("FF4040")
             )
 
-            # ✅ nettoyage auto (supprime lettres/symboles)
-            vie = _to_num_aggressive(vie_cell.value)
-            tot = _to_num_aggressive(tot_cell.value)
-
-            # écrire les valeurs nettoyées dans la feuille
-            # (comme ça si c'est juste "DT" ou autre, ça se corrige automatiquement)
-            vie_cell.value = int(round(vie)) if vie is not None else None
-            tot_cell.value = int(round(tot)) if tot is not None else None
-            vie_num = float(vie_cell.value or 0)
-            tot_num = float(tot_cell.value or 0)
-
-            c1 = int(round(tot_num - vie_num))
-
             # styles/align
             ws.cell(r, col_cat).alignment = LEFT
             ws.cell(r, col_cat).border = BORDER
@@ -608,9 +554,11 @@ def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12") -> int:
             c1_cell.value = c1
             c1_cell.number_format = "0"
 
-            if c1 != 0:
+            if invalid:
                 invalid_count += 1
                 invalid_rows.append(r)
+                corrections.append(correction(r, col_vie, category=ws.cell(r, col_cat).value, value=vie_cell.value,
+                                              message=f"C1 = TOTAL - VIE = {c1}", c1=c1))
 
                 vie_cell.fill = RED_FILL
                 vie_cell.font = WHITE_BOLD
@@ -633,10 +581,16 @@ def validate_excel_loop_vie_total(out_path: str, annexe_num: str = "12") -> int:
 
         if invalid_count == 0:
             print(f"STATUT: Valide ✅ (Annexe {annexe_num})")
+            if not interactive:
+                write_corrections_report(out_path, f"NorVal{annexe_num}", STATUS_VALID)
+                return STATUS_VALID
             _open_in_excel_2010(out_path)
             return 0
 
         print(f"STATUT: Invalide ❌ (Annexe {annexe_num}) | lignes invalides = {invalid_count} | Excel rows: {invalid_rows}")
+        if not interactive:
+            write_corrections_report(out_path, f"NorVal{annexe_num}", STATUS_INVALID, corrections)
+            return STATUS_INVALID
 
         proc = _open_in_excel_2010(out_path)
         last_mtime = os.path.getmtime(out_path)
@@ -767,6 +721,33 @@ def normalize_excel(input_file: str, out_path: str) -> str:
     Normalise et écrit directement vers out_path (ex: 12NV2024.xlsx dans dossier COMAR).
     """
     df = pd.read_excel(input_file, sheet_name=0, dtype=str)
+    df = normalize_dataframe(df)
+
+    # écrire avec style (et safe save si ouvert)
+    out_path = _write_excel_with_style(df, out_path)
+    return out_path
+
+
+def as_excel_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Même contenu que pd.read_excel(dtype=str) du fichier 12E exporté par Extraction1213 :
+    cellules vides -> NaN, montants entiers sans ".0", en-têtes en texte.
+    Permet de normaliser le DataFrame extrait sans repasser par le fichier.
+    """
+    def _cell(v):
+        if v is None or (isinstance(v, float) and v != v) or (isinstance(v, str) and v == ""):
+            return float("nan")
+        if isinstance(v, float) and v.is_integer():
+            return str(int(v))
+        return str(v)
+
+    out = df.copy()
+    out.columns = [str(c) for c in out.columns]
+    return out.apply(lambda col: col.map(_cell)).astype(object)
+
+
+def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalisation Annexe 12 (CATEGORIES, VIE, TOTAL) d'un DataFrame texte"""
     if df is None or df.empty:
         raise ValueError("Excel vide / non lisible.")
 
@@ -788,10 +769,31 @@ def normalize_excel(input_file: str, out_path: str) -> str:
 
     # 4) supprimer définitivement lignes VIE/TOTAL si présentes
     df = _drop_rows_vie_total(df)
+    return df
 
-    # écrire avec style (et safe save si ouvert)
-    out_path = _write_excel_with_style(df, out_path)
-    return out_path
+
+def run_from_dataframe(df: pd.DataFrame, out_path: str, ann: str = "12", interactive: bool = None) -> int:
+    """
+    Version en process de main() : normalise le tableau extrait (sans relire 12E),
+    écrit le NV puis lance la boucle de validation. Retourne 0 si valide.
+    """
+    out_path = _write_excel_with_style(normalize_dataframe(as_excel_strings(df)), out_path)
+    print(f"✅ Fichier normalisé: {out_path}")
+    return validate_excel_loop_vie_total(out_path, annexe_num=ann, interactive=interactive)
+
+
+def validate_headless(xlsx_path: str, annexe_num: str = None) -> int:
+    """
+    Revalide un NV déjà normalisé (ex: corrigé puis sauvegardé) sans Excel ni Ctrl+S.
+    Retourne 0 (valide), 1 (invalide, voir <NV>.corrections.json) ou 2 (erreur)
+    """
+    annexe_num = annexe_num or _infer_annexe_and_year(xlsx_path)[0]
+    try:
+        return validate_excel_loop_vie_total(xlsx_path, annexe_num=annexe_num, interactive=False)
+    except Exception as e:
+        print(f"❌ Validation impossible ({xlsx_path}): {e}")
+        write_corrections_report(xlsx_path, f"NorVal{annexe_num}", STATUS_ERROR, error=e)
+        return STATUS_ERROR
 
 
 
@@ -867,11 +869,11 @@ def validate_excel_vie_total_c1(xlsx_path: str) -> tuple[str, str]:
 
     invalid_count = 0
 
-    for r in range(2, ws.max_row + 1):
-        vie = _to_number_or_none(ws.cell(r, col_vie).value) or 0
-        total = _to_number_or_none(ws.cell(r, col_total).value) or 0
+    rows = range(2, ws.max_row + 1)
+    c1_values, c1_invalid = _c1_total_minus_vie([_to_number_or_none(ws.cell(r, col_vie).value) for r in rows],
+                                                [_to_number_or_none(ws.cell(r, col_total).value) for r in rows])
 
-        c1 = int(round(total - vie))
+    for r, c1, invalid in zip(rows, c1_values, c1_invalid):
         ws.cell(r, col_c1).value = c1
         ws.cell(r, col_c1).number_format = "0"
 
@@ -881,8 +883,8 @@ def validate_excel_vie_total_c1(xlsx_path: str) -> tuple[str, str]:
         ws.cell(r, col_total).alignment = align_center
         ws.cell(r, col_c1).alignment = align_center
 
-        # règle: C1 doit être exactement 0
-        if c1 != 0:
+        # règle: C1 doit être exactement 0 (arrondi à l'unité)
+        if invalid:
             ws.cell(r, col_vie).fill = red_fill
             invalid_count += 1
         else:
@@ -981,11 +983,14 @@ def main():
     import os
     import sys
 
-    if len(sys.argv) < 2:
-        print("Usage: py C.py <12E2024.xlsx ou 13E2024.xlsx>")
+    # --headless: une passe sans Excel, rapport de corrections, code retour 0 / 1 / 2
+    headless = "--headless" in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a != "--headless"]
+    if not args:
+        print("Usage: py C.py <12E2024.xlsx ou 13E2024.xlsx> [--headless]")
         return 1
 
-    in_path = sys.argv[1].strip('"').strip()
+    in_path = args[0].strip('"').strip()
     if not os.path.exists(in_path):
         print(f"❌ Fichier introuvable: {in_path}")
         return 1
@@ -999,7 +1004,9 @@ def main():
     out_path = normalize_excel(in_path, out_path)
     print(f"✅ Fichier normalisé: {out_path}")
 
-    # validation (boucle Ctrl+S)
+    # validation (boucle Ctrl+S, ou une passe en --headless)
+    if headless:
+        return validate_headless(out_path, annexe_num=ann)
     return validate_excel_loop_vie_total(out_path, annexe_num=ann)
 
 
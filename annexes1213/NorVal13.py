@@ -24,6 +24,16 @@ import openpyxl
 from openpyxl.styles import PatternFill
 from openpyxl.utils import get_column_letter
 
+# Accès au package src/ quand le script est lancé directement
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT_DIR not in sys.path:
+    sys.path.insert(0, _ROOT_DIR)
+from src.utils.numbers import parse_number as _parse_amount
+from src.utils.identities import Statement, get_identities
+from src.utils.validation_report import (STATUS_VALID, STATUS_INVALID, STATUS_ERROR, correction, is_headless,
+                                         write_corrections_report)
+from src.utils.watcher import wait_for_save
+
 # =========================
 # CONFIG
 # =========================
@@ -131,45 +141,9 @@ def best_match(value: str, expected: List[str], min_score: float = 78.0) -> Tupl
 # UTILS: nombres
 # =========================
 
-_NUM_RE = re.compile(r"[-+]?\d[\d\s.,]*")
-
 def parse_number(x) -> Optional[float]:
-    if x is None:
-        return None
-    if isinstance(x, (int, float)):
-        return float(x)
-    s = str(x).strip()
-    if not s:
-        return None
-
-    # extraire la première séquence num-like
-    m = _NUM_RE.search(s.replace("\u00A0", " "))
-    if not m:
-        return None
-    token = m.group(0)
-
-    # enlever espaces
-    token = token.replace(" ", "")
-
-    # gérer virgule/point
-    # si contient , et . => on suppose . = milliers, , = décimal (ou l'inverse) : on prend dernière occurrence comme décimal
-    if "," in token and "." in token:
-        if token.rfind(",") > token.rfind("."):
-            token = token.replace(".", "")
-            token = token.replace(",", ".")
-        else:
-            token = token.replace(",", "")
-    else:
-        # si juste virgule -> décimal
-        if "," in token and "." not in token:
-            token = token.replace(",", ".")
-        # si juste point -> décimal
-        # sinon ok
-
-    try:
-        return float(token)
-    except:
-        return None
+    # premier montant de la cellule (règles de src.utils.numbers)
+    return _parse_amount(x, search=True)
 
 
 # =========================
@@ -456,35 +430,34 @@ def validate_c1_inplace(ws, header_row: int = 1, data_start_row: int = 2) -> Lis
     if not cat_col or not total_col or not c1_col:
         raise ValueError("Il faut CATEGORIES, TOTAL et C1 dans l'entête.")
 
-    # colonnes numériques = toutes sauf CATEGORIES et C1
-    numeric_cols = [c for k, c in headers.items() if k not in ("CATEGORIES", "C1")]
-
-    invalids: List[InvalidCell] = []
-
-    for r in range(data_start_row, ws.max_row + 1):
-        cat = ws.cell(row=r, column=cat_col).value
+    # colonnes numériques = toutes sauf CATEGORIES et C1 ; TOTAL = somme des autres
+    # ("annexe13" dans config/identities.json), évalué sur toutes les lignes en une passe
+    value_keys = [k for k in headers if k not in ("CATEGORIES", "C1")]
+    value_cols = [headers[k] for k in value_keys]
+    rows, cells = [], []
+    for r, row in enumerate(ws.iter_rows(min_row=data_start_row, max_row=ws.max_row, values_only=True),
+                            start=data_start_row):
+        cat = row[cat_col - 1] if cat_col <= len(row) else None
         if cat is None or str(cat).strip() == "":
             continue
+        rows.append(r)
+        cells.append([row[c - 1] if c <= len(row) else None for c in value_cols])
 
-        total_val = parse_number(ws.cell(row=r, column=total_col).value)
-        if total_val is None:
-            continue
-
-        row_sum = 0.0
-        for c in numeric_cols:
-            if c == total_col:
-                continue
-            v = parse_number(ws.cell(row=r, column=c).value)
-            if v is None:
-                continue
-            row_sum += v
+    invalids: List[InvalidCell] = []
+    if not rows:
+        return invalids
 
-        c1 = total_val - row_sum
+    statement = Statement(rows, None, value_keys, cells, search=True)
+    c1_result = get_identities("annexe13").evaluate(statement, tolerance=TOL)["C1"]
 
+    for r, evaluated, c1, failed in zip(rows, c1_result.evaluated, c1_result.residuals, c1_result.failed):
+        if not evaluated:
+            continue
+        c1 = float(c1)
         c1_cell = ws.cell(row=r, column=c1_col)
         c1_cell.value = c1
 
-        if abs(c1) <= TOL:
+        if not failed:
             c1_cell.fill = copy.copy(FILL_GREEN)
         else:
             c1_cell.fill = copy.copy(FILL_ORANGE)
@@ -573,31 +546,9 @@ def _close_excel_handle(handle):
 
 def wait_for_ctrl_s(file_path: str, poll: float = 0.8, timeout_sec: Optional[int] = None) -> bool:
     """
-    On attend que le fichier soit sauvegardé (= mtime change).
+    On attend que le fichier soit sauvegardé (inotify sous Linux, sinon mtime toutes les poll s).
     """
-    try:
-        last_mtime = os.path.getmtime(file_path)
-    except:
-        last_mtime = None
-
-    start = time.time()
-    while True:
-        time.sleep(poll)
-
-        if timeout_sec is not None and (time.time() - start) > timeout_sec:
-            return False
-
-        try:
-            cur = os.path.getmtime(file_path)
-        except:
-            continue
-
-        if last_mtime is None:
-            last_mtime = cur
-            continue
-
-        if cur != last_mtime:
-            return True
+    return wait_for_save(file_path, timeout=timeout_sec, poll_interval=poll)
 
 
 def save_with_retries(wb, path: str, tries: int = 10, sleep_sec: float = 0.6):
@@ -618,6 +569,13 @@ def save_with_retries(wb, path: str, tries: int = 10, sleep_sec: float = 0.6):
 
 def normalize_excel_annexe13_keep_style(in_path: str, out_path: str) -> str:
     wb = openpyxl.load_workbook(in_path)
+    normalize_workbook_annexe13(wb)
+    save_with_retries(wb, out_path)
+    return out_path
+
+
+def normalize_workbook_annexe13(wb):
+    """Normalisation in place de la feuille active d'un workbook (chargé ou construit en mémoire)"""
     ws = wb.active  # tableau principal
 
     # 1) normaliser colonnes / lignes
@@ -636,12 +594,10 @@ def normalize_excel_annexe13_keep_style(in_path: str, out_path: str) -> str:
     autosize_columns(ws)
     format_header_row(ws, header_row=1, min_h=28.0)
     autosize_columns(ws)
-
-    save_with_retries(wb, out_path)
-    return out_path
+    return wb
 
 
-def validate_excel_loop_annexe13_keep_style(xlsx_path: str) -> int:
+def validate_excel_loop_annexe13_keep_style(xlsx_path: str, interactive: Optional[bool] = None) -> int:
     """
     Boucle:
       - ouvre workbook
@@ -649,7 +605,11 @@ def validate_excel_loop_annexe13_keep_style(xlsx_path: str) -> int:
       - calcule C1 partout + coloration
       - si invalide => ouvre Excel et attend Ctrl+S, ferme, relance validation
       - si valide => termine
+    interactive=False (ou CMF_HEADLESS=1): une seule passe, rapport <NV>.corrections.json,
+    retourne 0 (valide) / 1 (invalide)
     """
+    if interactive is None:
+        interactive = not is_headless()
     while True:
         wb = openpyxl.load_workbook(xlsx_path)
         ws = wb.active
@@ -659,6 +619,7 @@ def validate_excel_loop_annexe13_keep_style(xlsx_path: str) -> int:
 
         # recalcul + coloration
         invalids = validate_c1_inplace(ws, header_row=1, data_start_row=2)
+        c1_col = _find_header_map(ws, header_row=1).get("C1")
 
         # auto-size (largeur + hauteur)
         autosize_columns(ws)
@@ -673,9 +634,17 @@ def validate_excel_loop_annexe13_keep_style(xlsx_path: str) -> int:
 
         if not invalids:
             print("STATUT: Valide ✅ (Annexe 13)")
+            if not interactive:
+                write_corrections_report(xlsx_path, "NorVal13", STATUS_VALID)
             return 0
 
         print(f"STATUT: Invalide ❌ (Annexe 13) | lignes invalides = {len(invalids)} | Excel rows: {[x.excel_row for x in invalids]}")
+        if not interactive:
+            write_corrections_report(xlsx_path, "NorVal13", STATUS_INVALID, [
+                correction(x.excel_row, c1_col, value=x.c1_value,
+                           message=f"C1 = TOTAL - somme des colonnes = {x.c1_value:g} (tolérance {TOL:g})")
+                for x in invalids])
+            return STATUS_INVALID
         print("🟡 Corrige dans Excel puis fais Ctrl+S (ensuite reviens ici).")
 
         # ouvrir excel + attendre ctrl+s
@@ -700,6 +669,32 @@ def validate_excel_loop_annexe13_keep_style(xlsx_path: str) -> int:
         print("🔁 Relance validation...")
 
 
+def run_from_workbook(wb, in_path: str, interactive: Optional[bool] = None) -> int:
+    """
+    Version en process de main() : normalise le workbook 13E construit en mémoire
+    par Extraction1213 (sans le relire), écrit le NV à côté de in_path puis lance
+    la boucle de validation. Retourne 0 si valide.
+    """
+    out_path = _make_default_out_path(os.path.abspath(in_path))
+    normalize_workbook_annexe13(wb)
+    save_with_retries(wb, out_path)
+    print(f"✅ Fichier normalisé: {out_path}")
+    return validate_excel_loop_annexe13_keep_style(out_path, interactive=interactive)
+
+
+def validate_headless(xlsx_path: str) -> int:
+    """
+    Revalide un NV déjà normalisé (ex: corrigé puis sauvegardé) sans Excel ni Ctrl+S.
+    Retourne 0 (valide), 1 (invalide, voir <NV>.corrections.json) ou 2 (erreur)
+    """
+    try:
+        return validate_excel_loop_annexe13_keep_style(xlsx_path, interactive=False)
+    except Exception as e:
+        print(f"❌ Validation impossible ({xlsx_path}): {e}")
+        write_corrections_report(xlsx_path, "NorVal13", STATUS_ERROR, error=e)
+        return STATUS_ERROR
+
+
 # =========================
 # MAIN
 # =========================
@@ -725,11 +720,14 @@ def _make_default_out_path(in_path: str) -> str:
 
 
 def main() -> int:
-    if len(sys.argv) < 2:
-        print('Usage: py B.py "13E2024.xlsx"')
+    # --headless: une passe sans Excel, rapport de corrections, code retour 0 / 1 / 2
+    headless = "--headless" in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a != "--headless"]
+    if not args:
+        print('Usage: py B.py "13E2024.xlsx" [--headless]')
         return 2
 
-    in_path = sys.argv[1]
+    in_path = args[0]
     if not os.path.isabs(in_path):
         in_path = os.path.abspath(in_path)
 
@@ -752,7 +750,9 @@ def main() -> int:
         out_path = in_path
         print(f"✅ Fichier normalisé: {out_path}")
 
-    # 2) boucle validation C1
+    # 2) boucle validation C1 (une passe en --headless)
+    if headless:
+        return validate_headless(out_path)
     return validate_excel_loop_annexe13_keep_style(out_path)
 
 
@@ -0,0 +1,369 @@
+"""
+Batch Entry Point for Financial Data Extraction
+Runs second_main.run_extraction over a list of (société, année) jobs, or over
+every insurer of the CMF dropdown ("all"), with bounded parallelism.
+Jobs already done are skipped, and a per-job timing/status summary is written at the end.
+
+Exemples :
+    python batch_main.py --all --years 2015-2025 --workers 2
+    python batch_main.py --job "LLOYD TUNISIE:2024" --job "STAR:2023"
+    python batch_main.py --all --new-only          (nightly : nouveaux dépôts uniquement)
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from second_main import run_extraction, STATUS_OK, STATUS_FAILED, STATUS_PARTIAL
+from src.utils import metrics
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('extraction.log'),
+        logging.StreamHandler()
+    ]
+)
+
+OUTPUTS_DIR = os.path.join(os.getcwd(), "outputs")
+STATE_FILE = os.path.join(OUTPUTS_DIR, "batch_state.json")
+
+DEFAULT_YEARS = range(2015, 2026)
+
+# Jobs dont les données sont chargées en base dans une même transaction
+BULK_LOAD_SIZE = int(os.environ.get("CMF_BULK_LOAD_SIZE", "20"))
+
+# "all" ne garde que les compagnies d'assurance du menu CMF
+INSURER_PATTERN = re.compile(r"ASSURANCE|TAKAFUL", re.IGNORECASE)
+
+
+def _job_key(company, year):
+    return f"{company}|{year}"
+
+
+def load_state(path=STATE_FILE):
+    """Statut des jobs des lancements précédents"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def list_all_companies(insurers_only=True):
+    """Sociétés du menu déroulant CMF"""
+    from src.scraper.cmf_scraper import get_all_companies_fast
+
+    companies = get_all_companies_fast()
+
+    if insurers_only:
+        companies = [c for c in companies if INSURER_PATTERN.search(c)]
+    return companies
+
+
+def build_jobs(pairs=None, all_companies=False, years=DEFAULT_YEARS, insurers_only=True):
+    """Liste de (société, année) : paires explicites ou produit société x année"""
+    jobs = list(pairs or [])
+    if all_companies:
+        for company in list_all_companies(insurers_only):
+            for year in years:
+                jobs.append((company, int(year)))
+
+    # Dédoublonnage en gardant l'ordre
+    seen = set()
+    unique_jobs = []
+    for company, year in jobs:
+        key = _job_key(company, year)
+        if key not in seen:
+            seen.add(key)
+            unique_jobs.append((company, int(year)))
+    return unique_jobs
+
+
+def sync_new_filings(companies, years=None, catalog_path=None):
+    """
+    Delta sync of the local document catalog for each company.
+    Returns the (société, année) pairs of the filings not processed yet: the new
+    ones, plus those whose job failed or was interrupted in an earlier run
+    (in_database = 0 in the catalog, see mark_done_in_catalog).
+    """
+    from src.scraper.cmf_scraper import sync_company_documents
+    from src.database.document_catalog import DocumentCatalog
+
+    catalog = DocumentCatalog(catalog_path) if catalog_path else DocumentCatalog()
+    wanted_years = set(int(y) for y in years) if years else None
+    new_jobs = []
+    new_count = 0
+    try:
+        for company in companies:
+            try:
+                target_societe, new_documents = sync_company_documents(company, catalog)
+            except Exception as e:
+                logging.error(f"Sync catalogue {company} : {e}")
+                print(f"⚠️ Sync catalogue impossible pour {company} : {e}")
+                continue
+            new_count += len(new_documents)
+            if not target_societe:
+                continue
+            # New filings are in_database = 0 too: one query covers both
+            for doc in catalog.pending_database(target_societe):
+                if doc["annee"] is None:
+                    continue
+                year = int(doc["annee"])
+                if wanted_years is None or year in wanted_years:
+                    new_jobs.append((target_societe, year))
+    finally:
+        catalog.close()
+
+    print(f"🆕 {new_count} nouveau(x) dépôt(s) détecté(s), {len(set(new_jobs))} job(s) à traiter")
+    return new_jobs
+
+
+def mark_done_in_catalog(results, catalog_path=None):
+    """Flag the catalog filings of the successful jobs, so --new-only stops queueing them"""
+    from src.database.document_catalog import DocumentCatalog
+
+    catalog = DocumentCatalog(catalog_path) if catalog_path else DocumentCatalog()
+    try:
+        return sum(catalog.mark_year_in_database(r["company"], r["year"])
+                   for r in results if r["status"] in (STATUS_OK, "skipped"))
+    finally:
+        catalog.close()
+
+
+def _run_job(company, year, collect_facts=False):
+    """
+    Exécuté dans un process du pool.
+    collect_facts : les données passif/actif reviennent dans result["facts"] au lieu
+    d'être écrites en base par le worker (chargement groupé dans run_batch).
+    """
+    start = time.time()
+    collect = {} if collect_facts else None
+    try:
+        status = run_extraction(company, year, collect=collect) or STATUS_FAILED
+        error = None
+    except Exception as e:
+        status, error = STATUS_FAILED, str(e)
+    return {
+        "company": company,
+        "year": year,
+        "status": status,
+        "seconds": round(time.time() - start, 2),
+        "error": error,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "facts": collect or None,
+    }
+
+
+def load_facts(extractions):
+    """Bulk load of the collected jobs (one transaction); True when it succeeded"""
+    from src.database.db_manager import create_database_and_tables, bulk_load_extractions
+
+    connection, cursor = create_database_and_tables()
+    if not connection:
+        return False
+    try:
+        return bulk_load_extractions(connection, extractions) is not None
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def run_batch(jobs, workers=2, skip_done=True, state_path=STATE_FILE, on_result=None,
+              bulk_size=BULK_LOAD_SIZE, load_db=None):
+    """
+    Run jobs through a process pool of `workers` and return the list of results.
+    Jobs whose last status is "ok" are skipped when skip_done is True ("partial" and
+    "failed" jobs are run again). on_result(result) is called as each job finishes.
+    With the database enabled (load_db, default database_enabled()), the workers only
+    collect the financial data: it is loaded bulk_size jobs at a time through load_facts,
+    and those jobs are saved / reported once their batch is committed. A batch that
+    fails to load turns its jobs "partial" so the next run retries them.
+    """
+    from src.database.db_manager import database_enabled
+
+    if load_db is None:
+        load_db = database_enabled()
+    state = load_state(state_path)
+    results = []
+    pending = []
+    loading = []
+
+    def record(result):
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    def flush():
+        if not loading:
+            return
+        loaded = load_facts([facts for _, facts in loading])
+        print(f"💾 Chargement base de {len(loading)} job(s) : {'ok' if loaded else 'échec'}")
+        for result, _ in loading:
+            if not loaded:
+                result.update(status=STATUS_PARTIAL, error="chargement base échoué")
+            state[_job_key(result["company"], result["year"])] = result
+            record(result)
+        save_state(state, state_path)
+        loading.clear()
+
+    def finish(result):
+        facts = result.pop("facts", None)
+        if facts:
+            # State written only after the commit: an interrupted batch re-runs these jobs
+            loading.append((result, facts))
+            if len(loading) >= bulk_size:
+                flush()
+            return
+        state[_job_key(result["company"], result["year"])] = result
+        save_state(state, state_path)
+        record(result)
+
+    for company, year in jobs:
+        previous = state.get(_job_key(company, year))
+        if skip_done and previous and previous.get("status") == STATUS_OK:
+            record(dict(previous, status="skipped", seconds=0.0))
+        else:
+            pending.append((company, year))
+
+    print(f"\n📋 {len(jobs)} job(s) : {len(pending)} à traiter, {len(jobs) - len(pending)} déjà faits")
+
+    if workers <= 1:
+        for company, year in pending:
+            finish(_run_job(company, year, load_db))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_job, company, year, load_db): (company, year)
+                       for company, year in pending}
+            for future in as_completed(futures):
+                company, year = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f"Job {company} {year} interrompu : {e}")
+                    result = {"company": company, "year": year, "status": STATUS_FAILED,
+                              "seconds": None, "error": str(e), "finished_at": None}
+                finish(result)
+
+    flush()
+    return results
+
+
+def write_summary(results, total_seconds, output_dir=OUTPUTS_DIR):
+    """Print the per-job table and write it as JSON; returns the JSON path"""
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+
+    print(f"\n{'='*70}")
+    print("📊 RÉSUMÉ DU BATCH")
+    print(f"{'='*70}")
+    for r in sorted(results, key=lambda r: (r["company"], r["year"])):
+        seconds = "-" if r.get("seconds") is None else f"{r['seconds']:.1f}s"
+        print(f"{r['status']:<10} {seconds:>8}  {r['year']}  {r['company']}")
+    print(f"{'-'*70}")
+    print("  ".join(f"{k}={v}" for k, v in sorted(counts.items())) + f"  total={total_seconds:.1f}s")
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = os.path.join(output_dir, f"batch_summary_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"total_seconds": round(total_seconds, 2), "counts": counts, "jobs": results},
+                  f, ensure_ascii=False, indent=2)
+    print(f"💾 Résumé : {summary_path}")
+    return summary_path
+
+
+def write_metrics_summary(since, prom_path=None):
+    """
+    Per-stage time of this batch, aggregated from the span log of every worker
+    process (CMF_METRICS_LOG); optionally written as a Prometheus text file.
+    """
+    records = metrics.read_spans(since=since)
+    if not records:
+        return None
+    registry = metrics.aggregate(records)
+    print(f"\n⏱ Temps par étape ({len(records)} spans, {metrics.METRICS_LOG})")
+    print(metrics.format_summary(registry))
+    if prom_path:
+        print(f"💾 Métriques Prometheus : {metrics.write_prometheus(prom_path, registry)}")
+    return registry
+
+
+def _parse_years(text):
+    """'2015-2025' ou '2019,2021,2024'"""
+    years = []
+    for part in text.split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            years.extend(range(int(first), int(last) + 1))
+        elif part:
+            years.append(int(part))
+    return years
+
+
+def _parse_job(text):
+    """'SOCIETE:ANNEE'"""
+    company, _, year = text.rpartition(":")
+    if not company or not year.strip().isdigit():
+        raise argparse.ArgumentTypeError(f"Job invalide (attendu SOCIETE:ANNEE) : {text}")
+    return company.strip(), int(year)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extraction CMF en batch")
+    parser.add_argument("--job", action="append", type=_parse_job, default=[],
+                        help="Paire SOCIETE:ANNEE (répétable)")
+    parser.add_argument("--all", action="store_true", help="Toutes les sociétés d'assurance du menu CMF")
+    parser.add_argument("--all-companies", action="store_true",
+                        help="Avec --all : ne pas filtrer sur les compagnies d'assurance")
+    parser.add_argument("--years", type=_parse_years, default=list(DEFAULT_YEARS),
+                        help="Années pour --all (ex: 2015-2025)")
+    parser.add_argument("--workers", type=int, default=2, help="Jobs en parallèle")
+    parser.add_argument("--force", action="store_true", help="Relancer aussi les jobs déjà faits")
+    parser.add_argument("--new-only", action="store_true",
+                        help="Avec --all : synchroniser le catalogue et ne traiter que les nouveaux dépôts")
+    parser.add_argument("--metrics-prom", help="Écrire les métriques du batch au format texte Prometheus")
+    args = parser.parse_args(argv)
+
+    if not args.job and not args.all:
+        parser.error("préciser --job SOCIETE:ANNEE ou --all")
+
+    # Pas d'Excel ni de Ctrl+S en batch : NorVal12/13 écrivent un rapport de corrections
+    os.environ.setdefault("CMF_HEADLESS", "1")
+
+    start = time.time()
+    if args.all and args.new_only:
+        from src.scraper.cmf_scraper import get_all_companies_fast
+        companies = get_all_companies_fast()
+        if not args.all_companies:
+            companies = [c for c in companies if INSURER_PATTERN.search(c)]
+        jobs = build_jobs(args.job + sync_new_filings(companies, args.years))
+    else:
+        jobs = build_jobs(args.job, args.all, args.years, insurers_only=not args.all_companies)
+    on_result = (lambda result: mark_done_in_catalog([result])) if args.new_only else None
+    results = run_batch(jobs, workers=args.workers, skip_done=not args.force, on_result=on_result)
+    write_summary(results, time.time() - start)
+    write_metrics_summary(start, args.metrics_prom)
+
+    return 0 if all(r["status"] not in (STATUS_FAILED, STATUS_PARTIAL) for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
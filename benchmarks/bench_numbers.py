@@ -0,0 +1,268 @@
+"""
+Numbers Benchmark
+src.utils.numbers.parse_numbers (one call per column) vs the per-cell loops it replaced
+(helpers.clean_number, validate_actif_excel.clean_number, Extraction1213.clean_number,
+NorVal12._extract_number_only, as they were) and vs parse_number applied cell by cell.
+
+    python benchmarks/bench_numbers.py [pdf ...] [--cells 200000] [--repeat 3] [--json out.json]
+
+Columns measured:
+- "pdf": every cell of the passif / actif pages of the PDFs (PyMuPDF words), repeated
+  up to --cells (real mix of amounts, labels, codes, dates, empty cells)
+- "unique": --cells distinct French-formatted amounts (worst case: nothing repeats)
+validate_actif.clean_number returns 0.0 for any invalid cell, so its parsed share is 100%.
+"""
+import os
+import re
+import sys
+import json
+import glob
+import time
+import random
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+os.environ.setdefault("CMF_METRICS_LOG", "off")
+
+import numpy as np
+import pandas as pd
+
+from src.extraction.page_index import get_page_index
+from src.extraction.table_engines import get_engine
+from src.utils import numbers
+
+
+# ---- Per-cell parsers replaced by src.utils.numbers (kept here as the baseline) ----
+
+def legacy_helpers_clean_number(text):
+    if isinstance(text, str):
+        cleaned = re.sub(r'\s+', '', text).replace(',', '.').rstrip('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+        try:
+            return int(float(cleaned))
+        except ValueError:
+            return text
+    return int(text) if isinstance(text, (int, float)) else text
+
+
+def legacy_actif_clean_number(x):
+    if pd.isna(x):
+        return 0.0
+    if isinstance(x, (int, float)):
+        return float(x)
+    s = str(x).replace("\u00a0", "").replace(" ", "").replace(",", ".").strip()
+    if s == "":
+        return 0.0
+    try:
+        return float(s)
+    except ValueError:
+        return 0.0
+
+
+_LEGACY_DASHES = {"-", "\u2010", "\u2013", "\u2014", "\u2212"}
+
+
+def _legacy_normalize_text_cell(x):
+    if x is None:
+        return ""
+    if isinstance(x, float) and pd.isna(x):
+        return ""
+    s = str(x).replace("\r", " ").replace("\n", " ").replace("\u00a0", " ")
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def legacy_annexe_clean_number(val):
+    if val is None or (isinstance(val, float) and pd.isna(val)):
+        return ""
+    if isinstance(val, (int, float)) and not isinstance(val, bool):
+        return int(val) if isinstance(val, float) and abs(val - int(val)) < 1e-9 else val
+    s = _legacy_normalize_text_cell(val)
+    if s == "" or s in _LEGACY_DASHES:
+        return ""
+    negative = False
+    if s.startswith("(") and s.endswith(")"):
+        negative = True
+        s = s[1:-1].strip()
+    if s and s[0] in _LEGACY_DASHES:
+        negative = True
+        s = s[1:].strip()
+    s = re.sub(r"[A-Za-z]", "", s).strip().replace(" ", "")
+    if s.count(",") == 1 and s.count(".") == 0:
+        s = s.replace(",", ".")
+    else:
+        s = s.replace(",", "")
+    if s.count(".") > 1:
+        s = s.replace(".", "")
+    if not re.fullmatch(r"\d+(\.\d+)?", s):
+        return _legacy_normalize_text_cell(val)
+    num = float(s)
+    if abs(num - int(num)) < 1e-9:
+        num = int(num)
+    return -num if negative else num
+
+
+def legacy_extract_number_only(x):
+    if x is None or (isinstance(x, float) and pd.isna(x)):
+        return ""
+    if isinstance(x, (int, float)) and not isinstance(x, bool):
+        return int(x) if isinstance(x, float) and abs(x - int(x)) < 1e-9 else x
+    s = str(x).strip()
+    if s == "":
+        return ""
+    s = s.replace("\u00a0", " ").replace(" ", "")
+    negative = False
+    if s.startswith("(") and s.endswith(")"):
+        negative = True
+        s = s[1:-1]
+    s = s.replace("\u2212", "-").replace("\u2013", "-").replace("\u2014", "-").replace("\u2010", "-")
+    m = re.search(r"-?\d[\d\.,]*", s)
+    if not m:
+        return ""
+    num = re.sub(r"[^0-9\.\-]", "", m.group(0).replace(",", "."))
+    if num.count(".") > 1:
+        num = num.replace(".", "")
+    try:
+        if num in ("", "-", "."):
+            return ""
+        val = float(num)
+        return int(round(-val if negative else val))
+    except ValueError:
+        return ""
+
+
+LEGACY = {
+    "helpers.clean_number": (legacy_helpers_clean_number, False),
+    "validate_actif.clean_number": (legacy_actif_clean_number, False),
+    "Extraction1213.clean_number": (legacy_annexe_clean_number, False),
+    "NorVal12._extract_number_only": (legacy_extract_number_only, True),
+}
+
+
+# ---- Data ----
+
+def pdf_cells(pdfs):
+    engine = get_engine("pymupdf")
+    cells = []
+    for pdf in pdfs:
+        index = get_page_index(pdf)
+        for table_type in ("passif", "actif"):
+            page_num, is_scanned = index.locate(table_type, ocr=False)
+            if page_num and not is_scanned:
+                for row in engine.extract_rows(pdf, page_num):
+                    cells.extend(row)
+    return cells
+
+
+def unique_amounts(n, seed=0):
+    rng = random.Random(seed)
+    cells = []
+    for _ in range(n):
+        value = f"{rng.randint(0, 10 ** 9):,}".replace(",", "\u00a0")
+        if rng.random() < 0.2:
+            value = f"({value})"
+        elif rng.random() < 0.2:
+            value = f"{value},{rng.randint(0, 999):03d}"
+        cells.append(value)
+    return cells
+
+
+def column(cells, n):
+    if not cells:
+        return pd.Series([], dtype=object)
+    reps = -(-n // len(cells))
+    return pd.Series((cells * reps)[:n], dtype=object)
+
+
+# ---- Measure ----
+
+def timed(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _clear_memo():
+    numbers._parse_text_cached.cache_clear()
+
+
+def run(columns, repeat):
+    results = []
+    for name, series in columns.items():
+        for search in (False, True):
+            def vectorized():
+                _clear_memo()
+                return numbers.parse_numbers(series, search=search)
+
+            def per_cell():
+                _clear_memo()
+                return series.map(lambda x: numbers.parse_number(x, search=search))
+
+            t_vec, (values, mask) = timed(vectorized, repeat)
+            t_cell, _ = timed(per_cell, repeat)
+            results.append({"column": name, "cells": len(series), "parser": "parse_number (per cell)",
+                            "search": search, "seconds": round(t_cell, 4),
+                            "speedup": round(t_cell / t_vec, 1) if t_vec else None})
+            results.append({"column": name, "cells": len(series), "parser": "parse_numbers",
+                            "search": search, "seconds": round(t_vec, 4), "speedup": 1.0,
+                            "parsed": round(float(mask.mean()), 3) if len(mask) else 0.0})
+            for legacy_name, (fn, legacy_search) in LEGACY.items():
+                if legacy_search != search:
+                    continue
+                t_old, old = timed(lambda: series.map(fn), repeat)
+                old_num = np.array([float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                                    for v in old])
+                both = mask & ~np.isnan(old_num)
+                # Same amount where both parsers read one (legacy ints are truncated / rounded)
+                agree = np.isclose(np.trunc(values[both]), np.trunc(old_num[both]), atol=1).mean() if both.any() else None
+                results.append({"column": name, "cells": len(series), "parser": legacy_name,
+                                "search": search, "seconds": round(t_old, 4),
+                                "speedup": round(t_old / t_vec, 1) if t_vec else None,
+                                "parsed": round(float((~np.isnan(old_num)).mean()), 3),
+                                "agreement": round(float(agree), 3) if agree is not None else None})
+    return results
+
+
+def print_report(results):
+    header = f"{'column':<7} {'mode':<6} {'parser':<32} {'time':>9} {'x vec':>7} {'parsed':>7} {'agree':>6}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        parsed = f"{r['parsed']:.0%}" if r.get("parsed") is not None else "-"
+        agree = f"{r['agreement']:.0%}" if r.get("agreement") is not None else "-"
+        mode = "search" if r["search"] else "strict"
+        print(f"{r['column']:<7} {mode:<6} {r['parser']:<32} {r['seconds']:>8.3f}s {r['speedup'] or 0:>7} {parsed:>7} {agree:>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorized vs per-cell number parsing")
+    parser.add_argument("pdfs", nargs="*", help="PDFs (défaut : *.pdf à la racine du dépôt)")
+    parser.add_argument("--cells", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    pdfs = args.pdfs or sorted(glob.glob(str(ROOT / "*.pdf")))
+    columns = {"unique": column(unique_amounts(args.cells), args.cells)}
+    cells = pdf_cells(pdfs)
+    if cells:
+        columns = {"pdf": column(cells, args.cells), **columns}
+    else:
+        print("⚠️ Aucune cellule PDF, seule la colonne 'unique' est mesurée")
+
+    results = run(columns, max(1, args.repeat))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Résultats : {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
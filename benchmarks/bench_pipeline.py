@@ -0,0 +1,415 @@
+"""
+Pipeline Benchmark
+Times every extraction stage on the bundled PDFs, cold (all caches dropped) and warm
+(every stage primed once, caches kept): locate, rasterize, ocr, camelot,
+structure_passif, extract_actif, validate, export.
+Warm measures must be served by the caches: a warm stage with cache misses, or a
+cached stage without hits, is reported and fails the run.
+Each measure records wall time, CPU time and peak RSS; results go to JSON so two
+commits can be compared:
+
+    python benchmarks/bench_pipeline.py --json before.json
+    python benchmarks/bench_pipeline.py --compare before.json [--threshold 1.25]
+
+The persistent caches (table, OCR) and the Parquet output are redirected to a
+temporary directory, so the benchmark never touches cache/ or outputs/.
+"""
+import os
+import io
+import re
+import sys
+import json
+import time
+import glob
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import statistics
+import contextlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="cmf_bench_"))
+# Must be set before the cache modules are imported (their defaults are read at import)
+os.environ["CMF_TABLE_CACHE"] = str(WORK_DIR / "table_cache.sqlite")
+os.environ["CMF_OCR_CACHE"] = str(WORK_DIR / "ocr_cache.sqlite")
+os.environ["CMF_PARQUET_DIR"] = str(WORK_DIR / "parquet")
+os.environ.setdefault("CMF_METRICS_LOG", "off")
+
+import pytesseract
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from src.extraction.page_index import clear_page_indexes
+from src.extraction.rasterizer import get_rasterizer, render_page
+from src.extraction.ocr_cache import get_ocr_cache, ocr_page
+from src.extraction.table_cache import get_table_cache
+from src.extraction.pdf_parser import search_table_in_pdf, extract_table_from_page
+from src.extraction.hierarchy_detector_passif import structure_hierarchical_data_passif
+from src.extraction.extract_actifs import extract_actif
+from src.extraction.excel_exporter import write_passif_streaming
+from src.extraction.excel_exporter_actif import export_actif_to_excel
+from src.extraction.validate_passif_excel import write_validated_passif
+from src.extraction.validate_actif_excel import validate_actif_from_data
+from src.extraction.parquet_exporter import export_statement
+from src.utils.metrics import cache_stats
+
+OCR_DPI = 300
+STAGES = ("locate", "rasterize", "ocr", "camelot", "structure_passif", "extract_actif", "validate", "export")
+
+
+def drop_caches():
+    """Cold start: in-memory indexes / images and the persistent table / OCR caches"""
+    clear_page_indexes()
+    get_rasterizer().clear()
+    get_table_cache().clear()
+    get_ocr_cache().clear()
+
+
+def tesseract_available():
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+# ============================================================
+# Measure
+# ============================================================
+
+def _rss():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    import resource
+    # Lifetime peak only (kB on Linux): per-stage peaks need psutil
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRss:
+    """Samples the RSS of the process in a thread while a stage runs"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = _rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss())
+
+
+def measure(fn, verbose=False):
+    """(result, wall_s, cpu_s, peak_rss_mb, rss_delta_mb); stage prints are muted unless verbose"""
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with sink, PeakRss() as rss:
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+    mb = 1024 * 1024
+    return result, wall, cpu, rss.peak / mb, (rss.peak - rss.start) / mb
+
+
+# ============================================================
+# Stages: each returns its output, used by the next ones
+# ============================================================
+
+def stage_locate(ctx):
+    ctx["passif_page"], ctx["is_scanned"] = search_table_in_pdf(ctx["pdf"], "passif")
+    ctx["actif_page"], _ = search_table_in_pdf(ctx["pdf"], "actif")
+    return ctx["passif_page"]
+
+
+def stage_rasterize(ctx):
+    return render_page(ctx["pdf"], ctx["passif_page"], OCR_DPI)
+
+
+def stage_ocr(ctx):
+    return ocr_page(ctx["pdf"], ctx["passif_page"], OCR_DPI)
+
+
+def stage_camelot(ctx):
+    ctx["raw_passif"] = extract_table_from_page(ctx["pdf"], ctx["passif_page"], ctx["is_scanned"], "passif",
+                                                table_engine="camelot")
+    return ctx["raw_passif"]
+
+
+def stage_structure_passif(ctx):
+    ctx["passif"] = structure_hierarchical_data_passif(ctx["raw_passif"])
+    return ctx["passif"]
+
+
+def stage_extract_actif(ctx):
+    ctx["actif"] = extract_actif(ctx["pdf"], ctx["actif_page"] or 2, is_scanned=ctx["is_scanned"])
+    return ctx["actif"]
+
+
+def stage_validate(ctx):
+    out = ctx["out_dir"]
+    write_validated_passif(ctx["passif"], ctx["company"], str(out / "passif_validated.xlsx"), ctx["year"], ctx["year"] - 1)
+    if ctx.get("actif"):
+        validate_actif_from_data(ctx["actif"], ctx["company"], ctx["year"], str(out / "actif_validated.xlsx"))
+    return True
+
+
+def stage_export(ctx):
+    out = ctx["out_dir"]
+    write_passif_streaming(ctx["passif"], str(out / "passif.xlsx"), ctx["year"], ctx["year"] - 1)
+    if ctx.get("actif"):
+        export_actif_to_excel(ctx["actif"], str(out / "actif.xlsx"), ctx["year"], ctx["year"] - 1)
+    export_statement(ctx["passif"], ctx["company"], ctx["year"], "passif")
+    return True
+
+
+STAGE_FUNCS = {name: globals()[f"stage_{name}"] for name in STAGES}
+
+# Stages that must be answered from a cache when warm
+CACHED_STAGES = {"locate", "rasterize", "ocr", "camelot"}
+
+# Stages whose output another stage needs: they must succeed for the rest to run
+REQUIRES = {
+    "rasterize": "locate", "ocr": "locate", "camelot": "locate",
+    "structure_passif": "camelot", "extract_actif": "locate",
+    "validate": "structure_passif", "export": "structure_passif",
+}
+
+
+# ============================================================
+# Run
+# ============================================================
+
+def _year_from_name(pdf):
+    match = re.search(r"(20\d{2})", os.path.basename(pdf))
+    return int(match.group(1)) if match else 2024
+
+
+def run_pdf(pdf, stages, repeat, verbose=False):
+    ctx = {
+        "pdf": pdf,
+        "company": os.path.basename(pdf)[:40],
+        "year": _year_from_name(pdf),
+        "out_dir": Path(tempfile.mkdtemp(dir=WORK_DIR)),
+    }
+    skip = set()
+    if "ocr" in stages and not tesseract_available():
+        print("⚠️ Tesseract introuvable : étape ocr ignorée")
+        skip.add("ocr")
+
+    results = []
+    for mode in ("cold", "warm"):
+        if mode == "warm":
+            _prime_all(ctx, stages, skip)
+        for stage in stages:
+            required = REQUIRES.get(stage)
+            if stage in skip or (required and required in skip):
+                continue
+            samples, error = [], None
+            for _ in range(repeat):
+                if mode == "cold":
+                    drop_caches()
+                    # Cold stages still need what the previous stages produced
+                    if required and required not in ctx.get("_done", ()):
+                        _prime(ctx, stage)
+                before = _cache_totals()
+                try:
+                    output, wall, cpu, peak, delta = measure(lambda: STAGE_FUNCS[stage](ctx), verbose)
+                except Exception as e:
+                    error = str(e)
+                    break
+                if output is None or output is False:
+                    error = "aucun résultat"
+                    break
+                hits, misses = (after - prior for after, prior in zip(_cache_totals(), before))
+                samples.append((wall, cpu, peak, delta, hits, misses))
+                ctx.setdefault("_done", set()).add(stage)
+            if error:
+                print(f"⚠️ {stage} ({mode}) : {error}")
+                skip.add(stage)
+                continue
+            summary = _summary(pdf, stage, mode, samples)
+            if mode == "warm":
+                summary["warm_ok"] = _warm_ok(stage, summary)
+                if not summary["warm_ok"]:
+                    print(f"⚠️ {stage} (warm) : {summary['cache_misses']} miss / {summary['cache_hits']} hit "
+                          "de cache, la mesure n'est pas à chaud")
+            results.append(summary)
+    return results
+
+
+def _cache_totals():
+    """(hits, misses) summed over the registered caches (page index, raster, OCR, tables)"""
+    stats = cache_stats().values()
+    return sum(s["hits"] for s in stats), sum(s["misses"] for s in stats)
+
+
+def _warm_ok(stage, summary):
+    if summary["cache_misses"]:
+        return False
+    return stage not in CACHED_STAGES or summary["cache_hits"] > 0
+
+
+def _prime_all(ctx, stages, skip):
+    """Run every stage once, unmeasured and with the caches kept, before the warm pass"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        for stage in stages:
+            required = REQUIRES.get(stage)
+            if stage in skip or (required and required in skip):
+                continue
+            try:
+                STAGE_FUNCS[stage](ctx)
+            except Exception:
+                # Reported by the measured run
+                continue
+            ctx.setdefault("_done", set()).add(stage)
+
+
+def _prime(ctx, stage):
+    """Run the stages `stage` depends on (unmeasured), then drop the caches again"""
+    chain, current = [], REQUIRES.get(stage)
+    while current:
+        chain.insert(0, current)
+        current = REQUIRES.get(current)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in chain:
+            STAGE_FUNCS[name](ctx)
+            ctx.setdefault("_done", set()).add(name)
+    drop_caches()
+
+
+def _summary(pdf, stage, mode, samples):
+    walls = [s[0] for s in samples]
+    return {
+        "pdf": os.path.basename(pdf),
+        "stage": stage,
+        "cache": mode,
+        "runs": len(samples),
+        "wall_s": round(min(walls), 4),
+        "wall_median_s": round(statistics.median(walls), 4),
+        "cpu_s": round(min(s[1] for s in samples), 4),
+        "peak_rss_mb": round(max(s[2] for s in samples), 1),
+        "rss_delta_mb": round(max(s[3] for s in samples), 1),
+        "cache_hits": max(s[4] for s in samples),
+        "cache_misses": max(s[5] for s in samples),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def metadata(repeat):
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "rss_sampler": "psutil" if psutil is not None else "ru_maxrss",
+    }
+
+
+# ============================================================
+# Report / compare
+# ============================================================
+
+def print_report(results):
+    header = (f"{'PDF':<32} {'stage':<17} {'cache':<5} {'wall':>9} {'cpu':>9} {'peak MB':>8} {'Δ MB':>6} "
+              f"{'hit/miss':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['pdf'][:32]:<32} {r['stage']:<17} {r['cache']:<5} {r['wall_s']:>8.4f}s {r['cpu_s']:>8.4f}s "
+              f"{r['peak_rss_mb']:>8.1f} {r['rss_delta_mb']:>6.1f} {r['cache_hits']:>4}/{r['cache_misses']:<4}")
+
+
+def compare(results, baseline_path, threshold, min_delta=0.005):
+    """Print wall time ratios against a previous JSON; returns the regressions"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(r["pdf"], r["stage"], r["cache"]): r for r in baseline.get("results", [])}
+
+    print(f"\nComparaison avec {baseline_path} (commit {baseline.get('meta', {}).get('commit')})")
+    regressions = []
+    for r in results:
+        old = before.get((r["pdf"], r["stage"], r["cache"]))
+        if not old or not old["wall_s"]:
+            continue
+        ratio = r["wall_s"] / old["wall_s"]
+        flag = ""
+        if ratio > threshold and r["wall_s"] - old["wall_s"] > min_delta:
+            flag = "  ❌ régression"
+            regressions.append({**r, "baseline_wall_s": old["wall_s"], "ratio": round(ratio, 2)})
+        print(f"{r['pdf'][:32]:<32} {r['stage']:<17} {r['cache']:<5} {old['wall_s']:>8.4f}s -> {r['wall_s']:>8.4f}s "
+              f"x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Temps / CPU / mémoire par étape du pipeline")
+    parser.add_argument("pdfs", nargs="*", help="PDFs (défaut : *.pdf à la racine du dépôt)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Écrire les résultats dans ce fichier JSON")
+    parser.add_argument("--compare", help="JSON d'une exécution précédente")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Ratio de temps signalé comme régression")
+    parser.add_argument("--verbose", action="store_true", help="Afficher la sortie des étapes")
+    args = parser.parse_args(argv)
+
+    pdfs = args.pdfs or sorted(glob.glob(str(ROOT / "*.pdf")))
+    if not pdfs:
+        print("Aucun PDF à mesurer")
+        return 1
+
+    stages = [s for s in STAGES if s in args.stages]
+    try:
+        results = []
+        for pdf in pdfs:
+            print(f"⏱ {os.path.basename(pdf)}")
+            results.extend(run_pdf(pdf, stages, max(1, args.repeat), args.verbose))
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    print_report(results)
+    report = {"meta": metadata(max(1, args.repeat)), "results": results}
+    not_warm = [r for r in results if r.get("warm_ok") is False]
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Résultats : {args.json}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            return 1
+    if not_warm:
+        print(f"❌ {len(not_warm)} mesure(s) warm sans cache : {', '.join(r['stage'] for r in not_warm)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
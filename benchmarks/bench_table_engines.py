@@ -0,0 +1,146 @@
+"""
+Table Engines Benchmark
+Camelot stream vs PyMuPDF words on the passif / actif pages of the bundled PDFs:
+wall time per page and row-level agreement of the data rows.
+
+    python benchmarks/bench_table_engines.py [pdf ...] [--repeat 3] [--json out.json]
+
+Camelot is called directly (not through the table cache) so every run is a cold parse.
+"""
+import os
+import re
+import sys
+import json
+import time
+import glob
+import argparse
+import unicodedata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import camelot
+
+from src.extraction.page_index import get_page_index
+from src.extraction.table_engines import get_engine
+
+
+NUMBER_RE = re.compile(r"-?\(?\d{1,3}(?:[ \u00a0\u202f]\d{3})+\)?|-?\(?\d+\)?")
+
+
+def camelot_rows(pdf_path, page_num):
+    tables = camelot.read_pdf(pdf_path, flavor="stream", pages=str(page_num))
+    rows = []
+    for table in tables:
+        rows.extend(table.df.values.tolist())
+    return rows
+
+
+def row_key(row):
+    """(label letters, amounts) of a data row, None for rows without amount"""
+    text = " ".join(str(c) for c in row if c)
+    amounts = tuple(re.sub(r"[^\d-]", "", n) for n in NUMBER_RE.findall(text) if len(re.sub(r"\D", "", n)) >= 3)
+    if not amounts:
+        return None
+    label = NUMBER_RE.sub(" ", text)
+    label = unicodedata.normalize("NFKD", label).encode("ascii", "ignore").decode().lower()
+    label = re.sub(r"[^a-z]", "", label)
+    return label, amounts
+
+
+def amounts_key(row):
+    key = row_key(row)
+    return key[1] if key else None
+
+
+def agreement(reference, candidate, key=row_key):
+    """Share of the reference data rows found identically (label + amounts by default) in candidate"""
+    ref = [k for k in map(key, reference) if k]
+    cand = [k for k in map(key, candidate) if k]
+    if not ref:
+        return None, 0, len(cand)
+    remaining = list(cand)
+    matched = 0
+    for key in ref:
+        if key in remaining:
+            remaining.remove(key)
+            matched += 1
+    return matched / len(ref), len(ref), len(cand)
+
+
+def timed(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(pdfs, table_types, repeat):
+    engine = get_engine("pymupdf")
+    results = []
+    for pdf in pdfs:
+        index = get_page_index(pdf)
+        for table_type in table_types:
+            page_num, is_scanned = index.locate(table_type, ocr=False)
+            if not page_num or is_scanned:
+                print(f"⚠️ {os.path.basename(pdf)[:50]} : {table_type} introuvable / scanné, ignoré")
+                continue
+            t_camelot, ref = timed(lambda: camelot_rows(pdf, page_num), repeat)
+            t_pymupdf, cand = timed(lambda: engine.extract_rows(pdf, page_num), repeat)
+            score, n_ref, n_cand = agreement(ref, cand)
+            amount_score, _, _ = agreement(ref, cand, key=amounts_key)
+            results.append({
+                "pdf": os.path.basename(pdf),
+                "table": table_type,
+                "page": page_num,
+                "camelot_s": round(t_camelot, 4),
+                "pymupdf_s": round(t_pymupdf, 4),
+                "speedup": round(t_camelot / t_pymupdf, 1) if t_pymupdf else None,
+                "camelot_data_rows": n_ref,
+                "pymupdf_data_rows": n_cand,
+                "row_agreement": round(score, 3) if score is not None else None,
+                # Amounts only: Camelot often puts a wrapped label on its own row
+                "amount_agreement": round(amount_score, 3) if amount_score is not None else None,
+            })
+    return results
+
+
+def print_report(results):
+    header = f"{'PDF':<42} {'table':<7} {'page':>4} {'camelot':>9} {'pymupdf':>9} {'x':>6} {'rows c/p':>9} {'agree':>6} {'amounts':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        agree = f"{r['row_agreement']:.0%}" if r["row_agreement"] is not None else "-"
+        amounts = f"{r['amount_agreement']:.0%}" if r["amount_agreement"] is not None else "-"
+        print(f"{r['pdf'][:42]:<42} {r['table']:<7} {r['page']:>4} {r['camelot_s']:>8.3f}s {r['pymupdf_s']:>8.3f}s "
+              f"{r['speedup'] or 0:>6} {r['camelot_data_rows']:>4}/{r['pymupdf_data_rows']:<4} {agree:>6} {amounts:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Camelot stream vs PyMuPDF words")
+    parser.add_argument("pdfs", nargs="*", help="PDFs (défaut : *.pdf à la racine du dépôt)")
+    parser.add_argument("--tables", nargs="+", default=["passif", "actif"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    pdfs = args.pdfs or sorted(glob.glob(str(ROOT / "*.pdf")))
+    if not pdfs:
+        print("Aucun PDF à mesurer")
+        return 1
+    results = run(pdfs, args.tables, max(1, args.repeat))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Résultats : {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
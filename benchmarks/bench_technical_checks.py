@@ -0,0 +1,128 @@
+"""
+Technical Checks Benchmark
+src.extraction.technical_checks.run_checks (C1 as one column product, C2–C9 as one
+row product) vs the per-row / per-column loops B.validate_excel used before
+(df.iterrows for C1, str.contains + df.at per rule and per column for C2–C9).
+
+    python benchmarks/bench_technical_checks.py [--statements 200] [--repeat 3] [--json out.json]
+
+Statements are synthetic technical result tables (TARGET_ROWS x 8 branches + TOTAL)
+with some broken identities and empty cells; both paths must flag the same cells.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+os.environ.setdefault("CMF_METRICS_LOG", "off")
+
+import numpy as np
+import pandas as pd
+
+from src.extraction.technical_checks import TARGET_ROWS, RULES, TOLERANCE, run_checks
+
+
+BRANCHES = ["GROUPE", "A.TRAVAIL", "INCENDIE", "RISQUES DIVERS", "TRANSPORT", "AVIATION", "AUTOMOBILE", "ACCEPTATION"]
+
+
+def statement(rng):
+    rows = []
+    for name in TARGET_ROWS:
+        amounts = [rng.randint(-10 ** 7, 10 ** 7) for _ in BRANCHES]
+        total = sum(amounts) + (rng.choice([7, 1500]) if rng.random() < 0.1 else 0)
+        amounts = [None if rng.random() < 0.03 else a for a in amounts]
+        rows.append([name] + amounts + [total])
+    return pd.DataFrame(rows, columns=["CATEGORIES"] + BRANCHES + ["TOTAL"])
+
+
+# ---- Loops replaced by run_checks (kept here as the baseline) ----
+
+def legacy_checks(df, numeric_cols, total_col):
+    c1_values = [float('nan')] * len(df)
+    for idx, row in df.iterrows():
+        if row.iloc[0] in TARGET_ROWS:
+            numeric_sum = sum(row[col] for col in numeric_cols if pd.notnull(row[col]))
+            total_value = row[total_col] if pd.notnull(row[total_col]) else 0
+            c1_values[idx] = float(total_value) - numeric_sum
+
+    invalid = {}
+    for rule in RULES:
+        indices = [df.index[df['CATEGORIES'].str.contains(name, case=False, na=False)].tolist()
+                   for name in rule.rows]
+        invalid[rule.name] = []
+        if not all(indices):
+            continue
+        for col_name in numeric_cols:
+            values = [df.at[idx[0], col_name] for idx in indices]
+            if all(pd.notnull(v) for v in values):
+                residual = sum(coef * v for (_, coef), v in zip(rule.terms, values))
+                if abs(residual) > TOLERANCE:
+                    invalid[rule.name].append(df.columns.get_loc(col_name) + 1)
+    return c1_values, invalid
+
+
+def matrix_checks(df, numeric_cols, total_col):
+    checks = run_checks(df, numeric_cols, total_col)
+    return list(checks.c1), {rule.name: checks.invalid_columns(rule.name) for rule in RULES}
+
+
+# ---- Measure ----
+
+def timed(fn, statements, repeat):
+    best, results = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(df, BRANCHES, "TOTAL") for df in statements]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def same(a, b):
+    (c1_a, inv_a), (c1_b, inv_b) = a, b
+    return inv_a == inv_b and np.allclose(np.array(c1_a, dtype=float), np.array(c1_b, dtype=float), equal_nan=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Matrix C1–C9 checks vs per-row loops")
+    parser.add_argument("--statements", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    statements = [statement(rng) for _ in range(args.statements)]
+    repeat = max(1, args.repeat)
+
+    t_old, old = timed(legacy_checks, statements, repeat)
+    t_new, new = timed(matrix_checks, statements, repeat)
+    agree = sum(same(a, b) for a, b in zip(old, new))
+
+    results = {
+        "statements": len(statements),
+        "legacy_seconds": round(t_old, 4),
+        "matrix_seconds": round(t_new, 4),
+        "per_statement_ms": {"legacy": round(1000 * t_old / len(statements), 3),
+                             "matrix": round(1000 * t_new / len(statements), 3)},
+        "speedup": round(t_old / t_new, 1) if t_new else None,
+        "identical": agree,
+    }
+    print(f"{'path':<8} {'time':>9} {'ms/stmt':>8}")
+    print(f"{'legacy':<8} {t_old:>8.3f}s {results['per_statement_ms']['legacy']:>8}")
+    print(f"{'matrix':<8} {t_new:>8.3f}s {results['per_statement_ms']['matrix']:>8}")
+    print(f"x{results['speedup']} ; résultats identiques : {agree}/{len(statements)}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Résultats : {args.json}")
+    return 0 if agree == len(statements) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -47,14 +47,37 @@ PA_SUBCATEGORIES = {
 # Parent codes (level 2 - main categories)
 PARENT_CODES = ['PA2', 'PA3', 'PA5', 'PA6', 'PA7', 'PA72', 'PA71']
 
-# Total keywords for identification
-TOTAL_KEYWORDS = {
-    'total capitaux propres avant résultat': ('TOTAL', 'Capitaux Propres - Avant Résultat'),
-    'total capitaux propres avant affectation': ('TOTAL', 'Capitaux Propres - Avant Affectation'),
-    'total du passif': ('TOTAL', 'Total Passif'),
-    'total des capitaux propres et du passif': ('TOTAL GÉNÉRAL', ''),
+# Code families: pattern of a code, category of its rows, level of a non-parent code
+CODE_FAMILIES = {
+    'PA': {'pattern': r'PA\d+[A-Z]?\d*', 'category': 'PASSIF', 'child_level': 3},
+    'CP': {'pattern': r'CP\d+', 'category': 'CAPITAUX PROPRES', 'child_level': 2},
+}
+
+# Main title: every keyword present, none of the excluded ones
+TITLE_KEYWORDS = ('capitaux propres et', 'passif')
+TITLE_EXCLUDED = ('total',)
+
+# Section headers (whole first two columns, optional trailing colon) -> section
+SECTION_TITLES = {
+    'CAPITAUX PROPRES': 'CAPITAUX PROPRES',
+    'PASSIF': 'PASSIF',
 }
 
+# Total rows, first match wins: (keywords, level, category, subcategory)
+# A total matching none of them is a level 3 total of the current section
+TOTAL_RULES = [
+    (('total des capitaux propres et du passif',), 1, 'TOTAL GÉNÉRAL', ''),
+    (('total capitaux propres avant résultat', 'total capitaux propres avant resultat'),
+     2, 'TOTAL', 'Capitaux Propres - Avant Résultat'),
+    (('total capitaux propres avant affectation',), 2, 'TOTAL', 'Capitaux Propres - Avant Affectation'),
+    (('total du passif',), 2, 'TOTAL', 'Total Passif'),
+]
+
+# Total keywords for identification
+TOTAL_KEYWORDS = {keyword: (category, subcategory)
+                  for keywords, _, category, subcategory in TOTAL_RULES
+                  for keyword in keywords}
+
 def get_subcategory(code):
     """Get subcategory for a given code"""
     if code.startswith('CP'):
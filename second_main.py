@@ -5,16 +5,24 @@ import re
 import logging
 # Import modules
 from src.extraction.validate_passif_excel import validate_capitaux_propres_passif
-from src.scraper.cmf_scraper import init_driver, get_all_companies, select_company_and_submit, scrape_document_list
+from src.scraper.cmf_scraper import find_company_documents
 from src.scraper.pdf_downloader import download_pdf, get_local_pdf_path
 from src.extraction.pdf_parser import search_table_in_pdf, extract_table_from_page, extract_passif 
 from src.extraction.excel_exporter import export_to_excel
-from src.database.db_manager import create_database_and_tables, insert_document, insert_financial_data_capitaux_passifs, get_document_by_company_year
+from src.database.db_manager import (create_database_and_tables, database_enabled, get_document_id, insert_document,
+                                     insert_financial_data_actif, insert_financial_data_capitaux_passifs)
 from src.extraction.extract_actifs import extract_actif
 from src.extraction.excel_exporter_actif import export_actif_to_excel
+from src.extraction.parquet_exporter import export_statement_async, wait_exports
 from src.extraction.validate_actif_excel import validate_actif_from_data
-import subprocess
-from pathlib import Path
+from src.utils.metrics import span
+
+# Statuts renvoyés par run_extraction (utilisés par batch_main)
+STATUS_OK = "ok"
+STATUS_NOT_FOUND = "not_found"
+STATUS_FAILED = "failed"
+# Passif trouvé mais une étape a échoué (export, ACTIF, annexes) : relancé par batch_main
+STATUS_PARTIAL = "partial"
 
 
 def _build_output_dir(company_name):
@@ -27,10 +35,22 @@ def _build_output_dir(company_name):
     return output_dir, safe_name
 
 
-def run_extraction(company: str, year: int):
+def run_extraction(company: str, year: int, collect=None):
     """
     Automated narrated extraction workflow for PASSIF.
+    Returns STATUS_OK, STATUS_NOT_FOUND (société/document absent), STATUS_PARTIAL
+    (a later stage failed: passif export, actif, annexes) or STATUS_FAILED.
+    collect: dict filled with societe / document / passif / actif instead of writing them
+    to the database (batch_main loads several jobs at once with bulk_load_extractions).
+    The whole job is one "job" span; the stages below it record their own spans.
     """
+    with span("job", company=company, year=int(year)) as job:
+        status = _run_extraction(company, year, collect)
+        job.set("status", status)
+        return status
+
+
+def _run_extraction(company: str, year: int, collect=None):
 
     start_time = time.time()
     print(f"\n{'='*70}")
@@ -40,42 +60,26 @@ def run_extraction(company: str, year: int):
     print(f"📅 Année cible   : {year}")
     print(f"{'-'*70}")
 
-    driver = None
     connection = None
     cursor = None
+    failed_steps = []
 
     try:
         # ============================================================
-        # 1️⃣ INITIALIZE DRIVER
+        # 1️⃣ + 2️⃣ COMPANY & DOCUMENTS (HTTP, Selenium en secours)
         # ============================================================
-        print("🌐 Initialisation du navigateur...")
-        driver = init_driver()
-
-        print("🔎 Récupération des sociétés disponibles...")
-        available_companies = get_all_companies(driver)
+        print("🔎 Récupération de la société et des documents CMF...")
+        target_societe, all_documents = find_company_documents(company)
 
-        matches = [c for c in available_companies if company.lower() in c.lower()]
-        if not matches:
-            print(f"❌ Société non trouvée : {company}")
-            return
+        if not target_societe:
+            return STATUS_NOT_FOUND
 
-        target_societe = matches[0]
         print(f"✅ Société trouvée : {target_societe}")
 
-        # ============================================================
-        # 2️⃣ LOAD DOCUMENTS
-        # ============================================================
-        print("📂 Chargement des documents CMF...")
-        if not select_company_and_submit(driver, target_societe):
-            print("❌ Échec soumission formulaire")
-            return
-
-        all_documents = scrape_document_list(driver, target_societe)
-
         year_documents = [doc for doc in all_documents if str(doc['annee']) == str(year)]
         if not year_documents:
             print(f"❌ Aucun document trouvé pour {year}")
-            return
+            return STATUS_NOT_FOUND
 
         selected_doc = year_documents[0]
         print(f"✅ Document sélectionné : {selected_doc['nom']}")
@@ -93,32 +97,32 @@ def run_extraction(company: str, year: int):
 
         if not pdf_path:
             print("❌ Échec téléchargement")
-            return
+            return STATUS_FAILED
 
         print(f"✅ PDF téléchargé : {os.path.basename(pdf_path)}")
 
         # ============================================================
         # 4️⃣ DATABASE CONNECTION
         # ============================================================
-        """
-        print("🗄️ Connexion à la base de données...")
-        connection, cursor = create_database_and_tables()
-
-        if not connection:
-            print("❌ Échec connexion DB")
-            return
-
-        insert_document(
-            connection,
-            cursor,
-            target_societe,
-            selected_doc['nom'],
-            year,
-            selected_doc['url']
-        )
-
-        print("✅ Métadonnées document enregistrées")
-        """
+        doc_id = None
+        if database_enabled() and collect is None:
+            print("🗄️ Connexion à la base de données...")
+            connection, cursor = create_database_and_tables()
+
+            if connection:
+                insert_document(
+                    connection,
+                    cursor,
+                    target_societe,
+                    selected_doc['nom'],
+                    year,
+                    selected_doc['url']
+                )
+                doc_id = get_document_id(cursor, target_societe, selected_doc['nom'], year)
+                print("✅ Métadonnées document enregistrées")
+            else:
+                print("❌ Échec connexion DB")
+                failed_steps.append("db")
         # ============================================================
         # SETUP OUTPUT DIRECTORY (single definition, used everywhere)
         # ============================================================
@@ -134,7 +138,7 @@ def run_extraction(company: str, year: int):
 
         if not page_num:
             print("❌ PASSIF non trouvé dans le document")
-            return
+            return STATUS_NOT_FOUND
 
         print(f"✅ PASSIF trouvé à la page {page_num}")
         print("📊 Extraction et structuration des données...")
@@ -143,13 +147,16 @@ def run_extraction(company: str, year: int):
 
         if not hierarchical_data:
             print("❌ Échec extraction PASSIF")
-            return
+            return STATUS_FAILED
 
         print(f"✅ {len(hierarchical_data)} lignes structurées extraites")
 
         # ============================================================
         # 6️⃣ EXPORT PASSIF EXCEL
         # ============================================================
+        # Parquet (dataset analytique) écrit en parallèle de l'Excel
+        export_statement_async(hierarchical_data, target_societe, year, "passif")
+
         print("📁 Export PASSIF vers Excel en cours...")
 
         passif_filename = f"{short_company}_{year}_passif.xlsx"
@@ -161,7 +168,8 @@ def run_extraction(company: str, year: int):
             pdf_path,
             passif_path,
             year,
-            year - 1
+            year - 1,
+            write_only=True
         )
 
         if result is True:
@@ -169,10 +177,11 @@ def run_extraction(company: str, year: int):
 
             # Validation PASSIF
             print("\n🔍 Validation des données extraites PASSIF...")
-            validated_file = validate_capitaux_propres_passif(passif_path, company)
+            validated_file = validate_capitaux_propres_passif(passif_path, company, hierarchical_data, year)
             print(f"✅ Validation PASSIF terminée : {validated_file}")
         else:
             print("⚠️ Échec export Excel PASSIF")
+            failed_steps.append("export_passif")
             if isinstance(result, str):
                 print(f"Détail erreur : {result}")
 
@@ -185,6 +194,7 @@ def run_extraction(company: str, year: int):
 
         if data_actifs:
             print(f"✅ {len(data_actifs)} lignes ACTIF extraites")
+            export_statement_async(data_actifs, target_societe, year, "actif")
 
             # Export ACTIF to Excel
             print("📁 Export ACTIF vers Excel en cours...")
@@ -216,65 +226,73 @@ def run_extraction(company: str, year: int):
             print(f"✅ Validation ACTIF terminée : {validated_file}")
         else:
             print("❌ Échec extraction ACTIF")
+            failed_steps.append("actif")
 
-               # ============================================================
-        # 8️⃣ INSERT FINANCIAL DATA
         # ============================================================
-        if cursor is not None and connection is not None:
+        # 8️⃣ INSERT FINANCIAL DATA (PASSIF + ACTIF)
+        # ============================================================
+        if collect is not None:
+            collect.update(societe=target_societe, document=selected_doc,
+                           passif=hierarchical_data, actif=data_actifs or None)
+            print("💾 Données financières mises de côté pour le chargement groupé du batch")
+        elif doc_id is not None:
             print("💾 Insertion des données financières en base...")
-            doc_record = get_document_by_company_year(cursor, target_societe, year)
-
-            if doc_record:
-                doc_id = doc_record[0]
-                insert_financial_data_capitaux_passifs(cursor, doc_id, hierarchical_data)
-                connection.commit()
+            # Les helpers renvoient False/None en cas d'échec (rollback fait côté actif)
+            passif_ok = insert_financial_data_capitaux_passifs(cursor, doc_id, hierarchical_data)
+            if not passif_ok:
+                connection.rollback()
+            actif_ok = True
+            if data_actifs:
+                actif_ok = insert_financial_data_actif(connection, doc_id, data_actifs) is not None
+            if passif_ok and actif_ok:
                 print("✅ Données financières insérées avec succès")
-        else:
-            print("ℹ️ DB désactivée (cursor/connection None) → insertion ignorée")
+            else:
+                print("❌ Échec insertion des données financières")
+                failed_steps.append("db")
+        elif not database_enabled():
+            print("ℹ️ DB désactivée (CMF_DB_BACKEND non défini) → insertion ignorée")
+        elif connection:
+            print("⚠️ Document absent de la base → insertion ignorée")
+            failed_steps.append("db")
 
-            # ============================================================
-        # 9️⃣ LANCER ANNEXES 12/13 (Extraction1213 → NorVal12 → NorVal13)
         # ============================================================
-
+        # 9️⃣ ANNEXES 12/13 (Extraction1213 → NorVal12 → NorVal13, en process)
+        # ============================================================
         print(f"\n{'='*70}")
         print("📌 LANCEMENT ANNEXES 12 & 13 (Extraction1213 → NorVal12 → NorVal13)")
         print(f"{'='*70}")
 
-        base_dir = Path(__file__).resolve().parent
-        script_path = (base_dir / "annexes1213" / "Extraction1213.py").resolve()
-
-        print("📍 base_dir     =", base_dir)
-        print("📍 script_path  =", script_path)
+        # Import différé : pipeline annexes (camelot, OCR) chargé seulement à cette étape
+        from annexes1213.Extraction1213 import run_annexes
 
-        if not script_path.exists():
-         raise FileNotFoundError(f"Extraction1213.py introuvable: {script_path}")
-
-        cmd = [sys.executable, str(script_path), target_societe, str(year)]
-        print("➡️ Commande:", " ".join(cmd))
-
-        res = subprocess.run(cmd, capture_output=False)
-        print(f"✅ ANNEXES 12/13 terminées, code retour = {res.returncode}")
-
-
-
-
-        
+        # La liste des documents déjà récupérée évite une nouvelle recherche Selenium
+        rc = run_annexes(target_societe, year, documents=all_documents)
+        if rc == 0:
+            print("✅ ANNEXES 12/13 terminées")
+        else:
+            print(f"⚠️ ANNEXES 12/13 terminées avec le code retour {rc}")
+            failed_steps.append("annexes")
 
-        
         elapsed = time.time() - start_time
         print(f"\n{'='*70}")
+        if failed_steps:
+            print(f"⚠️ EXTRACTION PARTIELLE EN {elapsed:.2f} secondes (échecs : {', '.join(failed_steps)})")
+            print(f"{'='*70}")
+            return STATUS_PARTIAL
         print(f"🎉 EXTRACTION TERMINÉE EN {elapsed:.2f} secondes")
         print(f"{'='*70}")
+        return STATUS_OK
 
     except Exception as e:
         logging.error(f"ERREUR GLOBALE : {str(e)}")
         print(f"\n❌ ERREUR GLOBALE : {str(e)}")
+        return STATUS_FAILED
 
     finally:
-        if driver:
-            driver.quit()
+        wait_exports()
         if connection:
-            cursor.close()
+            if cursor is not None:
+                cursor.close()
             connection.close()
             print("🔒 Connexion fermée")
 
@@ -2,78 +2,49 @@
 Database Manager Module
 Handles database connections and operations
 """
-import pyodbc
+import os
+import re
 import logging
-from src.utils.helpers import normalize_url
+from src.utils.helpers import clean_number, normalize_url, period_end_from_name
+from src.utils.numbers import parse_numbers
+from src.database import repository
+from src.utils.metrics import instrument, annotate, count
+
+# Rows per executemany call / document ids per DELETE (SQL Server allows 2100 parameters)
+BULK_BATCH_SIZE = 5000
+DELETE_CHUNK_SIZE = 1000
+
+FACT_COLUMNS = {
+    'financial_data_actif': ("document_id", "code", "description", "is_total",
+                             "value_brut", "value_amort_prov", "value_net_n", "value_net_n_1"),
+    'financial_data_annexe12': ("document_id", "code", "description", "column_label", "value"),
+    'financial_data_annexe13': ("document_id", "code", "description", "column_label", "value"),
+}
+
+DOCUMENT_INSERT = """
+INSERT INTO document (Societe, Nom, Annee, URL, period_end)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+FINANCIAL_DATA_INSERT = """
+INSERT INTO financial_data_capitaux_passifs
+(document_id, level, code, description, is_total, category, subcategory, value_n, value_n_1)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def database_enabled():
+    """second_main / batch_main write to the database only when CMF_DB_BACKEND is set"""
+    return bool(os.environ.get("CMF_DB_BACKEND", "").strip())
 
 
 def create_database_and_tables():
-    """Create CMF database and required tables"""
-    try:
-        print("\n🔧 Création/mise à jour de la base de données 'cmf'...")
-        
-        # Connect to SQL Server
-        connection = pyodbc.connect(
-            'DRIVER={SQL Server};'
-            'SERVER=localhost;'
-            'DATABASE=master;'
-            'Trusted_Connection=yes;'
-        )
-        connection.autocommit = True
-        cursor = connection.cursor()
-        
-        # Create database if not exists
-        cursor.execute("IF NOT EXISTS (SELECT * FROM sys.databases WHERE name = 'cmf') CREATE DATABASE cmf")
-        cursor.close()
-        connection.close()
-        
-        # Connect to cmf database
-        connection = pyodbc.connect(
-            'DRIVER={SQL Server};'
-            'SERVER=localhost;'
-            'DATABASE=cmf;'
-            'Trusted_Connection=yes;'
-        )
-        cursor = connection.cursor()
-        
-        # Create document table
-        cursor.execute("""
-        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='document' AND xtype='U')
-        CREATE TABLE document (
-            id INT IDENTITY(1,1) PRIMARY KEY,
-            Societe NVARCHAR(255),
-            Nom NVARCHAR(255),
-            Annee INT,
-            URL NVARCHAR(MAX)
-        )
-        """)
-        
-        # Create financial_data_capitaux_passifs table
-        cursor.execute("""
-        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='financial_data_capitaux_passifs' AND xtype='U')
-        CREATE TABLE financial_data_capitaux_passifs (
-            id INT IDENTITY(1,1) PRIMARY KEY,
-            document_id INT,
-            level INT,
-            code NVARCHAR(50),
-            description NVARCHAR(MAX),
-            is_total BIT,
-            category NVARCHAR(100),
-            subcategory NVARCHAR(100),
-            value_n BIGINT,
-            value_n_1 BIGINT,
-            FOREIGN KEY (document_id) REFERENCES document(id)
-        )
-        """)
-        
-        connection.commit()
-        print("✅ Base de données 'cmf' prête")
-        return connection, cursor
-        
-    except Exception as e:
-        logging.error(f"Erreur lors de la création de la base : {e}")
-        print(f"❌ Erreur lors de la création de la base : {e}")
-        return None, None
+    """
+    Create CMF database and required tables (once per process) and lend a pooled
+    connection. connection.close() gives it back to the pool.
+    Backend: SQL Server by default, CMF_DB_BACKEND=mysql|sqlite to switch.
+    """
+    return repository.connect()
 
 
 def check_document_exists(cursor, societe, nom_document, annee):
@@ -88,6 +59,7 @@ def check_document_exists(cursor, societe, nom_document, annee):
         return False
 
 
+@instrument("db_insert", table="document")
 def insert_document(connection, cursor, societe, nom_document, annee, url):
     """Insert document metadata into database"""
     try:
@@ -103,12 +75,10 @@ def insert_document(connection, cursor, societe, nom_document, annee, url):
         if check_document_exists(cursor, societe, nom_document, annee_int):
             return False
             
-        insert_query = """
-        INSERT INTO document (Societe, Nom, Annee, URL)
-        VALUES (?, ?, ?, ?)
-        """
-        cursor.execute(insert_query, (societe, nom_document, annee_int, normalized_url))
+        cursor.execute(DOCUMENT_INSERT, (societe, nom_document, annee_int, normalized_url,
+                                         period_end_from_name(nom_document, annee_int)))
         connection.commit()
+        count("rows_inserted")
         return True
         
     except Exception as e:
@@ -116,6 +86,239 @@ def insert_document(connection, cursor, societe, nom_document, annee, url):
         return False
 
 
+def get_document_id(cursor, societe, nom_document, annee):
+    """id of the (Societe, Nom, Annee) document row, or None"""
+    cursor.execute("SELECT id FROM document WHERE Societe = ? AND Nom = ? AND Annee = ?",
+                   (societe, nom_document, int(annee)))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def create_sqlite_database(db_path=":memory:"):
+    """
+    SQLite stand-in with the same tables and '?' parameters as the SQL Server schema.
+    Lets the insert functions run locally without an ODBC server.
+    """
+    return repository.Repository(repository.SqliteDialect(db_path), pool_size=1).connect()
+
+
+def _financial_rows(doc_id, hierarchical_data):
+    """Parameter tuples of financial_data_capitaux_passifs for one document"""
+    rows = []
+    for item in hierarchical_data:
+        values = item.get('values', [])
+        value_n = values[0] if len(values) > 0 and isinstance(values[0], int) else None
+        value_n_1 = values[1] if len(values) > 1 and isinstance(values[1], int) else None
+        rows.append((
+            doc_id,
+            item['level'],
+            item['code'],
+            item['description'],
+            item['is_total'],
+            item['category'],
+            item['subcategory'],
+            value_n,
+            value_n_1
+        ))
+    return rows
+
+
+def _delete_documents(cursor, table, doc_ids):
+    """DELETE the rows of doc_ids from table, DELETE_CHUNK_SIZE ids per statement"""
+    for i in range(0, len(doc_ids), DELETE_CHUNK_SIZE):
+        chunk = doc_ids[i:i + DELETE_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f"DELETE FROM {table} WHERE document_id IN ({placeholders})", chunk)
+
+
+def _executemany(cursor, query, rows):
+    # pyodbc: send the parameter array in one round trip instead of one per row
+    if hasattr(cursor, "fast_executemany"):
+        cursor.fast_executemany = True
+    for i in range(0, len(rows), BULK_BATCH_SIZE):
+        cursor.executemany(query, rows[i:i + BULK_BATCH_SIZE])
+    count("rows_inserted", len(rows))
+
+
+@instrument("db_insert", table="financial_data_capitaux_passifs")
+def bulk_insert_financial_data_capitaux_passifs(connection, documents):
+    """
+    Replace the financial data of several documents in a single transaction.
+    documents: iterable of (doc_id, hierarchical_data).
+    Returns the number of rows inserted, or None on failure (the batch is rolled back).
+    """
+    documents = list(documents)
+    cursor = connection.cursor()
+    try:
+        doc_ids = [doc_id for doc_id, _ in documents]
+        _delete_documents(cursor, 'financial_data_capitaux_passifs', doc_ids)
+
+        rows = []
+        for doc_id, hierarchical_data in documents:
+            rows.extend(_financial_rows(doc_id, hierarchical_data))
+        if rows:
+            _executemany(cursor, FINANCIAL_DATA_INSERT, rows)
+
+        connection.commit()
+        print(f" {len(rows)} lignes insérées pour {len(doc_ids)} document(s)")
+        return len(rows)
+
+    except Exception as e:
+        connection.rollback()
+        logging.error(f"Erreur insertion bulk financial_data_capitaux_passifs : {e}")
+        print(f" Erreur insertion : {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def _ensure_document(cursor, societe, document):
+    """id of the document row, inserted (without commit) when missing"""
+    doc_id = get_document_id(cursor, societe, document['nom'], document['annee'])
+    if doc_id is None:
+        annee = int(document['annee'])
+        cursor.execute(DOCUMENT_INSERT, (societe, document['nom'], annee, normalize_url(document['url']),
+                                         period_end_from_name(document['nom'], annee)))
+        count("rows_inserted")
+        doc_id = get_document_id(cursor, societe, document['nom'], annee)
+    return doc_id
+
+
+@instrument("db_insert", table="bulk_extractions")
+def bulk_load_extractions(connection, extractions):
+    """
+    Load the results of several extraction jobs in a single transaction: document rows,
+    then passif and actif facts (replacing the previous rows of these documents).
+    extractions: dicts with societe, document (nom, annee, url), passif, actif (or None),
+    as filled by second_main.run_extraction(collect=...).
+    Returns the number of documents loaded, or None on failure (the batch is rolled back).
+    """
+    extractions = list(extractions)
+    cursor = connection.cursor()
+    try:
+        doc_ids = [_ensure_document(cursor, e['societe'], e['document']) for e in extractions]
+
+        _delete_documents(cursor, 'financial_data_capitaux_passifs', doc_ids)
+        passif_rows = []
+        for doc_id, extraction in zip(doc_ids, extractions):
+            passif_rows.extend(_financial_rows(doc_id, extraction['passif']))
+        if passif_rows:
+            _executemany(cursor, FINANCIAL_DATA_INSERT, passif_rows)
+
+        with_actif = [(doc_id, e['actif']) for doc_id, e in zip(doc_ids, extractions) if e.get('actif')]
+        _delete_documents(cursor, 'financial_data_actif', [doc_id for doc_id, _ in with_actif])
+        _insert_fact_rows(cursor, 'financial_data_actif',
+                          [(doc_id, *row) for doc_id, actif in with_actif for row in _actif_rows(actif)])
+
+        connection.commit()
+        print(f" {len(doc_ids)} document(s) chargé(s) : {len(passif_rows)} lignes passif, {len(with_actif)} actif")
+        return len(doc_ids)
+
+    except Exception as e:
+        connection.rollback()
+        logging.error(f"Erreur chargement bulk des extractions : {e}")
+        print(f" Erreur chargement : {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def _insert_fact_rows(cursor, table, params):
+    """params: tuples in FACT_COLUMNS[table] order, document_id first (no commit)"""
+    columns = FACT_COLUMNS[table]
+    if params:
+        placeholders = ", ".join("?" * len(columns))
+        _executemany(cursor, f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", params)
+    return len(params)
+
+
+@instrument("db_insert")
+def replace_fact_rows(connection, table, doc_id, rows):
+    """
+    Replace the rows of one document in a fact table of FACT_COLUMNS.
+    rows: tuples in FACT_COLUMNS[table] order without document_id.
+    """
+    annotate(table=table)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {table} WHERE document_id = ?", (doc_id,))
+        inserted = _insert_fact_rows(cursor, table, [(doc_id, *row) for row in rows])
+        connection.commit()
+        return inserted
+    except Exception as e:
+        connection.rollback()
+        logging.error(f"Erreur insertion {table} : {e}")
+        print(f" Erreur insertion : {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def _int_or_none(value):
+    if value in (None, "") or value != value:  # NaN des cellules vides pandas
+        return None
+    value = clean_number(value)
+    return value if isinstance(value, int) else None
+
+
+def _actif_rows(actif_rows):
+    """(code, description, is_total, brut, amort_prov, net_n, net_n_1) of the actif records"""
+    rows = []
+    for item in actif_rows:
+        designation = str(item.get("DESIGNATION") or "").strip()
+        code = re.match(r"^(AC\d+)\b", designation.upper())
+        rows.append((
+            code.group(1) if code else None,
+            designation,
+            designation.lower().startswith("total"),
+            *(_int_or_none(item.get(key)) for key in ("BRUT", "AMORT_PROV", "NET_N", "NET_N1"))
+        ))
+    return rows
+
+
+def insert_financial_data_actif(connection, doc_id, actif_rows):
+    """actif_rows: records of extract_actifs.extract_actif (DESIGNATION, BRUT, AMORT_PROV, NET_N, NET_N1)"""
+    return replace_fact_rows(connection, 'financial_data_actif', doc_id, _actif_rows(actif_rows))
+
+
+def _annexe_rows(df, code_column=None, label_column=None):
+    """(code, description, column_label, value) of every amount cell of an annexe table"""
+    label_column = label_column or df.columns[0]
+    value_columns = [c for c in df.columns if c not in (label_column, code_column)]
+    if not value_columns:
+        return []
+    # Extracted tables hold text ("1 234", "(56)"): every cell parsed in one call
+    amounts, parsed = parse_numbers(df[value_columns].to_numpy(dtype=object))
+    labels = df[label_column].tolist()
+    codes = df[code_column].tolist() if code_column else [None] * len(df)
+    rows = []
+    for i, label in enumerate(labels):
+        label = str(label).strip()
+        if not label or label.lower() == "nan":
+            continue
+        for j, column in enumerate(value_columns):
+            if parsed[i, j]:
+                rows.append((codes[i], label, str(column), float(amounts[i, j])))
+    return rows
+
+
+def insert_financial_data_annexe(connection, doc_id, annexe, tables, code_column=None, label_column=None):
+    """
+    Store annexe 12/13 tables in long format: one row per (ligne, colonne) amount cell.
+    tables: a DataFrame or the [(name, DataFrame)] list exported by Extraction1213.
+    label_column defaults to the first column, code_column to none.
+    """
+    table = f"financial_data_annexe{annexe}"
+    if hasattr(tables, "columns"):
+        tables = [(table, tables)]
+    rows = []
+    for _, df in tables:
+        if df is not None and not df.empty:
+            rows.extend(_annexe_rows(df, code_column, label_column))
+    return replace_fact_rows(connection, table, doc_id, rows)
+
+
+@instrument("db_insert", table="financial_data_capitaux_passifs")
 def insert_financial_data_capitaux_passifs(cursor, doc_id, hierarchical_data):
     """Insert extracted financial data into database"""
     try:
@@ -124,28 +327,9 @@ def insert_financial_data_capitaux_passifs(cursor, doc_id, hierarchical_data):
         # Delete old data for this document to avoid duplicates
         cursor.execute("DELETE FROM financial_data_capitaux_passifs WHERE document_id = ?", (doc_id,))
         
-        insert_query = """
-        INSERT INTO financial_data_capitaux_passifs 
-        (document_id, level, code, description, is_total, category, subcategory, value_n, value_n_1)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
-        for item in hierarchical_data:
-            values = item.get('values', [])
-            value_n = values[0] if len(values) > 0 and isinstance(values[0], int) else None
-            value_n_1 = values[1] if len(values) > 1 and isinstance(values[1], int) else None
-            
-            cursor.execute(insert_query, (
-                doc_id,
-                item['level'],
-                item['code'],
-                item['description'],
-                item['is_total'],
-                item['category'],
-                item['subcategory'],
-                value_n,
-                value_n_1
-            ))
+        rows = _financial_rows(doc_id, hierarchical_data)
+        if rows:
+            _executemany(cursor, FINANCIAL_DATA_INSERT, rows)
         
         cursor.connection.commit()
         print(f" {len(hierarchical_data)} lignes insérées dans la base de données")
@@ -158,31 +342,37 @@ def insert_financial_data_capitaux_passifs(cursor, doc_id, hierarchical_data):
 
 
 def get_document_by_company_year(cursor, societe, annee):
-    """Get document by company and year"""
+    """
+    Get document by company and year.
+    The 31/12 filing is an equality on the (Societe, Annee, period_end) index;
+    falls back to the first "Etats financiers" document of the year.
+    """
     try:
+        annee = int(annee)
         query = """
-        SELECT id, Societe, Nom, Annee, URL 
-        FROM document 
-        WHERE Societe = ? 
+        SELECT id, Societe, Nom, Annee, URL
+        FROM document
+        WHERE Societe = ?
         AND Annee = ?
+        AND period_end = ?
         AND Nom LIKE ?
         """
-        cursor.execute(query, (societe, int(annee), '%Etats financiers%'))
-        
-        results = cursor.fetchall()
-        target_doc = None
-        
-        # Filter for 31/12 documents
-        for res in results:
-            if "31/12" in res[2]:  # res[2] is Nom
-                target_doc = res
-                break
-        
-        if not target_doc and results:
-            target_doc = results[0]  # Fallback to first found
-            
-        return target_doc
-        
+        cursor.execute(query, (societe, annee, f"{annee}-12-31", '%Etats financiers%'))
+        target_doc = cursor.fetchone()
+        if target_doc:
+            return target_doc
+
+        query = """
+        SELECT id, Societe, Nom, Annee, URL
+        FROM document
+        WHERE Societe = ?
+        AND Annee = ?
+        AND Nom LIKE ?
+        ORDER BY id
+        """
+        cursor.execute(query, (societe, annee, '%Etats financiers%'))
+        return cursor.fetchone()
+
     except Exception as e:
         logging.error(f"Erreur get_document : {e}")
         return None
@@ -0,0 +1,166 @@
+"""
+Document Catalog Module
+Local SQLite catalog of the CMF filings already seen, keyed on the normalized URL.
+Stores the HTTP validators (ETag / Last-Modified) and the first/last time each
+document was seen, so a sync only has to report new or changed filings.
+"""
+import os
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.helpers import normalize_url
+from src.scraper.cmf_http import match_company
+
+
+DEFAULT_CATALOG_PATH = Path(os.environ.get(
+    "CMF_CATALOG",
+    Path(__file__).resolve().parents[2] / "cache" / "document_catalog.sqlite"
+))
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class DocumentCatalog:
+    """Known CMF documents, one row per normalized URL"""
+
+    def __init__(self, db_path=DEFAULT_CATALOG_PATH):
+        self.db_path = str(db_path)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_document (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                societe TEXT,
+                nom TEXT,
+                annee INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                in_database INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_catalog_societe_annee ON catalog_document (societe, annee)"
+        )
+        self.connection.commit()
+        self._known = None
+
+    def known_keys(self):
+        """Normalized URLs already in the catalog (loaded once, kept up to date)"""
+        if self._known is None:
+            self._known = {row[0] for row in self.connection.execute("SELECT url_key FROM catalog_document")}
+        return self._known
+
+    def is_known(self, url):
+        return normalize_url(url) in self.known_keys()
+
+    def get(self, url):
+        row = self.connection.execute(
+            "SELECT * FROM catalog_document WHERE url_key = ?", (normalize_url(url),)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def add(self, document, etag=None, last_modified=None):
+        """
+        Record a document dict (url, societe, nom, annee).
+        Returns True if it was not known before.
+        """
+        key = normalize_url(document["url"])
+        now = _now()
+        if key in self.known_keys():
+            self.connection.execute(
+                "UPDATE catalog_document SET last_seen = ? WHERE url_key = ?", (now, key)
+            )
+            self.connection.commit()
+            return False
+
+        try:
+            annee = int(document.get("annee"))
+        except (TypeError, ValueError):
+            annee = None
+        self.connection.execute(
+            """
+            INSERT INTO catalog_document (url_key, url, societe, nom, annee, etag, last_modified, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (key, document["url"], document.get("societe"), document.get("nom"), annee,
+             etag, last_modified, now, now)
+        )
+        self.connection.commit()
+        self.known_keys().add(key)
+        return True
+
+    def update_validators(self, url, etag, last_modified):
+        """Store new ETag / Last-Modified; returns True if they differ from the stored ones"""
+        entry = self.get(url)
+        if entry is None:
+            return False
+        changed = (etag and etag != entry["etag"]) or (last_modified and last_modified != entry["last_modified"])
+        if changed:
+            self.connection.execute(
+                "UPDATE catalog_document SET etag = ?, last_modified = ?, last_seen = ? WHERE url_key = ?",
+                (etag or entry["etag"], last_modified or entry["last_modified"], _now(), entry["url_key"])
+            )
+            self.connection.commit()
+        return bool(changed)
+
+    def mark_in_database(self, url):
+        """Flag a document whose extraction job succeeded"""
+        self.connection.execute(
+            "UPDATE catalog_document SET in_database = 1 WHERE url_key = ?", (normalize_url(url),)
+        )
+        self.connection.commit()
+
+    def resolve_societe(self, name):
+        """
+        CMF label of the catalog for a company name as typed (batch_main --job "star"),
+        resolved like the dropdown: exact case-insensitive label first, then partial match.
+        """
+        labels = [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT societe FROM catalog_document WHERE societe IS NOT NULL ORDER BY societe")]
+        return match_company(labels, name)
+
+    def mark_year_in_database(self, societe, annee):
+        """
+        Flag every filing of (societe, annee) once its extraction job succeeded; returns the count.
+        societe may be the user's spelling of the company (see resolve_societe).
+        """
+        cursor = self.connection.execute(
+            "UPDATE catalog_document SET in_database = 1 WHERE societe = ? AND annee = ? AND in_database = 0",
+            (self.resolve_societe(societe) or societe, int(annee))
+        )
+        self.connection.commit()
+        return cursor.rowcount
+
+    def pending_database(self, societe=None):
+        """Documents whose extraction has not succeeded yet (new, failed or interrupted jobs)"""
+        query = "SELECT * FROM catalog_document WHERE in_database = 0"
+        params = ()
+        if societe:
+            query += " AND societe = ?"
+            params = (societe,)
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def documents(self, societe=None, annee=None):
+        query = "SELECT * FROM catalog_document WHERE 1=1"
+        params = []
+        if societe:
+            query += " AND societe = ?"
+            params.append(societe)
+        if annee:
+            query += " AND annee = ?"
+            params.append(int(annee))
+        return [dict(row) for row in self.connection.execute(query + " ORDER BY annee DESC", params)]
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception as e:
+            logging.warning(f"Fermeture catalogue : {e}")
@@ -0,0 +1,146 @@
+"""
+Schema Migrations Module
+Versioned changes applied on top of the base tables of repository.TABLES.
+Applied versions are recorded in `schema_version`; each migration runs once per database.
+Every step checks whether its object already exists before running: MySQL (and SQL
+Server for some DDL) commits each DDL statement, so a migration that failed midway
+leaves part of its schema behind, and the re-run has to skip it.
+"""
+import logging
+from datetime import datetime
+
+from src.utils.helpers import period_end_from_name
+
+
+# Steps: ("table", name, body) | ("column", table, column, type) | ("index", name, table, columns)
+MIGRATIONS = [
+    (1, "indexes, period_end, fact tables actif / annexes 12-13", [
+        ("column", "document", "period_end", "{date}"),
+        ("index", "ix_document_societe_annee", "document", "Societe, Annee, period_end"),
+        ("index", "ix_document_annee", "document", "Annee, period_end"),
+        ("index", "ix_fdcp_document_code", "financial_data_capitaux_passifs", "document_id, code"),
+        ("index", "ix_fdcp_code", "financial_data_capitaux_passifs", "code"),
+        ("index", "ix_fd_document_code", "financial_data", "document_id, code"),
+        ("table", "financial_data_actif", """
+            id {pk},
+            document_id INT NOT NULL,
+            code {str50},
+            description {text},
+            is_total {bool},
+            value_brut BIGINT,
+            value_amort_prov BIGINT,
+            value_net_n BIGINT,
+            value_net_n_1 BIGINT,
+            FOREIGN KEY (document_id) REFERENCES document(id)
+        """),
+        ("index", "ix_fda_document_code", "financial_data_actif", "document_id, code"),
+        ("index", "ix_fda_code", "financial_data_actif", "code"),
+        # Annexes: one row per (ligne, colonne/branche) cell
+        ("table", "financial_data_annexe12", """
+            id {pk},
+            document_id INT NOT NULL,
+            code {str50},
+            description {text},
+            column_label {str255},
+            value FLOAT,
+            FOREIGN KEY (document_id) REFERENCES document(id)
+        """),
+        ("index", "ix_fda12_document_code", "financial_data_annexe12", "document_id, code"),
+        ("table", "financial_data_annexe13", """
+            id {pk},
+            document_id INT NOT NULL,
+            code {str50},
+            description {text},
+            column_label {str255},
+            value FLOAT,
+            FOREIGN KEY (document_id) REFERENCES document(id)
+        """),
+        ("index", "ix_fda13_document_code", "financial_data_annexe13", "document_id, code"),
+    ]),
+]
+
+SCHEMA_VERSION_TABLE = """
+    version INT PRIMARY KEY,
+    name {str255},
+    applied_at {str50}
+"""
+
+
+def _applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _step_done(cursor, dialect, step):
+    """True when the object created by step already exists"""
+    kind = step[0]
+    if kind == "column":
+        return dialect.has_column(cursor, step[1], step[2])
+    if kind == "index":
+        return dialect.has_index(cursor, step[2], step[1])
+    # Tables: CREATE TABLE IF NOT EXISTS (or its SQL Server equivalent) is already idempotent
+    return False
+
+
+def _step_sql(dialect, step):
+    kind = step[0]
+    if kind == "table":
+        return dialect.create_table_sql(step[1], step[2])
+    if kind == "column":
+        return dialect.add_column_sql(step[1], step[2], step[3].format(**dialect.types))
+    if kind == "index":
+        return dialect.create_index_sql(step[1], step[2], step[3])
+    raise ValueError(f"Étape de migration inconnue : {kind}")
+
+
+def apply_migrations(connection, dialect):
+    """Apply the pending migrations; returns the versions applied by this call"""
+    cursor = connection.cursor()
+    cursor.execute(dialect.create_table_sql("schema_version", SCHEMA_VERSION_TABLE))
+    connection.commit()
+
+    applied = []
+    for version, name, steps in MIGRATIONS:
+        if version in _applied_versions(cursor):
+            continue
+        try:
+            for step in steps:
+                if _step_done(cursor, dialect, step):
+                    logging.info(f"Migration {version} : {step[0]} {step[1]} déjà présent")
+                    continue
+                cursor.execute(_step_sql(dialect, step))
+            cursor.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().isoformat(timespec="seconds"))
+            )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            # Another process (batch worker) may have applied it concurrently
+            if version in _applied_versions(cursor):
+                continue
+            raise
+        applied.append(version)
+        logging.info(f"Migration {version} appliquée : {name}")
+        print(f"🔧 Migration {version} appliquée : {name}")
+
+    backfill_period_end(connection)
+    cursor.close()
+    return applied
+
+
+def backfill_period_end(connection):
+    """Fill document.period_end from Nom for the rows inserted without it"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT id, Nom, Annee FROM document WHERE period_end IS NULL")
+    updates = []
+    for doc_id, nom, annee in cursor.fetchall():
+        period_end = period_end_from_name(nom, annee)
+        if period_end:
+            updates.append((period_end, doc_id))
+    if updates:
+        cursor.executemany("UPDATE document SET period_end = ? WHERE id = ?", updates)
+        connection.commit()
+        logging.info(f"period_end renseigné pour {len(updates)} document(s)")
+    cursor.close()
+    return len(updates)
@@ -15,6 +15,19 @@ class Document:
 
 class FinancialData:
     """Financial data row"""
+    # Column order and logical types, shared by the SQL tables and the Parquet export
+    FIELDS = (
+        ("document_id", "int64"),
+        ("level", "int64"),
+        ("code", "string"),
+        ("description", "string"),
+        ("is_total", "bool"),
+        ("category", "string"),
+        ("subcategory", "string"),
+        ("value_n", "float64"),
+        ("value_n_1", "float64"),
+    )
+
     def __init__(self, document_id, level, code, description, is_total, category, subcategory, value_n, value_n_1):
         self.document_id = document_id
         self.level = level
@@ -25,3 +38,6 @@ class FinancialData:
         self.subcategory = subcategory
         self.value_n = value_n
         self.value_n_1 = value_n_1
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name, _ in self.FIELDS}
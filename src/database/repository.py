@@ -0,0 +1,517 @@
+"""
+Repository Module
+Single persistence layer for SQL Server (pyodbc), MySQL (mysql.connector) and SQLite.
+Connections come from a per-process pool and the schema is created once per process,
+so batch runs reuse warm connections instead of reconnecting for every file.
+All queries use '?' placeholders; they are rewritten to '%s' for MySQL.
+Schema changes after the base tables live in migrations.py.
+"""
+import os
+import queue
+import atexit
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.database.migrations import apply_migrations
+from src.utils.helpers import period_end_from_name
+
+try:
+    import pyodbc
+except ImportError:  # ODBC driver manager absent
+    pyodbc = None
+
+try:
+    import mysql.connector
+except ImportError:
+    mysql = None
+
+
+DEFAULT_BACKEND = "sqlserver"
+DEFAULT_POOL_SIZE = int(os.environ.get("CMF_DB_POOL_SIZE", "4"))
+DATABASE_NAME = os.environ.get("CMF_DB_NAME", "cmf")
+DEFAULT_SQLITE_PATH = Path(os.environ.get(
+    "CMF_SQLITE_PATH",
+    Path(__file__).resolve().parents[2] / "cache" / "cmf.sqlite"
+))
+
+# Preferred SQL Server ODBC drivers, newest first (CMF_ODBC_DRIVER forces one)
+ODBC_DRIVERS = ["ODBC Driver 18 for SQL Server", "ODBC Driver 17 for SQL Server", "SQL Server"]
+
+# Tables shared by every backend. Type placeholders are resolved per dialect.
+TABLES = [
+    ("document", """
+        id {pk},
+        Societe {str255} NOT NULL,
+        Nom {str255} NOT NULL,
+        Annee INT NOT NULL,
+        URL {str512} NOT NULL,
+        CONSTRAINT unique_document UNIQUE (Societe, Nom, Annee)
+    """),
+    ("financial_data_capitaux_passifs", """
+        id {pk},
+        document_id INT,
+        level INT,
+        code {str50},
+        description {text},
+        is_total {bool},
+        category {str100},
+        subcategory {str100},
+        value_n BIGINT,
+        value_n_1 BIGINT,
+        FOREIGN KEY (document_id) REFERENCES document(id)
+    """),
+    ("financial_data", """
+        id {pk},
+        document_id INT NOT NULL,
+        category {str255},
+        subcategory {str255},
+        code {str50},
+        description {text},
+        level INT,
+        is_total {bool},
+        value_n FLOAT,
+        value_n_1 FLOAT,
+        FOREIGN KEY (document_id) REFERENCES document(id) ON DELETE CASCADE
+    """),
+    ("documentvalide", """
+        id {pk},
+        filename {str255} NOT NULL
+    """),
+]
+
+
+# -------------------------------------------------- Dialects --------------------------------------------------
+class Dialect:
+    name = None
+    paramstyle = "qmark"
+    types = {}
+
+    def connect(self):
+        raise NotImplementedError
+
+    def create_database(self):
+        """Create the database itself when the server needs it (no-op by default)"""
+
+    def create_table_sql(self, table, body):
+        return f"CREATE TABLE IF NOT EXISTS {table} ({body.format(**self.types)})"
+
+    def add_column_sql(self, table, column, column_type):
+        return f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"
+
+    def create_index_sql(self, name, table, columns):
+        return f"CREATE INDEX {name} ON {table} ({columns})"
+
+    def has_column(self, cursor, table, column):
+        """Existence checks let a migration be re-run after a partial failure"""
+        raise NotImplementedError
+
+    def has_index(self, cursor, table, name):
+        raise NotImplementedError
+
+    def cursor(self, connection):
+        return connection.cursor()
+
+    def is_alive(self, connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def sql(self, query):
+        if self.paramstyle == "format":
+            return query.replace("?", "%s")
+        return query
+
+
+class SqlServerDialect(Dialect):
+    name = "sqlserver"
+    types = {"pk": "INT IDENTITY(1,1) PRIMARY KEY", "str50": "NVARCHAR(50)", "str100": "NVARCHAR(100)",
+             "str255": "NVARCHAR(255)", "str512": "NVARCHAR(512)", "text": "NVARCHAR(MAX)", "bool": "BIT",
+             "date": "DATE"}
+
+    def __init__(self, server=None, database=DATABASE_NAME, driver=None):
+        if pyodbc is None:
+            raise RuntimeError("pyodbc indisponible : backend SQL Server impossible")
+        self.server = server or os.environ.get("CMF_DB_SERVER", "localhost")
+        self.database = database
+        self.driver = driver or os.environ.get("CMF_ODBC_DRIVER") or self._pick_driver()
+
+    @staticmethod
+    def _pick_driver():
+        installed = set(pyodbc.drivers())
+        return next((d for d in ODBC_DRIVERS if d in installed), ODBC_DRIVERS[-1])
+
+    def _connection_string(self, database):
+        parts = [f"DRIVER={{{self.driver}}}", f"SERVER={self.server}", f"DATABASE={database}",
+                 "Trusted_Connection=yes"]
+        if self.driver.startswith("ODBC Driver 18"):
+            # Driver 18 encrypts by default: avoid the self-signed certificate error on localhost
+            parts.append("Encrypt=no")
+        return ";".join(parts) + ";"
+
+    def connect(self):
+        return pyodbc.connect(self._connection_string(self.database))
+
+    def create_database(self):
+        connection = pyodbc.connect(self._connection_string("master"), autocommit=True)
+        try:
+            connection.cursor().execute(f"IF DB_ID('{self.database}') IS NULL CREATE DATABASE {self.database}")
+        finally:
+            connection.close()
+
+    def create_table_sql(self, table, body):
+        return f"IF OBJECT_ID('{table}', 'U') IS NULL CREATE TABLE {table} ({body.format(**self.types)})"
+
+    def add_column_sql(self, table, column, column_type):
+        return f"ALTER TABLE {table} ADD {column} {column_type}"
+
+    def has_column(self, cursor, table, column):
+        cursor.execute("SELECT COL_LENGTH(?, ?)", (table, column))
+        return cursor.fetchone()[0] is not None
+
+    def has_index(self, cursor, table, name):
+        cursor.execute("SELECT COUNT(*) FROM sys.indexes WHERE name = ? AND object_id = OBJECT_ID(?)", (name, table))
+        return (cursor.fetchone()[0] or 0) > 0
+
+
+class MySqlDialect(Dialect):
+    name = "mysql"
+    paramstyle = "format"
+    types = {"pk": "INT AUTO_INCREMENT PRIMARY KEY", "str50": "VARCHAR(50)", "str100": "VARCHAR(100)",
+             "str255": "VARCHAR(255)", "str512": "VARCHAR(512)", "text": "TEXT", "bool": "TINYINT(1)",
+             "date": "DATE"}
+
+    def __init__(self, host=None, user=None, password=None, database=DATABASE_NAME):
+        if mysql is None:
+            raise RuntimeError("mysql-connector indisponible : backend MySQL impossible")
+        self.params = {
+            "host": host or os.environ.get("CMF_MYSQL_HOST", "localhost"),
+            "user": user or os.environ.get("CMF_MYSQL_USER", "root"),
+            "password": password if password is not None else os.environ.get("CMF_MYSQL_PASSWORD", ""),
+        }
+        self.database = database
+
+    def connect(self):
+        return mysql.connector.connect(database=self.database, **self.params)
+
+    def create_database(self):
+        connection = mysql.connector.connect(**self.params)
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
+            cursor.close()
+        finally:
+            connection.close()
+
+    def has_column(self, cursor, table, column):
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND COLUMN_NAME = ?", (table, column))
+        return (cursor.fetchone()[0] or 0) > 0
+
+    def has_index(self, cursor, table, name):
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND INDEX_NAME = ?", (table, name))
+        return (cursor.fetchone()[0] or 0) > 0
+
+    def cursor(self, connection):
+        # Buffered: a SELECT left half-read does not block the next statement
+        return connection.cursor(buffered=True)
+
+    def is_alive(self, connection):
+        try:
+            connection.ping(reconnect=True, attempts=1)
+            return True
+        except Exception:
+            return False
+
+
+class SqliteDialect(Dialect):
+    name = "sqlite"
+    types = {"pk": "INTEGER PRIMARY KEY AUTOINCREMENT", "str50": "TEXT", "str100": "TEXT",
+             "str255": "TEXT", "str512": "TEXT", "text": "TEXT", "bool": "INTEGER",
+             "date": "TEXT"}
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = str(path)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+
+    def has_column(self, cursor, table, column):
+        cursor.execute("SELECT COUNT(*) FROM pragma_table_info(?) WHERE name = ?", (table, column))
+        return cursor.fetchone()[0] > 0
+
+    def has_index(self, cursor, table, name):
+        cursor.execute("SELECT COUNT(*) FROM pragma_index_list(?) WHERE name = ?", (table, name))
+        return cursor.fetchone()[0] > 0
+
+    def is_alive(self, connection):
+        return True
+
+
+DIALECTS = {"sqlserver": SqlServerDialect, "mysql": MySqlDialect, "sqlite": SqliteDialect}
+
+
+# -------------------------------------------------- Pool --------------------------------------------------
+class PooledCursor:
+    """Cursor proxy translating '?' placeholders for the backend"""
+
+    def __init__(self, cursor, dialect):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_dialect", dialect)
+
+    def execute(self, query, params=None):
+        if params is None:
+            return self._cursor.execute(self._dialect.sql(query))
+        return self._cursor.execute(self._dialect.sql(query), tuple(params))
+
+    def executemany(self, query, rows):
+        return self._cursor.executemany(self._dialect.sql(query), rows)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # e.g. fast_executemany must reach the pyodbc cursor
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class PooledConnection:
+    """
+    Connection proxy lent by ConnectionPool.
+    close() gives the connection back to the pool instead of closing it, so the
+    legacy `connection, cursor = ...` / `connection.close()` code keeps working.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def cursor(self):
+        return PooledCursor(self._pool.dialect.cursor(self._raw), self._pool.dialect)
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def is_connected(self):
+        return not self._released
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._raw.commit()
+        else:
+            self._raw.rollback()
+        self.close()
+
+
+class ConnectionPool:
+    """Up to `size` open connections of one dialect, checked for liveness when reused"""
+
+    def __init__(self, dialect, size=DEFAULT_POOL_SIZE):
+        self.dialect = dialect
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        while True:
+            try:
+                raw = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self.dialect.is_alive(raw):
+                return PooledConnection(self, raw)
+            self._discard(raw)
+
+        with self._lock:
+            create = self._count < self.size
+            if create:
+                self._count += 1
+        if create:
+            try:
+                return PooledConnection(self, self.dialect.connect())
+            except Exception:
+                with self._lock:
+                    self._count -= 1
+                raise
+        return PooledConnection(self, self._idle.get(timeout=timeout))
+
+    def release(self, raw):
+        try:
+            # Drop any transaction left open by the borrower
+            raw.rollback()
+        except Exception as e:
+            logging.warning(f"Connexion inutilisable, fermée : {e}")
+            self._discard(raw)
+            return
+        self._idle.put(raw)
+
+    def _discard(self, raw):
+        with self._lock:
+            self._count -= 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+# -------------------------------------------------- Repository --------------------------------------------------
+class Repository:
+    """Document / financial data persistence over a pooled connection"""
+
+    def __init__(self, dialect, pool_size=DEFAULT_POOL_SIZE):
+        self.dialect = dialect
+        self.pool = ConnectionPool(dialect, pool_size)
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return self.dialect.name
+
+    def ensure_schema(self):
+        """Create the database and tables and apply the pending migrations, once per process"""
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            print(f"\n🔧 Création/mise à jour de la base de données '{DATABASE_NAME}' ({self.backend})...")
+            self.dialect.create_database()
+            with self.pool.acquire() as connection:
+                cursor = connection.cursor()
+                for table, body in TABLES:
+                    cursor.execute(self.dialect.create_table_sql(table, body))
+                cursor.close()
+                connection.commit()
+                apply_migrations(connection, self.dialect)
+            self._schema_ready = True
+            logging.info(f"Schéma {self.backend} prêt")
+            print(f"✅ Base de données '{DATABASE_NAME}' prête")
+
+    def connect(self):
+        """(connection, cursor) for the legacy functions; connection.close() returns it to the pool"""
+        self.ensure_schema()
+        connection = self.pool.acquire()
+        return connection, connection.cursor()
+
+    @contextmanager
+    def connection(self):
+        """with repo.connection() as conn: ... (commit on success, rollback on error)"""
+        self.ensure_schema()
+        with self.pool.acquire() as connection:
+            yield connection
+
+    def document_exists(self, societe, nom, annee):
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM document WHERE Societe = ? AND Nom = ? AND Annee = ?",
+                           (societe, nom, int(annee)))
+            return (cursor.fetchone()[0] or 0) > 0
+
+    def insert_document(self, societe, nom, annee, url):
+        """Insert one document row unless (Societe, Nom, Annee) exists; returns True if inserted"""
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM document WHERE Societe = ? AND Nom = ? AND Annee = ?",
+                           (societe, nom, int(annee)))
+            if (cursor.fetchone()[0] or 0) > 0:
+                return False
+            cursor.execute("INSERT INTO document (Societe, Nom, Annee, URL, period_end) VALUES (?, ?, ?, ?, ?)",
+                           (societe, nom, int(annee), url, period_end_from_name(nom, annee)))
+            return True
+
+    def insert_document_valide(self, filename):
+        """Record a validated Excel file in documentvalide"""
+        try:
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("INSERT INTO documentvalide (filename) VALUES (?)", (filename,))
+            return True
+        except Exception as e:
+            logging.error(f"Erreur insertion documentvalide : {e}")
+            print(f"Erreur lors de l'insertion dans la base de données : {e}")
+            return False
+
+    def close(self):
+        self.pool.close()
+
+
+_REPOSITORIES = {}
+_REPOSITORIES_LOCK = threading.Lock()
+
+
+def get_repository(default_backend=DEFAULT_BACKEND):
+    """
+    Process-wide repository. CMF_DB_BACKEND (sqlserver | mysql | sqlite) overrides
+    the backend the caller historically used.
+    """
+    backend = os.environ.get("CMF_DB_BACKEND", default_backend).lower()
+    if backend not in DIALECTS:
+        raise ValueError(f"Backend inconnu : {backend} (attendu : {', '.join(DIALECTS)})")
+    with _REPOSITORIES_LOCK:
+        if backend not in _REPOSITORIES:
+            _REPOSITORIES[backend] = Repository(DIALECTS[backend]())
+        return _REPOSITORIES[backend]
+
+
+def connect(default_backend=DEFAULT_BACKEND):
+    """
+    (connection, cursor) from the pooled repository, or (None, None) if the database
+    is unreachable (same contract as the former create_*_database_and_table functions).
+    """
+    try:
+        return get_repository(default_backend).connect()
+    except Exception as e:
+        logging.error(f"Erreur lors de la création de la base : {e}")
+        print(f"❌ Erreur lors de la création de la base : {e}")
+        return None, None
+
+
+def close_repositories():
+    with _REPOSITORIES_LOCK:
+        for repository in _REPOSITORIES.values():
+            repository.close()
+        _REPOSITORIES.clear()
+
+
+atexit.register(close_repositories)
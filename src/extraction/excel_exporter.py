@@ -8,7 +8,54 @@ from openpyxl.styles import Font, Alignment, Border, Side
 import shutil
 import traceback
 
-def export_to_excel(hierarchical_data, company_name, pdf_path, output_name, year_n, year_n_1):
+from src.utils.pdf_store import get_pdf_store, is_store_object
+from src.extraction.excel_streaming import StreamingWorkbook
+from src.utils.metrics import instrument
+
+PASSIF_WIDTHS = [20, 35, 8, 55, 15, 15, 18]
+
+
+def passif_headers(year_n, year_n_1):
+    return ['Type', 'Sous-catégorie', 'Code', 'Description', f'31/12/{year_n}', f'31/12/{year_n_1}', 'ValidationResult']
+
+
+def passif_excel_rows(hierarchical_data):
+    """
+    Rows of the passif sheet, in sheet order: (values, bold).
+    Section headers (level 1 SECTION) and the main title (level 0) are skipped.
+    """
+    rows = []
+    for item in hierarchical_data:
+        level = item.get('level', 2)
+        category = item.get('category', '')
+        if (level == 1 and category == "SECTION") or level == 0:
+            continue
+        values = item.get('values', [])
+        amounts = [v if v and v != '' else None for v in values[:2]]
+        amounts += [None] * (2 - len(amounts))
+        indent = "  " * max(0, level - 1)
+        rows.append((
+            [category, item.get('subcategory', ''), item.get('code', ''),
+             f"{indent}{item.get('description', '')}", *amounts, item.get('ValidationResult', '')],
+            bool(item.get('is_total', False)) or level == 2
+        ))
+    return rows
+
+
+def write_passif_streaming(hierarchical_data, excel_path, year_n, year_n_1):
+    """Passif sheet written in one streaming pass (write-only workbook, named styles)"""
+    wb = StreamingWorkbook()
+    ws = wb.add_sheet("CAPITAUX PROPRES ET PASSIF", widths=PASSIF_WIDTHS, freeze='A2')
+    wb.append(ws, passif_headers(year_n, year_n_1), 'cmf_header')
+    for values, bold in passif_excel_rows(hierarchical_data):
+        suffix = '_bold' if bold else ''
+        wb.append(ws, values, [f'cmf_text{suffix}'] * 4 + [f'cmf_number{suffix}'] * 2 + [f'cmf_right{suffix}'])
+    wb.set_auto_filter(ws, len(PASSIF_WIDTHS))
+    return wb.save(excel_path)
+
+
+@instrument("export", table="passif", format="xlsx")
+def export_to_excel(hierarchical_data, company_name, pdf_path, output_name, year_n, year_n_1, write_only=False):
     """
     Export hierarchical data to Excel with proper structure and formatting
     
@@ -17,6 +64,7 @@ def export_to_excel(hierarchical_data, company_name, pdf_path, output_name, year
         output_name: Output Excel filename
         year_n: Current year (e.g., 2024)
         year_n_1: Previous year (e.g., 2023)
+        write_only: Stream the sheet with named styles instead of styling an in-memory workbook
     """
     # Create company folder
         # ----------------------------------
@@ -28,13 +76,19 @@ def export_to_excel(hierarchical_data, company_name, pdf_path, output_name, year
     os.makedirs(folder_path, exist_ok=True)
 
         # ----------------------------------
-        #  Copy PDF into the folder
+        #  Link PDF into the folder (hardlink from the PDF store, no duplicate bytes)
         # ----------------------------------
-    pdf_filename = os.path.basename(pdf_path)
-    pdf_dest = os.path.join(folder_path, pdf_filename)
-    if os.path.abspath(pdf_path) != os.path.abspath(pdf_dest):
-        shutil.copy2(pdf_path, pdf_dest)
+    if is_store_object(pdf_path):
+        get_pdf_store().materialize(pdf_path, folder_path)
+    else:
+        pdf_dest = os.path.join(folder_path, os.path.basename(pdf_path))
+        if os.path.abspath(pdf_path) != os.path.abspath(pdf_dest):
+            shutil.copy2(pdf_path, pdf_dest)
     try:
+        if write_only:
+            write_passif_streaming(hierarchical_data, os.path.join(folder_path, output_name), year_n, year_n_1)
+            return True
+
         wb = Workbook()
         ws = wb.active
         ws.title = "CAPITAUX PROPRES ET PASSIF"
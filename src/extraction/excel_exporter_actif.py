@@ -1,6 +1,10 @@
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side
 
+from src.utils.metrics import instrument
+
+
+@instrument("export", table="actif", format="xlsx")
 def export_actif_to_excel(actif_data, output_name_actif, year, year_1):
     wb = Workbook()
     ws = wb.active
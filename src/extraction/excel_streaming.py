@@ -0,0 +1,136 @@
+"""
+Excel Streaming Module
+Write-only (openpyxl write_only=True) workbooks with named styles registered once.
+Rows are streamed to disk as they are appended: memory stays flat for large
+multi-sheet exports and no cell-by-cell restyling pass is needed.
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+
+
+NUMBER_FORMAT = '#,##0'
+
+_THIN = Border(left=Side(style='thin'), right=Side(style='thin'),
+               top=Side(style='thin'), bottom=Side(style='thin'))
+_THIN_GREY = Border(left=Side(style='thin', color='D9D9D9'), right=Side(style='thin', color='D9D9D9'),
+                    top=Side(style='thin', color='D9D9D9'), bottom=Side(style='thin', color='D9D9D9'))
+_LEFT = Alignment(horizontal='left', vertical='center')
+_RIGHT = Alignment(horizontal='right', vertical='center')
+_CENTER = Alignment(horizontal='center', vertical='center')
+
+
+def _style(name, font=None, fill=None, border=None, alignment=None, number_format=None):
+    style = NamedStyle(name=name)
+    if font is not None:
+        style.font = font
+    if fill is not None:
+        style.fill = fill
+    if border is not None:
+        style.border = border
+    if alignment is not None:
+        style.alignment = alignment
+    if number_format is not None:
+        style.number_format = number_format
+    return style
+
+
+def default_styles():
+    """Styles of the passif export and of the validated passif output"""
+    return [
+        # export_to_excel (passif)
+        _style('cmf_header', Font(bold=True, size=11), border=_THIN, alignment=_CENTER),
+        _style('cmf_text', Font(size=10), border=_THIN, alignment=_LEFT),
+        _style('cmf_text_bold', Font(bold=True, size=10), border=_THIN, alignment=_LEFT),
+        _style('cmf_right', Font(size=10), border=_THIN, alignment=_RIGHT),
+        _style('cmf_right_bold', Font(bold=True, size=10), border=_THIN, alignment=_RIGHT),
+        _style('cmf_number', Font(size=10), border=_THIN, alignment=_RIGHT, number_format=NUMBER_FORMAT),
+        _style('cmf_number_bold', Font(bold=True, size=10), border=_THIN, alignment=_RIGHT,
+               number_format=NUMBER_FORMAT),
+        # validate_capitaux_propres_passif
+        _style('val_header', Font(bold=True, size=11, color='FFFFFF'), PatternFill('solid', fgColor='2F5496'),
+               _THIN_GREY, Alignment(horizontal='center', vertical='center', wrap_text=True)),
+        _style('val_cell', border=_THIN_GREY),
+        _style('val_year', border=_THIN_GREY, alignment=Alignment(horizontal='right')),
+        _style('val_number', border=_THIN_GREY, alignment=Alignment(horizontal='right'),
+               number_format=NUMBER_FORMAT),
+        _style('val_pass', Font(color='006100', bold=True), PatternFill('solid', fgColor='C6EFCE'),
+               _THIN_GREY, Alignment(horizontal='center')),
+        _style('val_fail', Font(color='9C0006', bold=True), PatternFill('solid', fgColor='FFC7CE'),
+               _THIN_GREY, Alignment(horizontal='center')),
+        _style('val_result', border=_THIN_GREY, alignment=Alignment(horizontal='center')),
+    ]
+
+
+class StreamingWorkbook:
+    """
+    wb = StreamingWorkbook()
+    ws = wb.add_sheet("PASSIF", widths=[20, 35], freeze="A2")
+    wb.append(ws, ["Type", "Code"], "cmf_header")
+    wb.save(path)
+    """
+
+    def __init__(self, styles=None):
+        self.workbook = Workbook(write_only=True)
+        for style in styles or default_styles():
+            self.workbook.add_named_style(style)
+        self._rows = {}
+
+    def add_sheet(self, title, widths=None, freeze=None):
+        """New sheet; widths and freeze panes must be known before the first row"""
+        ws = self.workbook.create_sheet(title=str(title)[:31])
+        for idx, width in enumerate(widths or [], start=1):
+            if width:
+                ws.column_dimensions[get_column_letter(idx)].width = width
+        if freeze:
+            ws.freeze_panes = freeze
+        self._rows[id(ws)] = 0
+        return ws
+
+    def append(self, ws, values, styles=None):
+        """
+        Stream one row. styles: one named style for the row or one per column
+        (None leaves a cell unstyled).
+        """
+        if styles is None or isinstance(styles, str):
+            styles = [styles] * len(values)
+        row = []
+        for value, style in zip(values, styles):
+            cell = WriteOnlyCell(ws, value=value)
+            if style:
+                cell.style = style
+            row.append(cell)
+        ws.append(row)
+        self._rows[id(ws)] += 1
+
+    def row_count(self, ws):
+        return self._rows.get(id(ws), 0)
+
+    def set_auto_filter(self, ws, n_cols):
+        """Filter over the rows appended so far (call before save)"""
+        rows = max(1, self.row_count(ws))
+        ws.auto_filter.ref = f"A1:{get_column_letter(n_cols)}{rows}"
+
+    def write_dataframe(self, title, df, header_style='cmf_header', cell_style=None, widths=None, freeze="A2"):
+        """One sheet per DataFrame, streamed row by row (consolidated exports)"""
+        ws = self.add_sheet(title, widths=widths, freeze=freeze)
+        self.append(ws, [str(c) for c in df.columns], header_style)
+        for record in df.itertuples(index=False, name=None):
+            self.append(ws, [None if isinstance(v, float) and v != v else v for v in record], cell_style)
+        return ws
+
+    def save(self, path):
+        # A write-only workbook can be saved only once
+        self.workbook.save(path)
+        return path
+
+
+def estimate_widths(rows, n_cols, sample=49, padding=4, max_width=45):
+    """Approximate auto-fit from the first `sample` rows (header included)"""
+    widths = [0] * n_cols
+    for row in rows[:sample]:
+        for idx, value in enumerate(row[:n_cols]):
+            if value:
+                widths[idx] = max(widths[idx], len(str(value)))
+    return [min(w + padding, max_width) for w in widths]
@@ -1,4 +1,5 @@
-import camelot
+from src.extraction.table_cache import read_tables
+from src.utils.metrics import instrument
 import pandas as pd
 import re
 
@@ -71,15 +72,16 @@ def extract_title_code(designation):
     return m.group(1) if m else None
 
 
+@instrument("table_extraction", count_result="rows", table="actif")
 def extract_actif(pdf_path, page_num, is_scanned=False):
 
     print(f">>> Extraction ACTIF | page {page_num}")
 
     try:
-        tables = camelot.read_pdf(
+        tables = read_tables(
             pdf_path,
+            page_num,
             flavor="stream",
-            pages=str(page_num),
             row_tol=10,
             strip_text="\n",
         )
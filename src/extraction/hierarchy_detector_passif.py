@@ -1,152 +1,15 @@
-import re
-from config.document_structure import get_subcategory, CP_SUBCATEGORIES, PA_SUBCATEGORIES, PARENT_CODES
-from src.utils.helpers import clean_number, extract_trailing_numbers
+from src.extraction.passif_rules import tokenize_row, classify, PARENT_CODE_SET
+from src.utils.metrics import instrument
 
 
-def _is_purely_numeric_row(row_data):
-    """
-    Check if ALL non-empty cells in the row are numeric (or a parent code).
-    These are parent total rows with just values, no description.
-    """
-    has_value = False
-    for cell in row_data:
-        cell_str = str(cell).strip()
-        if not cell_str:
-            continue
-        if cell_str in PARENT_CODES:
-            continue
-        cleaned = clean_number(cell)
-        if isinstance(cleaned, (int, float)):
-            has_value = True
-        else:
-            return False
-    return has_value
-
-
-def _combine_all_text(row_data):
+def detect_hierarchy_level_passif(row_data, current_section=None):
     """
-    Combine ALL non-numeric, non-empty cells from a row into a single string.
-    Handles text like 'TOTAL DES CAPITAUX PROPRES ET DU PASSIF' split across columns.
+    (level, code, description, is_total, category, subcategory, extra_values) of a row,
+    None for value-only rows (see passif_rules for the rules and their order)
     """
-    parts = []
-    for cell in row_data:
-        cell_str = str(cell).strip()
-        if not cell_str:
-            continue
-        cleaned = clean_number(cell)
-        if not isinstance(cleaned, (int, float)):
-            parts.append(cell_str)
-    return ' '.join(parts)
-
-
-def detect_hierarchy_level_passif(row_data, current_section=None):
-
     if not row_data or len(row_data) == 0:
         return None
-
-    first_col = str(row_data[0]).strip() if row_data[0] else ""
-    second_col = str(row_data[1]).strip() if len(row_data) > 1 and row_data[1] else ""
-
-    # Combine first two columns for code detection
-    combined = f"{first_col} {second_col}".strip()
-    combined_lower = combined.lower()
-
-    # Combine ALL text columns for keyword matching (totals, sections)
-    full_text = _combine_all_text(row_data)
-    full_text_lower = full_text.lower()
-
-    # EARLY EXIT: value-only rows (parent totals) - let post-processing handle them
-    if _is_purely_numeric_row(row_data):
-        return None
-
-    # Level 0: Main title (CAPITAUX PROPRES ET LE PASSIF) but NOT the grand total
-    if ("capitaux propres et" in full_text_lower
-            and "passif" in full_text_lower
-            and "total" not in full_text_lower):
-        return (0, "", full_text, False, "TITRE", "", [])
-
-    # Level 1: Main sections (CAPITAUX PROPRES:, PASSIF:)
-    if re.match(r'^(CAPITAUX PROPRES|PASSIF):?$', combined, re.IGNORECASE):
-        section = "CAPITAUX PROPRES" if "capitaux propres" in combined_lower else "PASSIF"
-        return (1, "", combined, False, "SECTION", section, [])
-
-    # Main totals - use full_text for matching to catch multi-column text
-    # Check TOTAL GENERAL first since it also contains other total keywords
-    if "total" in full_text_lower:
-        clean_desc, extra_vals = extract_trailing_numbers(full_text)
-
-        if "total des capitaux propres et du passif" in full_text_lower:
-            return (1, "", clean_desc, True, "TOTAL G\u00c9N\u00c9RAL", "", extra_vals)
-        elif ("total capitaux propres avant r\u00e9sultat" in full_text_lower
-                or "total capitaux propres avant resultat" in full_text_lower):
-            return (2, "", clean_desc, True, "TOTAL",
-                    "Capitaux Propres - Avant R\u00e9sultat", extra_vals)
-        elif "total capitaux propres avant affectation" in full_text_lower:
-            return (2, "", clean_desc, True, "TOTAL",
-                    "Capitaux Propres - Avant Affectation", extra_vals)
-        elif "total du passif" in full_text_lower:
-            return (2, "", clean_desc, True, "TOTAL", "Total Passif", extra_vals)
-        else:
-            category = current_section if current_section else "TOTAL"
-            return (3, "", clean_desc, True, "TOTAL", category, extra_vals)
-
-    # Level 2: PA codes (PASSIF subsections)
-    if re.match(r'^(PA\d+|PA\d+[A-Z]?\d*)\s+', combined):
-        code_match = re.match(r'^(PA\d+[A-Z]?\d*)\s+(.+)', combined)
-        if code_match:
-            code = code_match.group(1)
-            desc_raw = code_match.group(2)
-            desc, extra_vals = extract_trailing_numbers(desc_raw)
-            subcategory = get_subcategory(code)
-
-            if code in PARENT_CODES:
-                return (2, code, desc, False, "PASSIF", subcategory, extra_vals)
-            else:
-                return (3, code, desc, False, "PASSIF", subcategory, extra_vals)
-
-    # Level 2: CP codes (Capital)
-    if re.match(r'^(CP\d+)\s+', combined):
-        code_match = re.match(r'^(CP\d+)\s+(.+)', combined)
-        if code_match:
-            code = code_match.group(1)
-            desc_raw = code_match.group(2)
-            desc, extra_vals = extract_trailing_numbers(desc_raw)
-            subcategory = get_subcategory(code)
-            return (2, code, desc, False, "CAPITAUX PROPRES", subcategory, extra_vals)
-
-    # Code alone (CP or PA)
-    if re.match(r'^(CP\d+|PA\d+[A-Z]?\d*)$', first_col):
-        if first_col.startswith('CP'):
-            return (2, first_col, second_col, False, "CAPITAUX PROPRES", "", [])
-        else:
-            return (2, first_col, second_col, False, "PASSIF", "", [])
-
-    # Description line without code (level 2 by default)
-    if first_col and not re.match(r'^(CP|PA)', first_col):
-        desc, extra_vals = extract_trailing_numbers(combined)
-        category = current_section if current_section else "AUTRE"
-        return (2, "", desc, False, category, "", extra_vals)
-
-    return None
-
-
-def _extract_numeric_values_from_row(row):
-    """Extract all numeric values from a row, regardless of position."""
-    values = []
-    for cell in row:
-        cleaned = clean_number(cell)
-        if isinstance(cleaned, (int, float)):
-            values.append(cleaned)
-    return values
-
-
-def _find_parent_code_in_row(row):
-    """Check if any cell contains exactly a parent code."""
-    for cell in row:
-        cell_str = str(cell).strip()
-        if cell_str in PARENT_CODES:
-            return cell_str
-    return None
+    return classify(tokenize_row(row_data), current_section)
 
 
 def _find_parent_for_code(code):
@@ -158,11 +21,12 @@ def _find_parent_for_code(code):
         return None
     for length in range(len(code) - 1, 1, -1):
         prefix = code[:length]
-        if prefix in PARENT_CODES:
+        if prefix in PARENT_CODE_SET:
             return prefix
     return None
 
 
+@instrument("structuring", count_result="rows", table="passif")
 def structure_hierarchical_data_passif(raw_data):
     """
     Structure raw table data into hierarchical format.
@@ -184,10 +48,12 @@ def structure_hierarchical_data_passif(raw_data):
     parents_with_children = set()
 
     for row in raw_data:
-        if not any(str(cell).strip() for cell in row):
+        # Each row is stripped and typed once, for the rules and the values below
+        tokens = tokenize_row(row)
+        if tokens.is_blank:
             continue
 
-        hierarchy_info = detect_hierarchy_level_passif(row, current_section)
+        hierarchy_info = classify(tokens, current_section)
 
         if hierarchy_info:
             level, code, description, is_total, category, subcategory, extra_values = hierarchy_info
@@ -198,9 +64,9 @@ def structure_hierarchical_data_passif(raw_data):
             # Track parent-child relationships:
             # If this code is a child of any parent, mark that parent
             if code and not is_total:
-                for parent_code in PARENT_CODES:
-                    if code.startswith(parent_code) and code != parent_code:
-                        parents_with_children.add(parent_code)
+                for length in range(1, len(code)):
+                    if code[:length] in PARENT_CODE_SET:
+                        parents_with_children.add(code[:length])
 
             if code:
                 last_code_seen = code
@@ -209,16 +75,12 @@ def structure_hierarchical_data_passif(raw_data):
             if extra_values:
                 values.extend(extra_values)
 
-            for cell in row[2:]:
-                cleaned = clean_number(cell)
+            for cleaned in tokens.numbers[2:]:
                 if cleaned != '':
                     values.append(cleaned)
 
             if not values and len(row) >= 2:
-                for cell in row:
-                    cleaned = clean_number(cell)
-                    if isinstance(cleaned, (int, float)):
-                        values.append(cleaned)
+                values = tokens.amounts()
 
             hierarchical_rows.append({
                 'level': level,
@@ -231,8 +93,8 @@ def structure_hierarchical_data_passif(raw_data):
             })
         else:
             # Value-only row. Store with context for Pass 2.
-            values = _extract_numeric_values_from_row(row)
-            parent_code_in_row = _find_parent_code_in_row(row)
+            values = tokens.amounts()
+            parent_code_in_row = tokens.parent_code()
 
             if values:
                 unmatched_rows.append({
@@ -247,7 +109,7 @@ def structure_hierarchical_data_passif(raw_data):
     parent_header_indices = {}
     for i, row in enumerate(hierarchical_rows):
         code = row.get('code', '')
-        if code in PARENT_CODES and not row['is_total']:
+        if code in PARENT_CODE_SET and not row['is_total']:
             parent_header_indices[code] = i
 
     # Track which parents get assigned during this pass
@@ -263,7 +125,7 @@ def structure_hierarchical_data_passif(raw_data):
             last_code = unmatched['last_code_before']
             if last_code:
                 # Find the closest parent for this code
-                if last_code in PARENT_CODES:
+                if last_code in PARENT_CODE_SET:
                     candidate = last_code
                 else:
                     candidate = _find_parent_for_code(last_code)
@@ -0,0 +1,147 @@
+"""
+OCR Cache Module
+Persistent SQLite cache of Tesseract output, keyed on
+(sha256 of the PDF, page, dpi, lang, config, preprocessing).
+A page already OCR'd with the same settings is never sent to Tesseract again.
+"""
+import os
+import time
+import sqlite3
+import logging
+from pathlib import Path
+
+import pytesseract
+
+from src.utils.helpers import file_sha256
+from src.extraction.rasterizer import render_page
+from src.utils.metrics import span, register_cache
+
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / "cache"
+DEFAULT_DB_PATH = Path(os.environ.get("CMF_OCR_CACHE", DEFAULT_CACHE_DIR / "ocr_cache.sqlite"))
+
+# Size budget of the cached text; least recently used entries are evicted beyond it
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class OcrCache:
+    """SQLite store of OCR text with size-based LRU eviction"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = str(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_text (
+                    pdf_sha256 TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    dpi INTEGER NOT NULL,
+                    lang TEXT NOT NULL,
+                    config TEXT NOT NULL,
+                    preprocess TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (pdf_sha256, page, dpi, lang, config, preprocess)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ocr_text_last_used ON ocr_text (last_used)")
+
+    def _connect(self):
+        # One short-lived connection per call: safe across threads and worker processes
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key):
+        """Cached text for key, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM ocr_text WHERE pdf_sha256=? AND page=? AND dpi=? AND lang=? AND config=? AND preprocess=?",
+                key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE ocr_text SET last_used=? WHERE pdf_sha256=? AND page=? AND dpi=? AND lang=? AND config=? AND preprocess=?",
+                (time.time(),) + tuple(key)
+            )
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, text):
+        """Store text for key, then evict if over budget"""
+        size = len(text.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_text VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                tuple(key) + (text, size, time.time())
+            )
+        self.evict()
+
+    def total_bytes(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_text").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        with self._connect() as conn:
+            rows = conn.execute("SELECT rowid, size FROM ocr_text ORDER BY last_used ASC").fetchall()
+            for rowid, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM ocr_text WHERE rowid=?", (rowid,))
+                total -= size
+                removed += 1
+        logging.info(f"OCR cache: {removed} entrée(s) évincée(s)")
+        return removed
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ocr_text")
+
+
+_DEFAULT_CACHE = None
+
+
+def get_ocr_cache():
+    """Process-wide cache instance"""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = OcrCache()
+        register_cache("ocr", _DEFAULT_CACHE)
+    return _DEFAULT_CACHE
+
+
+def ocr_page(pdf_path, page_num, dpi, lang="fra", config="--oem 3 --psm 6", preprocess=None, cache=None):
+    """
+    OCR one page (1-based), going through the persistent cache.
+    The page image comes from the shared rasterizer.
+    preprocess: optional callable applied to the PIL image before Tesseract;
+    its name is part of the cache key.
+    """
+    cache = cache or get_ocr_cache()
+    preprocess_key = getattr(preprocess, "__name__", "none") if preprocess else "none"
+    key = (file_sha256(pdf_path), int(page_num), int(dpi), lang, config, preprocess_key)
+
+    with span("ocr", page=int(page_num), dpi=int(dpi)) as s:
+        text = cache.get(key)
+        if text is not None:
+            return text
+
+        image = render_page(pdf_path, page_num, dpi)
+        if image is None:
+            return ""
+        if preprocess:
+            image = preprocess(image)
+        text = pytesseract.image_to_string(image, lang=lang, config=config)
+        s.count("pages_ocr")
+        cache.put(key, text)
+        return text
@@ -0,0 +1,67 @@
+"""
+OCR Pool Module
+Rasterizes and OCRs candidate pages concurrently in a ProcessPoolExecutor.
+Results are yielded in page order; closing the iterator cancels outstanding work.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.extraction.ocr_cache import ocr_page
+
+
+def _default_workers():
+    env = os.environ.get("CMF_OCR_WORKERS")
+    if env:
+        try:
+            return max(1, int(env))
+        except ValueError:
+            pass
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+# Number of OCR worker processes (1 = sequential, in-process)
+OCR_WORKERS = _default_workers()
+
+
+def _ocr_worker(pdf_path, page_num, dpi, lang, config, preprocess):
+    return ocr_page(pdf_path, page_num, dpi, lang=lang, config=config, preprocess=preprocess)
+
+
+def iter_ocr_pages(pdf_path, pages, dpi, lang="fra", config="--oem 3 --psm 6", preprocess=None, workers=None):
+    """
+    Yield (page_num, text) for each page, in the order given.
+    At most 2 x workers pages are in flight, so stopping early (break + close())
+    wastes little work: pending pages are cancelled when the generator is closed.
+    """
+    pages = list(pages)
+    workers = workers or OCR_WORKERS
+
+    if workers <= 1 or len(pages) <= 1:
+        for page_num in pages:
+            yield page_num, ocr_page(pdf_path, page_num, dpi, lang=lang, config=config, preprocess=preprocess)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(pages)))
+    futures = {}
+    window = workers * 2
+    next_idx = 0
+
+    def submit_next():
+        nonlocal next_idx
+        if next_idx < len(pages):
+            page_num = pages[next_idx]
+            futures[page_num] = executor.submit(_ocr_worker, pdf_path, page_num, dpi, lang, config, preprocess)
+            next_idx += 1
+
+    try:
+        for _ in range(window):
+            submit_next()
+
+        for page_num in pages:
+            text = futures.pop(page_num).result()
+            submit_next()
+            yield page_num, text
+    finally:
+        for future in futures.values():
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,217 @@
+"""
+Page Index Module
+Builds a document-level index of a PDF once (text per page, scanned/native flag,
+keyword hits per table type) so every locator queries the same pass.
+"""
+import os
+import re
+import logging
+from collections import OrderedDict
+from contextlib import closing
+
+import PyPDF2
+
+from src.extraction.ocr_cache import ocr_page
+from src.extraction.ocr_pool import iter_ocr_pages
+from src.utils.metrics import register_cache
+
+
+# A page with less native text than this is treated as scanned
+SCANNED_TEXT_THRESHOLD = 100
+
+# OCR settings used when a scanned page has to be read for the search
+SEARCH_OCR_DPI = 300
+SEARCH_OCR_LANG = 'fra'
+SEARCH_OCR_CONFIG = '--oem 3 --psm 6'
+
+# Number of PDF indexes kept in memory
+MAX_CACHED_INDEXES = 8
+
+
+def normalize_search_text(text):
+    """Lowercase and collapse whitespace (rule used by search_table_in_pdf)"""
+    return re.sub(r'\s+', ' ', (text or '').lower())
+
+
+def normalize_annexe_text(text):
+    """Same normalisation as Extraction1213.normalize_text_light"""
+    s = normalize_search_text(text)
+    return s.replace("nº", "n°").replace("no", "n°").replace("n0", "n°")
+
+
+def annexe_keywords(num):
+    """Title variants used to locate Annexe 12 / 13"""
+    n = str(num)
+    return [
+        f"annexe {n}",
+        f"annexe{n}",
+        f"annexe n° {n}",
+        f"annexe n°{n}",
+        f"annexe n º {n}",
+        f"annexe nº {n}",
+        f"note n°{n}",
+        f"note n° {n}",
+    ]
+
+
+_ANN12_KEYWORDS = annexe_keywords(12)
+_ANN13_KEYWORDS = annexe_keywords(13)
+
+
+def _hit_passif(text, annexe_text):
+    return "capitaux propres" in text and "passif" in text and "total" in text
+
+
+def _hit_actif(text, annexe_text):
+    return "actif" in text and "total" in text and "actifs incorporels" in text
+
+
+def _hit_ann12(text, annexe_text):
+    return any(kw in annexe_text for kw in _ANN12_KEYWORDS)
+
+
+def _hit_ann13(text, annexe_text):
+    return any(kw in annexe_text for kw in _ANN13_KEYWORDS)
+
+
+HIT_RULES = {
+    'passif': _hit_passif,
+    'actif': _hit_actif,
+    'ann12': _hit_ann12,
+    'ann13': _hit_ann13,
+}
+
+
+class PageEntry:
+    """Text and keyword hits of one page"""
+    __slots__ = ('page_num', 'text', 'is_scanned', 'ocr_done', 'hits')
+
+    def __init__(self, page_num, text, is_scanned):
+        self.page_num = page_num
+        self.text = text or ''
+        self.is_scanned = is_scanned
+        self.ocr_done = False
+        self.hits = set()
+
+    def compute_hits(self):
+        text = normalize_search_text(self.text)
+        annexe_text = normalize_annexe_text(self.text)
+        self.hits = {t for t, rule in HIT_RULES.items() if rule(text, annexe_text)}
+
+
+class PageIndex:
+    """
+    Index of a PDF built with a single PyPDF2 pass.
+    Scanned pages are OCR'd lazily, only when a locator needs them, and the
+    OCR text is kept in the index so no page is read twice.
+    """
+
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self.pages = []
+
+        pdf_reader = PyPDF2.PdfReader(pdf_path)
+        for i, page in enumerate(pdf_reader.pages):
+            try:
+                text = page.extract_text() or ''
+            except Exception as e:
+                logging.warning(f"Texte illisible page {i + 1} de {pdf_path}: {e}")
+                text = ''
+            entry = PageEntry(i + 1, text, len(text.strip()) < SCANNED_TEXT_THRESHOLD)
+            entry.compute_hits()
+            self.pages.append(entry)
+
+    @property
+    def num_pages(self):
+        return len(self.pages)
+
+    def page(self, page_num):
+        """Entry for a 1-based page number"""
+        return self.pages[page_num - 1]
+
+    def ensure_text(self, page_num):
+        """OCR a scanned page once and refresh its hits"""
+        entry = self.page(page_num)
+        if entry.is_scanned and not entry.ocr_done:
+            self._set_ocr_text(entry, ocr_search_page(self.pdf_path, page_num))
+        return entry
+
+    def _set_ocr_text(self, entry, text):
+        print(f"📷 Page {entry.page_num} seems scanned → OCR...")
+        entry.text = text or ''
+        entry.ocr_done = True
+        entry.compute_hits()
+
+    def locate(self, table_type, ocr=True, pages=None, workers=None):
+        """
+        First page matching table_type.
+        Scanned pages still to OCR are processed by the OCR pool (workers
+        processes), ahead of the scan; pending work is cancelled on a match.
+        Returns (page_num, is_scanned) or (None, None).
+        """
+        page_nums = list(pages) if pages is not None else list(range(1, self.num_pages + 1))
+        pending = []
+        if ocr:
+            pending = [p for p in page_nums if self.page(p).is_scanned and not self.page(p).ocr_done]
+
+        ocr_results = iter_ocr_pages(
+            self.pdf_path, pending, SEARCH_OCR_DPI,
+            lang=SEARCH_OCR_LANG, config=SEARCH_OCR_CONFIG, workers=workers
+        )
+        with closing(ocr_results):
+            for page_num in page_nums:
+                entry = self.page(page_num)
+                if ocr and entry.is_scanned and not entry.ocr_done:
+                    # pending is in the same order as page_nums
+                    _, text = next(ocr_results)
+                    self._set_ocr_text(entry, text)
+                if table_type in entry.hits:
+                    return page_num, entry.is_scanned
+        return None, None
+
+    def hits(self, table_type):
+        """All pages already known to match table_type (no OCR triggered)"""
+        return [e.page_num for e in self.pages if table_type in e.hits]
+
+
+def ocr_search_page(pdf_path, page_num):
+    """Rasterize and OCR a single page with the search settings (cached)"""
+    return ocr_page(pdf_path, page_num, SEARCH_OCR_DPI, lang=SEARCH_OCR_LANG, config=SEARCH_OCR_CONFIG)
+
+
+_INDEXES = OrderedDict()
+
+
+class _IndexStats:
+    """Hit / build counters of the in-memory indexes (exposed to the metrics spans)"""
+    hits = 0
+    builds = 0
+
+
+INDEX_STATS = _IndexStats()
+register_cache("page_index", INDEX_STATS, misses="builds")
+
+
+def get_page_index(pdf_path):
+    """Return the index of a PDF, building it only on first use"""
+    path = os.path.abspath(pdf_path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+
+    index = _INDEXES.get(key)
+    if index is not None:
+        _INDEXES.move_to_end(key)
+        INDEX_STATS.hits += 1
+        return index
+
+    INDEX_STATS.builds += 1
+    index = PageIndex(path)
+    _INDEXES[key] = index
+    while len(_INDEXES) > MAX_CACHED_INDEXES:
+        _INDEXES.popitem(last=False)
+    return index
+
+
+def clear_page_indexes():
+    """Drop all in-memory indexes"""
+    _INDEXES.clear()
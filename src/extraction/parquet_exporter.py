@@ -0,0 +1,234 @@
+"""
+Parquet Exporter Module
+Columnar export of every extracted statement (passif, actif, annexes 12/13) to a
+Hive-partitioned Parquet dataset:
+    outputs/parquet/company=<societe>/year=<annee>/statement=<type>/part-0.parquet
+The columns follow models.FinancialData, so the whole corpus can be scanned with
+pyarrow.dataset / pandas / DuckDB without reading any workbook back.
+"""
+import os
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+from src.database.models import FinancialData
+from src.utils.metrics import instrument, annotate, count
+from src.utils.numbers import parse_number, parse_numbers
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: the Excel outputs do not depend on it
+    pa = None
+    pq = None
+
+
+DEFAULT_DATASET_DIR = Path(os.environ.get("CMF_PARQUET_DIR", Path(__file__).resolve().parents[2] / "outputs" / "parquet"))
+STATEMENTS = ("passif", "actif", "annexe12", "annexe13")
+PARTITION_KEYS = ("company", "year", "statement")
+
+# Columns added to the FinancialData fields: line order, annexe column, actif BRUT / AMORT
+EXTRA_FIELDS = (
+    ("row_index", "int64"),
+    ("column_label", "string"),
+    ("value_brut", "float64"),
+    ("value_amort_prov", "float64"),
+)
+
+_ARROW_TYPES = {"int64": "int64", "float64": "float64", "string": "string", "bool": "bool_"}
+
+
+def dataset_fields():
+    """(name, logical type) of a Parquet file, partition keys excluded"""
+    return EXTRA_FIELDS[:1] + FinancialData.FIELDS + EXTRA_FIELDS[1:]
+
+
+def arrow_schema():
+    if pa is None:
+        return None
+    return pa.schema([(name, getattr(pa, _ARROW_TYPES[kind])()) for name, kind in dataset_fields()])
+
+
+def _to_float(value):
+    """Amount cell ("1 234", "(56)", "-", 12) -> float or None"""
+    return parse_number(value)
+
+
+def _empty_row(row_index, document_id):
+    row = {name: None for name, _ in dataset_fields()}
+    row["row_index"] = row_index
+    row["document_id"] = document_id
+    return row
+
+
+def passif_rows(hierarchical_data, document_id=None):
+    rows = []
+    for i, item in enumerate(hierarchical_data or []):
+        values = item.get("values") or []
+        data = FinancialData(
+            document_id, item.get("level"), item.get("code"), item.get("description"),
+            bool(item.get("is_total")), item.get("category"), item.get("subcategory"),
+            _to_float(values[0]) if len(values) > 0 else None,
+            _to_float(values[1]) if len(values) > 1 else None,
+        )
+        row = _empty_row(i, document_id)
+        row.update(data.to_dict())
+        rows.append(row)
+    return rows
+
+
+def actif_rows(actif_data, document_id=None):
+    rows = []
+    for i, item in enumerate(actif_data or []):
+        designation = str(item.get("DESIGNATION") or "").strip()
+        code = re.match(r"^(AC\d+)\b", designation.upper())
+        row = _empty_row(i, document_id)
+        row.update({
+            "code": code.group(1) if code else None,
+            "description": designation,
+            "is_total": designation.lower().startswith("total"),
+            "category": "ACTIF",
+            "value_n": _to_float(item.get("NET_N")),
+            "value_n_1": _to_float(item.get("NET_N1")),
+            "value_brut": _to_float(item.get("BRUT")),
+            "value_amort_prov": _to_float(item.get("AMORT_PROV")),
+        })
+        rows.append(row)
+    return rows
+
+
+def annexe_rows(tables, document_id=None):
+    """
+    tables: [(name, DataFrame)] as exported to Excel by Extraction1213.
+    One row per (ligne, colonne) cell; the first column holds the line labels.
+    """
+    rows = []
+    for name, df in tables or []:
+        if df is None or df.empty:
+            continue
+        # Every amount cell of the table parsed in one call
+        amounts, parsed = parse_numbers(df.iloc[:, 1:].to_numpy(dtype=object))
+        columns = list(df.columns[1:])
+        for i, label in enumerate(df.iloc[:, 0].tolist()):
+            label = str(label).strip()
+            if not label or label.lower() == "nan":
+                continue
+            for j, column in enumerate(columns):
+                if not parsed[i, j]:
+                    continue
+                value = float(amounts[i, j])
+                row = _empty_row(len(rows), document_id)
+                row.update({
+                    "description": label,
+                    "is_total": label.lower().startswith("total"),
+                    "category": str(name),
+                    "column_label": str(column),
+                    "value_n": value,
+                })
+                rows.append(row)
+    return rows
+
+
+ROW_BUILDERS = {
+    "passif": passif_rows,
+    "actif": actif_rows,
+    "annexe12": annexe_rows,
+    "annexe13": annexe_rows,
+}
+
+
+_missing_warned = False
+
+
+def _warn_missing_pyarrow():
+    """One warning per process: pyarrow is in requirements.txt, its absence is a broken install"""
+    global _missing_warned
+    if not _missing_warned:
+        _missing_warned = True
+        logging.warning("pyarrow absent (pip install -r requirements.txt) : aucun export Parquet dans ce run")
+        print("⚠️ pyarrow absent : export Parquet désactivé (pip install pyarrow)")
+
+
+def partition_dir(company, year, statement, root=DEFAULT_DATASET_DIR):
+    # URI-encoded segments: pyarrow's hive partitioning decodes them back to the full name
+    return Path(root) / f"company={quote(str(company), safe='')}" / f"year={int(year)}" / f"statement={statement}"
+
+
+@instrument("export", format="parquet")
+def export_statement(data, company, year, statement, document_id=None, root=DEFAULT_DATASET_DIR):
+    """
+    Write one statement to its partition (replacing the previous extraction).
+    Returns the file path, or None if pyarrow is missing or nothing was exported.
+    """
+    annotate(table=statement)
+    if statement not in ROW_BUILDERS:
+        raise ValueError(f"Type d'état inconnu : {statement} (attendu : {', '.join(STATEMENTS)})")
+    if pa is None:
+        _warn_missing_pyarrow()
+        return None
+    try:
+        rows = ROW_BUILDERS[statement](data, document_id)
+        if not rows:
+            return None
+        count("rows", len(rows))
+        schema = arrow_schema()
+        table = pa.Table.from_pylist(rows, schema=schema)
+
+        folder = partition_dir(company, year, statement, root)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / "part-0.parquet"
+        tmp_path = folder / f".part-0.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+        logging.info(f"Parquet {statement} : {path} ({len(rows)} lignes)")
+        print(f"✅ Parquet {statement} : {path}")
+        return str(path)
+    except Exception as e:
+        logging.error(f"Erreur export Parquet {statement} : {e}")
+        print(f"⚠️ Export Parquet {statement} échoué : {e}")
+        return None
+
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+_PENDING = []
+
+
+def export_statement_async(data, company, year, statement, document_id=None, root=DEFAULT_DATASET_DIR):
+    """Same as export_statement, run beside the Excel export; see wait_exports()"""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="parquet")
+        future = _EXECUTOR.submit(export_statement, data, company, year, statement, document_id, root)
+        _PENDING.append(future)
+    return future
+
+
+def wait_exports():
+    """Block until the queued exports are written; returns their paths"""
+    with _EXECUTOR_LOCK:
+        pending = list(_PENDING)
+        _PENDING.clear()
+    return [future.result() for future in pending]
+
+
+def read_dataset(root=DEFAULT_DATASET_DIR, filters=None, columns=None):
+    """
+    Whole corpus as a DataFrame (company, year, statement restored from the paths).
+    filters: pyarrow filter expression or DNF list, e.g. [("statement", "=", "passif")].
+    """
+    if pa is None:
+        raise ImportError("pyarrow requis pour lire le dataset Parquet")
+    import pyarrow.dataset as ds
+    partitioning = ds.partitioning(
+        pa.schema([("company", pa.string()), ("year", pa.int32()), ("statement", pa.string())]),
+        flavor="hive"
+    )
+    dataset = ds.dataset(str(root), format="parquet", partitioning=partitioning)
+    if isinstance(filters, list):
+        filters = pq.filters_to_expression(filters)
+    return dataset.to_table(columns=columns, filter=filters).to_pandas()
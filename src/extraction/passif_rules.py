@@ -0,0 +1,224 @@
+"""
+Passif Rules Module
+Table-driven classifier behind detect_hierarchy_level_passif. The rule tables live in
+config/document_structure.py; the patterns are compiled once at import.
+
+A row is tokenized once (tokenize_row): every cell is stripped and typed with a single
+clean_number call, and the texts used by the rules (first two columns, all text cells)
+are built and lowercased once. The rules are then tried in order on the tokens:
+
+    value_only   only amounts / parent codes -> None (attributed in post-processing)
+    title        CAPITAUX PROPRES ET LE PASSIF (not the grand total)
+    section      CAPITAUX PROPRES: / PASSIF:
+    total        TOTAL_RULES, first match wins
+    code         PA / CP code followed by a description
+    code_alone   PA / CP code in the first column only
+    description  text without code
+
+    tokens = tokenize_row(["PA3", "Provisions techniques brutes", "1 234"])
+    rule, match = match_rule(tokens) # rule is RULES["code"]
+    classify(tokens, "PASSIF")       # -> (2, "PA3", "Provisions techniques brutes", ...)
+"""
+import re
+from functools import lru_cache
+
+from config.document_structure import (
+    get_subcategory, PARENT_CODES, CODE_FAMILIES, TITLE_KEYWORDS, TITLE_EXCLUDED,
+    SECTION_TITLES, TOTAL_RULES,
+)
+from src.utils.helpers import clean_number, extract_trailing_numbers
+
+
+PARENT_CODE_SET = frozenset(PARENT_CODES)
+
+_DIGIT_RE = re.compile(r'\d')
+
+_SECTION_RE = re.compile(
+    r'^(' + '|'.join(re.escape(title) for title in SECTION_TITLES) + r'):?$', re.IGNORECASE)
+_SECTIONS_BY_TITLE = {title.lower(): section for title, section in SECTION_TITLES.items()}
+
+# Code followed by a description, per family: (compiled pattern, family settings)
+_CODE_WITH_DESC = [
+    (re.compile(r'^(' + family['pattern'] + r')\s+(.+)'), family)
+    for family in CODE_FAMILIES.values()
+]
+_CODE_ALONE_RE = re.compile(
+    r'^(' + '|'.join(family['pattern'] for family in CODE_FAMILIES.values()) + r')$')
+_CODE_PREFIXES = tuple(CODE_FAMILIES)
+
+_TOTAL_RULES = tuple((tuple(keywords), level, category, subcategory)
+                     for keywords, level, category, subcategory in TOTAL_RULES)
+
+
+_NUMBER_TYPES = (int, float)
+
+
+@lru_cache(maxsize=65536)
+def _type_text(text):
+    if not _DIGIT_RE.search(text):
+        return text
+    return clean_number(text)
+
+
+def type_cell(cell):
+    """clean_number of a cell; texts are parsed once per distinct value and skipped without digits"""
+    if isinstance(cell, str):
+        return _type_text(cell)
+    return clean_number(cell)
+
+
+class RowTokens:
+    """A row stripped and typed once; every rule reads these fields"""
+    __slots__ = ("row", "texts", "numbers", "first", "second", "combined", "combined_lower",
+                 "full_text", "full_lower", "is_blank", "is_value_only")
+
+    def __init__(self, row):
+        self.row = row
+        self.texts = [str(cell).strip() for cell in row]
+        self.numbers = [type_cell(cell) for cell in row]
+
+        self.first = str(row[0]).strip() if row and row[0] else ""
+        self.second = str(row[1]).strip() if len(row) > 1 and row[1] else ""
+        self.combined = f"{self.first} {self.second}".strip()
+        self.combined_lower = self.combined.lower()
+
+        parts = []
+        has_value = False
+        only_values = True
+        for text, number in zip(self.texts, self.numbers):
+            if not text:
+                continue
+            if isinstance(number, _NUMBER_TYPES):
+                has_value = True
+                continue
+            parts.append(text)
+            if text not in PARENT_CODE_SET:
+                only_values = False
+        self.full_text = ' '.join(parts)
+        self.full_lower = self.full_text.lower()
+        self.is_blank = not any(self.texts)
+        self.is_value_only = has_value and only_values
+
+    def amounts(self):
+        """Numeric cells, in column order"""
+        return [number for number in self.numbers if isinstance(number, _NUMBER_TYPES)]
+
+    def parent_code(self):
+        """First cell holding exactly a parent code, None otherwise"""
+        for text in self.texts:
+            if text in PARENT_CODE_SET:
+                return text
+        return None
+
+
+def tokenize_row(row):
+    return RowTokens(row)
+
+
+class Rule:
+    """match(tokens) -> match object or None; build(tokens, section, match) -> hierarchy tuple or None"""
+    __slots__ = ("name", "match", "build")
+
+    def __init__(self, name, match, build):
+        self.name = name
+        self.match = match
+        self.build = build
+
+
+def _match_title(tokens):
+    text = tokens.full_lower
+    return (all(keyword in text for keyword in TITLE_KEYWORDS)
+            and not any(keyword in text for keyword in TITLE_EXCLUDED))
+
+
+def _build_title(tokens, section, match):
+    return (0, "", tokens.full_text, False, "TITRE", "", [])
+
+
+def _match_section(tokens):
+    return _SECTION_RE.match(tokens.combined)
+
+
+def _build_section(tokens, section, match):
+    return (1, "", tokens.combined, False, "SECTION", _SECTIONS_BY_TITLE[match.group(1).lower()], [])
+
+
+def _match_total(tokens):
+    return "total" in tokens.full_lower
+
+
+def _build_total(tokens, section, match):
+    clean_desc, extra_vals = extract_trailing_numbers(tokens.full_text)
+    for keywords, level, category, subcategory in _TOTAL_RULES:
+        if any(keyword in tokens.full_lower for keyword in keywords):
+            return (level, "", clean_desc, True, category, subcategory, extra_vals)
+    return (3, "", clean_desc, True, "TOTAL", section if section else "TOTAL", extra_vals)
+
+
+def _match_code(tokens):
+    for pattern, family in _CODE_WITH_DESC:
+        match = pattern.match(tokens.combined)
+        if match:
+            return match, family
+    return None
+
+
+def _build_code(tokens, section, match):
+    code_match, family = match
+    code = code_match.group(1)
+    desc, extra_vals = extract_trailing_numbers(code_match.group(2))
+    level = 2 if code in PARENT_CODE_SET else family['child_level']
+    return (level, code, desc, False, family['category'], get_subcategory(code), extra_vals)
+
+
+def _match_code_alone(tokens):
+    return _CODE_ALONE_RE.match(tokens.first)
+
+
+def _build_code_alone(tokens, section, match):
+    family = CODE_FAMILIES[next(prefix for prefix in _CODE_PREFIXES if tokens.first.startswith(prefix))]
+    return (2, tokens.first, tokens.second, False, family['category'], "", [])
+
+
+def _match_description(tokens):
+    return bool(tokens.first) and not tokens.first.startswith(_CODE_PREFIXES)
+
+
+def _build_description(tokens, section, match):
+    desc, extra_vals = extract_trailing_numbers(tokens.combined)
+    return (2, "", desc, False, section if section else "AUTRE", "", extra_vals)
+
+
+# Ordered: the first rule that matches decides
+RULES = {
+    rule.name: rule for rule in (
+        Rule("value_only", lambda tokens: tokens.is_value_only, lambda tokens, section, match: None),
+        Rule("title", _match_title, _build_title),
+        Rule("section", _match_section, _build_section),
+        Rule("total", _match_total, _build_total),
+        Rule("code", _match_code, _build_code),
+        Rule("code_alone", _match_code_alone, _build_code_alone),
+        Rule("description", _match_description, _build_description),
+    )
+}
+_RULE_LIST = tuple(RULES.values())
+
+
+def match_rule(tokens):
+    """(rule, match) of the first matching rule, (None, None) if none does"""
+    for rule in _RULE_LIST:
+        match = rule.match(tokens)
+        if match:
+            return rule, match
+    return None, None
+
+
+def classify(tokens, current_section=None):
+    """
+    Hierarchy tuple (level, code, description, is_total, category, subcategory, extra_values)
+    of a tokenized row, None for blank / value-only / unrecognized rows
+    """
+    rule, match = match_rule(tokens)
+    if rule is None:
+        return None
+    return rule.build(tokens, current_section, match)
@@ -5,67 +5,37 @@ Handles PDF text extraction and table detection
 import re
 import unicodedata
 import PyPDF2
-import camelot
 import pytesseract
 import difflib
 from pdf2image import convert_from_path
 from PIL import Image
 
 from src.extraction.hierarchy_detector_passif import detect_hierarchy_level_passif, structure_hierarchical_data_passif
+from src.extraction.page_index import get_page_index, HIT_RULES
+from src.extraction.ocr_cache import ocr_page
+from src.extraction.table_engines import get_engine
+from src.utils.metrics import instrument, annotate
+@instrument("page_search")
 def search_table_in_pdf(pdf_path, table_type):
-
-    keywords = {
-        'passif': ["capitaux propres", "passif"],
-        'actif': ["actif","AC1 Actifs incorporels"],
-        'ann12': ["annexe 12", "engagements"],
-        'ann13': ["annexe 13", "engagements"]
-    }
-
-    target_keywords = keywords.get(table_type, keywords['passif'])
+    """
+    Locate the page holding table_type.
+    Queries the document page index, so the PDF is read only once for all table types.
+    Returns (page_num, is_scanned) or (None, None).
+    """
+    if table_type not in HIT_RULES:
+        table_type = 'passif'
+    annotate(table=table_type)
 
     try:
         print(f"\n🔍 Recherche de la table: {table_type.upper()}...")
 
-        pdf_reader = PyPDF2.PdfReader(pdf_path)
-        num_pages = len(pdf_reader.pages)
-
-        for page_num in range(num_pages):
-
-            page = pdf_reader.pages[page_num]
-            text = page.extract_text()
-
-            # Decide if page is scanned
-            if not text or len(text.strip()) < 100:
-                # Probably scanned
-                print(f"📷 Page {page_num+1} seems scanned → OCR...")
-                image = convert_from_path(
-                    pdf_path,
-                    first_page=page_num+1,
-                    last_page=page_num+1,
-                    dpi=300
-                )[0]
+        index = get_page_index(pdf_path)
+        page_num, is_scanned = index.locate(table_type)
 
-                text = pytesseract.image_to_string(
-                    image,
-                    lang='fra',
-                    config='--oem 3 --psm 6'
-                )
-
-                is_scanned = True
-            else:
-                is_scanned = False
-
-            text_lower = text.lower()
-            text_lower = re.sub(r'\s+', ' ', text_lower)
-
-            # Stronger detection rule
-            if (
-                "capitaux propres" in text_lower
-                and "passif" in text_lower
-                and "total" in text_lower
-            ):
-                print(f" {table_type.upper()} trouvé à la page {page_num + 1}")
-                return page_num + 1, is_scanned
+        if page_num is not None:
+            annotate(page=page_num, scanned=bool(is_scanned))
+            print(f" {table_type.upper()} trouvé à la page {page_num}")
+            return page_num, is_scanned
 
         print(f" {table_type.upper()} non trouvé")
         return None, None
@@ -76,10 +46,12 @@ def search_table_in_pdf(pdf_path, table_type):
 
 
 
-def extract_table_from_page(pdf_path, page_num, is_scanned, table_type):
+@instrument("table_extraction", count_result="rows")
+def extract_table_from_page(pdf_path, page_num, is_scanned, table_type, table_engine=None):
     """
     Extract raw table data from a specific page based on table_type
     Returns list of rows (each row is a list of cell values)
+    table_engine: "camelot" / "pymupdf" for native pages (default: CMF_TABLE_ENGINE)
     """
     # Define markers for each table type
     markers = {
@@ -102,6 +74,7 @@ def extract_table_from_page(pdf_path, page_num, is_scanned, table_type):
     }
     
     current_markers = markers.get(table_type, markers['passif'])
+    annotate(table=table_type, page=page_num, engine="ocr" if is_scanned else get_engine(table_engine).name)
 
     try:
         print(f"\n Extraction du tableau {table_type.upper()} page {page_num}...")
@@ -109,14 +82,10 @@ def extract_table_from_page(pdf_path, page_num, is_scanned, table_type):
 
         
         if is_scanned:
-            # OCR extraction
-            images = convert_from_path(pdf_path, first_page=page_num, 
-                                       last_page=page_num, dpi=500, fmt='jpeg')
-            if not images:
+            # OCR extraction (persistent cache: a page is only sent to Tesseract once)
+            text = ocr_page(pdf_path, page_num, 500, lang='fra', config='--oem 3 --psm 6')
+            if not text:
                 return None
-            
-            image = images[0]
-            text = pytesseract.image_to_string(image, lang='fra', config='--oem 3 --psm 6')
             text = text.replace('|', ' ')
             text = text.replace('—', '-')
 
@@ -144,17 +113,12 @@ def extract_table_from_page(pdf_path, page_num, is_scanned, table_type):
                     structured_data.append([line])
 
         else:
-            # Native extraction with Camelot
-            tables = camelot.read_pdf(pdf_path, flavor='stream', pages=str(page_num))
+            # Native extraction: Camelot stream or PyMuPDF words (CMF_TABLE_ENGINE)
+            structured_data = get_engine(table_engine).extract_rows(pdf_path, page_num)
             
-            if tables.n == 0:
+            if not structured_data:
                 print(" Aucun tableau détecté")
                 return None
-            
-            # Concatenate all tables detected on this page
-            structured_data = []
-            for i in range(tables.n):
-                structured_data.extend(tables[i].df.values.tolist())
         
         # ==========================================
         #  Filter by Boundary
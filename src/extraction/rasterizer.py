@@ -0,0 +1,160 @@
+"""
+Rasterizer Module
+Renders PDF pages once and serves them to every stage (search OCR, table OCR,
+annexes OCR) from a bounded in-memory LRU.
+A page already rendered at a higher DPI is downsampled instead of rendered again.
+PyMuPDF (fitz) renders in-process; pdf2image/pdftoppm is the fallback.
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from src.utils.metrics import register_cache
+
+try:
+    import pymupdf as fitz
+except ImportError:
+    try:
+        import fitz  # PyMuPDF < 1.24
+    except ImportError:
+        fitz = None
+        from pdf2image import convert_from_path
+
+
+# Memory budget of the image cache (grayscale pages: ~24 MB per A4 page at 500 dpi)
+MAX_CACHE_BYTES = int(os.environ.get("CMF_RASTER_CACHE_MB", "512")) * 1024 * 1024
+
+# Optional minimum render DPI: rendering every page at the highest DPI used by the
+# pipeline (500 for table OCR) lets lower-DPI stages reuse it by downsampling
+RENDER_DPI = int(os.environ.get("CMF_RASTER_DPI", "0")) or None
+
+
+class Rasterizer:
+    """Bounded LRU of rendered pages, keyed on (pdf, page) and holding the highest DPI seen"""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, render_dpi=RENDER_DPI):
+        self.max_bytes = max_bytes
+        self.render_dpi = render_dpi
+        self._images = OrderedDict()   # (path, mtime, page) -> (dpi, image)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.hits = 0
+
+    @staticmethod
+    def _doc_key(pdf_path):
+        path = os.path.abspath(pdf_path)
+        return path, os.stat(path).st_mtime_ns
+
+    def get(self, pdf_path, page_num, dpi):
+        """Image of a 1-based page at dpi, None if the PDF has no such page"""
+        return self.get_range(pdf_path, [page_num], dpi).get(page_num)
+
+    def get_range(self, pdf_path, pages, dpi):
+        """
+        Images of several pages at dpi, as {page_num: image}.
+        Missing pages are rendered together in a single backend call; pages out of
+        the document are left out of the result.
+        """
+        doc_key = self._doc_key(pdf_path)
+        result = {}
+        to_render = []
+
+        with self._lock:
+            for page_num in pages:
+                cached = self._images.get(doc_key + (page_num,))
+                if cached is not None and cached[0] >= dpi:
+                    self._images.move_to_end(doc_key + (page_num,))
+                    result[page_num] = _downsample(cached[1], cached[0], dpi)
+                    self.hits += 1
+                else:
+                    to_render.append(page_num)
+
+        if to_render:
+            render_dpi = max(dpi, self.render_dpi or 0)
+            rendered = _render(doc_key[0], to_render, render_dpi)
+            with self._lock:
+                for page_num, image in rendered.items():
+                    self._store(doc_key + (page_num,), render_dpi, image)
+                    result[page_num] = _downsample(image, render_dpi, dpi)
+                self.renders += len(rendered)
+
+        return result
+
+    def _store(self, key, dpi, image):
+        old = self._images.pop(key, None)
+        if old is not None:
+            self._bytes -= _image_bytes(old[1])
+        self._images[key] = (dpi, image)
+        self._bytes += _image_bytes(image)
+        while self._bytes > self.max_bytes and len(self._images) > 1:
+            _, (_, evicted) = self._images.popitem(last=False)
+            self._bytes -= _image_bytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+
+
+def _image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+def _downsample(image, from_dpi, to_dpi):
+    if from_dpi == to_dpi:
+        return image
+    scale = to_dpi / from_dpi
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS)
+
+
+def _render(pdf_path, pages, dpi):
+    """Render pages (1-based) in one call; grayscale is enough for OCR"""
+    if fitz is not None:
+        images = {}
+        with fitz.open(pdf_path) as doc:
+            for page_num in pages:
+                if not 1 <= page_num <= doc.page_count:
+                    logging.warning(f"Page {page_num} hors du document ({doc.page_count} pages) : {pdf_path}")
+                    continue
+                pix = doc[page_num - 1].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+                images[page_num] = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+        return images
+
+    # Fallback: a single pdftoppm call over the contiguous range
+    first, last = min(pages), max(pages)
+    logging.info(f"Rasterisation pdftoppm pages {first}-{last} @ {dpi} dpi")
+    try:
+        rendered = convert_from_path(pdf_path, first_page=max(1, first), last_page=last, dpi=dpi, grayscale=True)
+    except Exception as e:
+        logging.warning(f"Rasterisation impossible pages {first}-{last} : {e}")
+        return {}
+    first = max(1, first)
+    wanted = set(pages)
+    return {first + i: img for i, img in enumerate(rendered) if first + i in wanted}
+
+
+_DEFAULT_RASTERIZER = None
+
+
+def get_rasterizer():
+    """Process-wide rasterizer instance"""
+    global _DEFAULT_RASTERIZER
+    if _DEFAULT_RASTERIZER is None:
+        _DEFAULT_RASTERIZER = Rasterizer()
+        register_cache("raster", _DEFAULT_RASTERIZER, misses="renders")
+    return _DEFAULT_RASTERIZER
+
+
+def render_page(pdf_path, page_num, dpi):
+    """Image of a 1-based page, from the shared rasterizer"""
+    return get_rasterizer().get(pdf_path, page_num, dpi)
+
+
+def render_pages(pdf_path, pages, dpi):
+    """Images of several pages, rendered in one pass if not cached"""
+    return get_rasterizer().get_range(pdf_path, pages, dpi)
@@ -0,0 +1,177 @@
+"""
+Table Cache Module
+Persistent cache of camelot.read_pdf results, keyed on
+(sha256 of the PDF, page, flavor, read_pdf parameters, camelot version).
+Re-running an extraction after a rule change skips the Ghostscript / OpenCV
+table detection for the pages already parsed with the same parameters.
+"""
+import os
+import json
+import time
+import pickle
+import sqlite3
+import logging
+from pathlib import Path
+
+import camelot
+
+from src.utils.helpers import file_sha256
+from src.utils.metrics import register_cache
+
+
+DEFAULT_DB_PATH = Path(os.environ.get(
+    "CMF_TABLE_CACHE",
+    Path(__file__).resolve().parents[2] / "cache" / "table_cache.sqlite"
+))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CAMELOT_VERSION = getattr(camelot, "__version__", "unknown")
+
+
+class CachedTable:
+    """Detached camelot table: the DataFrame and its parsing report"""
+    __slots__ = ("df", "page", "flavor", "parsing_report")
+
+    def __init__(self, df, page, flavor, parsing_report=None):
+        self.df = df
+        self.page = page
+        self.flavor = flavor
+        self.parsing_report = parsing_report or {}
+
+    @property
+    def shape(self):
+        return self.df.shape
+
+
+class CachedTables(list):
+    """List of CachedTable with the `.n` attribute of camelot's TableList"""
+
+    @property
+    def n(self):
+        return len(self)
+
+
+def _detach(tables, page, flavor):
+    result = CachedTables()
+    for table in tables:
+        report = getattr(table, "parsing_report", None)
+        result.append(CachedTable(table.df, page, flavor, dict(report) if report else None))
+    return result
+
+
+class TableCache:
+    """SQLite store of pickled table lists with size-based LRU eviction"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = str(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS camelot_tables (
+                    pdf_sha256 TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    flavor TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    camelot_version TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (pdf_sha256, page, flavor, params, camelot_version)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_camelot_tables_last_used ON camelot_tables (last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key):
+        """Cached CachedTables for key, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload FROM camelot_tables WHERE pdf_sha256=? AND page=? AND flavor=? AND params=? AND camelot_version=?",
+                key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE camelot_tables SET last_used=? WHERE pdf_sha256=? AND page=? AND flavor=? AND params=? AND camelot_version=?",
+                (time.time(),) + tuple(key)
+            )
+        try:
+            tables = pickle.loads(row[0])
+        except Exception as e:
+            # Entry written by an incompatible pandas: treat as a miss
+            logging.warning(f"Table cache: entrée illisible ignorée ({e})")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tables
+
+    def put(self, key, tables):
+        payload = pickle.dumps(tables, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO camelot_tables VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                tuple(key) + (payload, len(payload), time.time())
+            )
+        self.evict()
+
+    def total_bytes(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM camelot_tables").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        with self._connect() as conn:
+            rows = conn.execute("SELECT rowid, size FROM camelot_tables ORDER BY last_used ASC").fetchall()
+            for rowid, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM camelot_tables WHERE rowid=?", (rowid,))
+                total -= size
+                removed += 1
+        logging.info(f"Table cache: {removed} entrée(s) évincée(s)")
+        return removed
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM camelot_tables")
+
+
+_DEFAULT_CACHE = None
+
+
+def get_table_cache():
+    """Process-wide cache instance"""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = TableCache()
+        register_cache("tables", _DEFAULT_CACHE)
+    return _DEFAULT_CACHE
+
+
+def read_tables(pdf_path, page, flavor="stream", cache=None, **kwargs):
+    """
+    camelot.read_pdf for one page (1-based), going through the persistent cache.
+    kwargs are the other read_pdf parameters (row_tol, strip_text, ...) and are part of the key.
+    Returns CachedTables (iterable, indexable, `.n`); camelot errors propagate uncached.
+    """
+    cache = cache or get_table_cache()
+    params = json.dumps(kwargs, sort_keys=True, default=repr)
+    key = (file_sha256(pdf_path), int(page), flavor, params, CAMELOT_VERSION)
+
+    tables = cache.get(key)
+    if tables is not None:
+        return tables
+
+    tables = _detach(camelot.read_pdf(pdf_path, flavor=flavor, pages=str(page), **kwargs), int(page), flavor)
+    cache.put(key, tables)
+    return tables
@@ -0,0 +1,161 @@
+"""
+Table Engines Module
+Pluggable table extraction for native PDF pages. Every engine returns the row list
+used by extract_table_from_page: [[cell, cell, ...], ...] (strings, one list per line).
+- "camelot": Camelot stream (through the persistent table cache)
+- "pymupdf": words of page.get_text("words") grouped into lines and columns by geometry,
+             no Ghostscript / OpenCV
+The default engine is chosen with CMF_TABLE_ENGINE (camelot if unset).
+"""
+import os
+import statistics
+
+try:
+    import pymupdf as fitz
+except ImportError:
+    import fitz
+
+from src.extraction.table_cache import read_tables
+
+
+DEFAULT_ENGINE = os.environ.get("CMF_TABLE_ENGINE", "camelot")
+
+
+class TableEngine:
+    """Interface: extract_rows(pdf_path, page_num) -> list of rows, [] if no table"""
+    name = None
+
+    def extract_rows(self, pdf_path, page_num):
+        raise NotImplementedError
+
+
+class CamelotStreamEngine(TableEngine):
+    name = "camelot"
+
+    def __init__(self, **read_kwargs):
+        self.read_kwargs = read_kwargs
+
+    def extract_rows(self, pdf_path, page_num):
+        tables = read_tables(pdf_path, page_num, flavor="stream", **self.read_kwargs)
+        rows = []
+        # All tables detected on the page, concatenated
+        for table in tables:
+            rows.extend(table.df.values.tolist())
+        return rows
+
+
+class PyMuPDFWordsEngine(TableEngine):
+    """
+    Geometry-only engine:
+    1. words whose vertical centres are within line_tol (x median word height) form a line
+    2. inside a line, words closer than cell_gap (x median height) form a cell
+    3. cell spans of multi-cell lines are merged into column bands; every cell goes to
+       the band it overlaps most (nearest band otherwise)
+    """
+    name = "pymupdf"
+
+    def __init__(self, line_tol=0.5, cell_gap=0.4, min_cell_gap=3.0):
+        self.line_tol = line_tol
+        self.cell_gap = cell_gap
+        self.min_cell_gap = min_cell_gap
+
+    def extract_rows(self, pdf_path, page_num):
+        with fitz.open(pdf_path) as doc:
+            words = doc[page_num - 1].get_text("words")
+        return self.rows_from_words(words)
+
+    def rows_from_words(self, words):
+        words = [w for w in words if w[4].strip()]
+        if not words:
+            return []
+        height = statistics.median(w[3] - w[1] for w in words) or 1.0
+        lines = self._group_lines(words, height * self.line_tol)
+        gap = max(self.min_cell_gap, height * self.cell_gap)
+        cells_by_line = [self._group_cells(line, gap) for line in lines]
+
+        bands = self._column_bands(cells_by_line)
+        if not bands:
+            return []
+
+        rows = []
+        for cells in cells_by_line:
+            row = [""] * len(bands)
+            for x0, x1, text in cells:
+                idx = self._band_for(bands, x0, x1)
+                row[idx] = f"{row[idx]} {text}".strip()
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def _group_lines(words, tol):
+        words = sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0]))
+        lines, current, current_y = [], [], None
+        for w in words:
+            y = (w[1] + w[3]) / 2
+            if current and abs(y - current_y) > tol:
+                lines.append(current)
+                current = []
+            if not current:
+                current_y = y
+            current.append(w)
+        if current:
+            lines.append(current)
+        return [sorted(line, key=lambda w: w[0]) for line in lines]
+
+    @staticmethod
+    def _group_cells(line, gap):
+        cells = []
+        x0, x1, parts = line[0][0], line[0][2], [line[0][4]]
+        for w in line[1:]:
+            if w[0] - x1 <= gap:
+                parts.append(w[4])
+                x1 = max(x1, w[2])
+            else:
+                cells.append((x0, x1, " ".join(parts)))
+                x0, x1, parts = w[0], w[2], [w[4]]
+        cells.append((x0, x1, " ".join(parts)))
+        return cells
+
+    @staticmethod
+    def _column_bands(cells_by_line):
+        # Only multi-cell lines define columns: titles spanning the page would merge them all
+        spans = sorted((x0, x1) for cells in cells_by_line if len(cells) >= 2 for x0, x1, _ in cells)
+        if not spans:
+            spans = sorted((x0, x1) for cells in cells_by_line for x0, x1, _ in cells)
+        bands = []
+        for x0, x1 in spans:
+            if bands and x0 <= bands[-1][1]:
+                bands[-1][1] = max(bands[-1][1], x1)
+            else:
+                bands.append([x0, x1])
+        return bands
+
+    @staticmethod
+    def _band_for(bands, x0, x1):
+        best, best_overlap = None, 0.0
+        for idx, (b0, b1) in enumerate(bands):
+            overlap = min(x1, b1) - max(x0, b0)
+            if overlap > best_overlap:
+                best, best_overlap = idx, overlap
+        if best is not None:
+            return best
+        centre = (x0 + x1) / 2
+        return min(range(len(bands)), key=lambda i: abs((bands[i][0] + bands[i][1]) / 2 - centre))
+
+
+ENGINES = {
+    "camelot": CamelotStreamEngine,
+    "pymupdf": PyMuPDFWordsEngine,
+}
+
+_INSTANCES = {}
+
+
+def get_engine(name=None):
+    """Shared engine instance by name (CMF_TABLE_ENGINE by default)"""
+    name = (name or DEFAULT_ENGINE).lower()
+    if name not in ENGINES:
+        raise ValueError(f"Moteur de tableaux inconnu : {name} (attendu : {', '.join(ENGINES)})")
+    if name not in _INSTANCES:
+        _INSTANCES[name] = ENGINES[name]()
+    return _INSTANCES[name]
@@ -0,0 +1,181 @@
+"""
+Technical Checks Module
+C1–C9 controls of the technical result statement (B.validate_excel), evaluated by the
+identity engine (src.utils.identities, statement "resultat_technique" of
+config/identities.json).
+
+- C1 is a column identity (TOTAL = Σ branches), kept on the rows listed in its "rows"
+- C2–C9 are row identities, each row being the first category containing the selector
+  text (case-insensitive regex, as in B); a rule with an absent or empty row is not
+  evaluated on that branch
+
+The engine gives every C2–C9 residual out of one product A @ X and C1 out of X @ w;
+the tolerance masks and the suspect cells (amount > 30% of the residual) are derived
+from the residual matrices, without any per-row or per-column loop.
+
+    checks = run_checks(df, numeric_cols, total_col)
+    checks.rule_values("C2")       # residual per branch, NaN where an amount is missing
+    checks.invalid_columns("C2")   # Excel columns of C2 above the tolerance
+    checks.c1_suspects()           # [(excel_row, excel_col), ...]
+"""
+import numpy as np
+import pandas as pd
+
+from src.utils.identities import Selector, Statement, get_identities
+
+
+IDENTITY_SET = "resultat_technique"
+# A cell is suspect when its amount exceeds this share of the residual it explains
+CONTRIBUTION_THRESHOLD = 0.3
+
+
+class RowRule:
+    """
+    Row identity Σ coef * row = 0 over the branches, built from a config identity.
+    terms: ((row name, coefficient), ...), target first with +1;
+    comment_rows: categories whose red cells get this rule's comment (default: the terms)
+    """
+    __slots__ = ("name", "label", "terms", "comment_rows")
+
+    def __init__(self, name, label, terms, comment_rows=None):
+        self.name = name
+        self.label = label
+        self.terms = tuple(terms.items())
+        self.comment_rows = tuple(comment_rows) if comment_rows else tuple(terms)
+
+    @classmethod
+    def from_identity(cls, identity):
+        terms = {identity.target.value: 1}
+        for selector, coef in identity.terms:
+            terms[selector.value] = terms.get(selector.value, 0) - coef
+        return cls(identity.name, identity.meta.get("label", identity.name), terms,
+                   identity.meta.get("comment_rows"))
+
+    @property
+    def rows(self):
+        return tuple(row for row, _ in self.terms)
+
+    @property
+    def comment(self):
+        return f"Erreur {self.name}: Incohérence dans {self.label.split(': ', 1)[1]}"
+
+
+_IDENTITIES = get_identities(IDENTITY_SET)
+TOLERANCE = _IDENTITIES.tolerance
+# Rows checked by C1 (exact category names)
+TARGET_ROWS = _IDENTITIES["C1"].meta["rows"]
+RULES = tuple(RowRule.from_identity(identity) for identity in _IDENTITIES
+              if identity.axis == "rows")
+RULE_LABELS = [rule.label for rule in RULES]
+
+
+def _first_true(mask, axis):
+    """(any, index of the first True) along axis"""
+    return mask.any(axis=axis), mask.argmax(axis=axis)
+
+
+class TechnicalChecks:
+    """Residual matrices of C1–C9 over a statement and the cells they point at"""
+
+    def __init__(self, labels, columns, excel_columns, amounts, c1, residuals, available, missing,
+                 rules=RULES, tolerance=TOLERANCE):
+        self.labels = labels                  # category of each row (object array)
+        self.columns = columns                # branch columns (TOTAL excluded)
+        self.excel_columns = excel_columns    # their 1-based Excel column
+        self.amounts = amounts                # (rows x branches) float64, NaN = empty
+        self.c1 = c1                          # (rows,) TOTAL - Σ branches, NaN outside the C1 rows
+        self.residuals = residuals            # (rules x branches), NaN = missing amount / rule
+        self.available = available
+        self.missing = missing
+        self.rules = rules
+        self.tolerance = tolerance
+        self._index = {rule.name: k for k, rule in enumerate(rules)}
+        with np.errstate(invalid="ignore"):
+            self.c1_invalid = np.abs(c1) > tolerance
+            self.invalid = np.abs(residuals) > tolerance
+
+    def rule_values(self, name):
+        return self.residuals[self._index[name]]
+
+    def invalid_columns(self, name):
+        """Excel columns where the rule is off by more than the tolerance"""
+        return self.excel_columns[self.invalid[self._index[name]]].tolist()
+
+    def c1_suspects(self, written=None):
+        """
+        One cell per C1-invalid row: the last branch whose amount is more than 30% of the
+        row's branch sum. written: C1 as stored in the sheet (truncated), default int(c1).
+        Returns [(excel_row, excel_col), ...]
+        """
+        c1 = np.trunc(self.c1) if written is None else written
+        with np.errstate(invalid="ignore"):
+            rows = np.flatnonzero(np.abs(c1) > self.tolerance)
+        if not len(rows):
+            return []
+        amounts = self.amounts[rows]
+        sums = np.abs(np.nansum(amounts, axis=1))[:, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(sums != 0, np.abs(amounts) / sums, 0.0)
+            eligible = ~np.isnan(amounts) & (amounts != 0) & (share > CONTRIBUTION_THRESHOLD)
+        found, last = _first_true(eligible[:, ::-1], axis=1)
+        last = amounts.shape[1] - 1 - last
+        return [(int(row) + 2, int(self.excel_columns[col])) for row, col in zip(rows[found], last[found])]
+
+    def rule_suspects(self, gate):
+        """
+        For each invalid (rule, branch) whose rule passes gate[k]: the first row of the rule
+        (sheet order) whose amount is more than 30% of the truncated residual.
+        Returns [(rule name, excel_row, excel_col), ...]
+        """
+        gated = np.asarray(gate, dtype=bool) & self.available
+        residual = np.trunc(self.residuals)
+        with np.errstate(invalid="ignore"):
+            active = self.invalid & gated[:, None] & (np.abs(residual) > self.tolerance)
+        if not active.any():
+            return []
+        categories = pd.Series(self.labels, dtype=object)
+        members = np.array([categories.isin(rule.rows).to_numpy() for rule in self.rules])  # (rules x rows)
+        valid = ~np.isnan(self.amounts) & (self.amounts != 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.abs(self.amounts)[None, :, :] / np.abs(residual)[:, None, :]
+        eligible = members[:, :, None] & valid[None] & (share > CONTRIBUTION_THRESHOLD) & active[:, None, :]
+        found, first = _first_true(eligible, axis=1)  # (rules x branches)
+        return [(self.rules[k].name, int(first[k, j]) + 2, int(self.excel_columns[j]))
+                for k, j in zip(*np.nonzero(found))]
+
+    def comment_for(self, category, excel_col):
+        """Comment of the first rule whose comment rows hold category and invalid at excel_col"""
+        for k, rule in enumerate(self.rules):
+            if category in rule.comment_rows and excel_col in self.excel_columns[self.invalid[k]]:
+                return rule.comment
+        return None
+
+
+def run_checks(df, numeric_cols, total_col, identities=None, tolerance=None):
+    """
+    C1–C9 of a normalized statement: df has the categories in its first column
+    ('CATEGORIES'), numeric_cols the branches and total_col the TOTAL column
+    """
+    identities = identities or _IDENTITIES
+    rules = tuple(RowRule.from_identity(identity) for identity in identities if identity.axis == "rows")
+    labels = df.iloc[:, 0].to_numpy(dtype=object)
+    amounts = df[list(numeric_cols)].to_numpy(dtype=np.float64, na_value=np.nan)
+    total = df[total_col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # TOTAL is renamed for the C1 selector; row identities also give a (dropped) TOTAL residual
+    statement = Statement(labels, df['CATEGORIES'].tolist(), [*numeric_cols, "TOTAL"],
+                          np.column_stack([amounts, total]))
+    report = identities.evaluate(statement, tolerance)
+    tolerance = tolerance if tolerance is not None else identities.tolerance
+
+    c1 = report["C1"].residuals
+    c1 = np.where(df.iloc[:, 0].isin(identities["C1"].meta.get("rows", labels)).to_numpy(), c1, np.nan)
+
+    residuals = np.array([report[rule.name].residuals[:-1] for rule in rules]).reshape(len(rules), -1)
+    available = np.array([not report[rule.name].absent for rule in rules], dtype=bool)
+    missing = {rule.name: [Selector(text).value for text in report[rule.name].absent]
+               for rule in rules if report[rule.name].absent}
+
+    excel_columns = np.array([df.columns.get_loc(col) + 1 for col in numeric_cols], dtype=int)
+    return TechnicalChecks(labels, list(numeric_cols), excel_columns, amounts, c1, residuals,
+                           available, missing, rules, tolerance)
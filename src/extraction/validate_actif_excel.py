@@ -1,9 +1,14 @@
+import numpy as np
 import pandas as pd
 import re
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill
 import os
 
+from src.utils.identities import get_identities
+from src.utils.metrics import instrument
+from src.utils.numbers import parse_number, to_numeric_series
+
 
 TOLERANCE = 5
 
@@ -16,21 +21,8 @@ def clean_number(x):
     Convertit en float.
     Valeur vide ou invalide → 0.0
     """
-    if pd.isna(x):
-        return 0.0
-
-    if isinstance(x, (int, float)):
-        return float(x)
-
-    s = str(x).replace("\u00a0", "").replace(" ", "").replace(",", ".").strip()
-
-    if s == "":
-        return 0.0
-
-    try:
-        return float(s)
-    except:
-        return 0.0
+    value = parse_number(x)
+    return 0.0 if value is None else value
 
 
 # ==========================
@@ -92,6 +84,7 @@ def merge_duplicate_ac_rows(df):
 # ==========================
 # Validation principale
 # ==========================
+@instrument("validation", table="actif")
 def validate_actif_from_data(data_actifs, assurance_name, annee, output_xlsx):
 
     df = pd.DataFrame(data_actifs)
@@ -107,8 +100,7 @@ def validate_actif_from_data(data_actifs, assurance_name, annee, output_xlsx):
     numeric_cols = ["BRUT", "AMORT_PROV", "NET_N", "NET_N1"]
 
     for col in numeric_cols:
-        df[col] = df[col].apply(clean_number)
-        df[col] = df[col].fillna(0.0).astype(float)
+        df[col] = to_numeric_series(df[col], default=0.0)
 
     df = df.dropna(subset=["DESIGNATION"])
 
@@ -126,12 +118,13 @@ def validate_actif_from_data(data_actifs, assurance_name, annee, output_xlsx):
     # ==========================
     # Validation calcul
     # ==========================
+    # NET_N = BRUT - AMORT_PROV ("actif" dans config/identities.json)
+    net = get_identities("actif").evaluate_frame(
+        df, ["BRUT", "AMORT_PROV", "NET_N"], key="DESIGNATION", tolerance=TOLERANCE)["net"]
     df["CALC_NET"] = (df["BRUT"] - df["AMORT_PROV"]).round(2)
-    df["DIFF"] = (df["NET_N"] - df["CALC_NET"]).round(2)
+    df["DIFF"] = pd.Series(net.residuals, index=df.index).round(2)
 
-    df["STATUS"] = df["DIFF"].apply(
-        lambda x: "OK" if abs(x) <= TOLERANCE else "NOT_OK"
-    )
+    df["STATUS"] = np.where(net.failed, "NOT_OK", "OK")
 
     # ==========================
     # Export Excel
@@ -3,9 +3,73 @@ import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, numbers
 from src.extraction.validator_passifs import ValidatorPassifs
+from src.extraction.excel_exporter import passif_headers, passif_excel_rows
+from src.extraction.excel_streaming import StreamingWorkbook, estimate_widths
+from src.utils.metrics import instrument
+
+
+def _numeric_or_none(value):
+    # Same result as pd.to_numeric(errors='coerce') followed by an empty cell for NaN
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value if value == value else None
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def write_validated_passif(hierarchical_data, company_name, output_path, year_n, year_n_1):
+    """
+    Single pass version of validate_capitaux_propres_passif: rows are filtered,
+    validated and streamed with their styles, without writing / re-reading the workbook.
+    """
+    headers = passif_headers(year_n, year_n_1) + ['Assurance']
+    year_cols = headers[4:6]
+    validator = ValidatorPassifs()
+
+    rows = []
+    for values, _ in passif_excel_rows(hierarchical_data):
+        record = {h: (None if v == '' else v) for h, v in zip(headers, values)}
+        for col in year_cols:
+            record[col] = _numeric_or_none(record[col])
+        if (not record['Code'] or not str(record['Code']).strip()) \
+                and (not record['Sous-catégorie'] or not str(record['Sous-catégorie']).strip()) \
+                and all(not record[col] for col in year_cols):
+            continue
+        record['ValidationResult'] = 'PASS' if validator.validate(record) else 'FAIL'
+        record['Assurance'] = company_name
+        rows.append([record[h] for h in headers])
+
+    wb = StreamingWorkbook()
+    ws = wb.add_sheet("Sheet1", widths=estimate_widths([headers] + rows, len(headers)), freeze="A2")
+    wb.append(ws, headers, 'val_header')
+    for row in rows:
+        styles = ['val_cell'] * len(headers)
+        for idx in (4, 5):
+            styles[idx] = 'val_number' if isinstance(row[idx], (int, float)) else 'val_year'
+        styles[6] = 'val_pass' if row[6] == 'PASS' else 'val_fail'
+        wb.append(ws, row, styles)
+    wb.save(output_path)
+    print(f'Validation complete. Output saved to: {output_path}')
+    return output_path
+
 
+@instrument("validation", table="passif")
+def validate_capitaux_propres_passif(excel_path: str, company_name: str, hierarchical_data=None,
+                                     year_n=None, year_n_1=None):
+    """
+    Validate the passif workbook and write "<name>_validated.xlsx".
+    With hierarchical_data (and year_n), the output is produced in one streaming pass
+    instead of the write / load_workbook / restyle / save cycle.
+    """
+    if hierarchical_data is not None and year_n is not None:
+        output_path = excel_path.replace('.xlsx', '_validated.xlsx')
+        year_n_1 = year_n_1 if year_n_1 is not None else int(year_n) - 1
+        return write_validated_passif(hierarchical_data, company_name, output_path, year_n, year_n_1)
 
-def validate_capitaux_propres_passif(excel_path: str, company_name: str):
     EXCEL_PATH = excel_path
     COMPANY_NAME = company_name
 
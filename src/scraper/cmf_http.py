@@ -0,0 +1,263 @@
+"""
+CMF HTTP Client Module
+Document discovery without a browser: the CMF listing is a Drupal Views exposed
+form submitted with GET, so the company list and the document rows can be read
+with plain HTTP requests and an HTML parser.
+"""
+import logging
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse, parse_qs
+
+import requests
+
+
+CMF_URL = "https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape"
+COMPANY_SELECT_ID = "edit-field-societesape-value"
+REQUEST_TIMEOUT = 20
+MAX_PAGES = 50
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept-Language": "fr-FR,fr;q=0.9",
+}
+
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+              "param", "source", "track", "wbr"}
+
+
+class Node:
+    """Minimal DOM node (stdlib html.parser, no bs4/lxml dependency)"""
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children = []
+        self.parent = parent
+
+    @property
+    def classes(self):
+        return (self.attrs.get("class") or "").split()
+
+    def iter(self):
+        """All descendant element nodes, depth first"""
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.iter()
+
+    def find_all(self, tag=None, cls=None, **attrs):
+        result = []
+        for node in self.iter():
+            if tag and node.tag != tag:
+                continue
+            if cls and cls not in node.classes:
+                continue
+            if any(node.attrs.get(k) != v for k, v in attrs.items()):
+                continue
+            result.append(node)
+        return result
+
+    def find(self, tag=None, cls=None, **attrs):
+        found = self.find_all(tag, cls, **attrs)
+        return found[0] if found else None
+
+    def text(self):
+        parts = []
+        for child in self.children:
+            parts.append(child.text() if isinstance(child, Node) else child)
+        return " ".join(" ".join(parts).split())
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("document")
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {k: (v or "") for k, v in attrs}, self.current)
+        self.current.children.append(node)
+        if tag not in _VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(Node(tag, {k: (v or "") for k, v in attrs}, self.current))
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open tag; ignore stray end tags
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        if data.strip():
+            self.current.children.append(data)
+
+
+def parse_html(html):
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def new_session():
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    return session
+
+
+def _get(session, url, params=None):
+    response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        response.encoding = "utf-8"
+    return parse_html(response.text), response.url
+
+
+def _company_select(root):
+    select = root.find("select", id=COMPANY_SELECT_ID)
+    if select is None:
+        for candidate in root.find_all("select"):
+            if "societesape" in candidate.attrs.get("name", ""):
+                return candidate
+    return select
+
+
+def _company_options(select):
+    """[(value, label)] of the dropdown, without the '- Any -' entry"""
+    options = []
+    for option in select.find_all("option"):
+        label = option.text()
+        value = option.attrs.get("value", label)
+        if not label or value in ("", "All"):
+            continue
+        options.append((value, label))
+    return options
+
+
+def _form_params(root, select):
+    """Default GET parameters of the exposed form holding the company select"""
+    form = select.parent
+    while form is not None and form.tag != "form":
+        form = form.parent
+    if form is None:
+        return None, {}
+
+    params = {}
+    for field in form.find_all("input"):
+        name = field.attrs.get("name")
+        if name and field.attrs.get("type", "text") not in ("submit", "button", "image", "reset"):
+            params[name] = field.attrs.get("value", "")
+    for other in form.find_all("select"):
+        name = other.attrs.get("name")
+        selected = other.find("option", selected="selected") or other.find("option")
+        if name and selected is not None:
+            params[name] = selected.attrs.get("value", "")
+    return form.attrs.get("action") or None, params
+
+
+def fetch_companies(session=None, base_url=CMF_URL):
+    """Company names of the CMF dropdown"""
+    session = session or new_session()
+    root, _ = _get(session, base_url)
+    select = _company_select(root)
+    if select is None:
+        raise ValueError("Liste des sociétés introuvable dans la page CMF")
+    return [label for _, label in _company_options(select)]
+
+
+def match_company(labels, company_name):
+    """
+    Dropdown label for company_name: exact (case-insensitive) match first, then partial
+    match. Shared by the HTTP client and the Selenium flow so both resolve the same company.
+    """
+    wanted = company_name.strip().lower()
+    for label in labels:
+        if label.strip().lower() == wanted:
+            return label
+    for label in labels:
+        if wanted in label.lower():
+            return label
+    return None
+
+
+def _match_company(options, company_name):
+    """(value, label) of the option matched by match_company, (None, None) if none"""
+    label = match_company([label for _, label in options], company_name)
+    if label is None:
+        return None, None
+    return next((value, option_label) for value, option_label in options if option_label == label)
+
+
+def parse_document_rows(root, base_url):
+    """[(pdf_url, pdf_name)] of the .view-content .views-row entries"""
+    rows = []
+    for content in root.find_all(cls="view-content"):
+        for row in content.find_all(cls="views-row"):
+            link = next((a for a in row.find_all("a") if a.attrs.get("href", "").lower().endswith(".pdf")), None)
+            period = row.find(cls="field-name-field-p-riode")
+            item = period.find(cls="field-item") if period is not None else None
+            if link is None or item is None:
+                continue
+            rows.append((urljoin(base_url, link.attrs["href"]), item.text()))
+    return rows
+
+
+def _next_page_url(root, base_url):
+    for pager in root.find_all(cls="pager"):
+        for cls in ("pager-next", "next"):
+            item = pager.find(cls=cls)
+            if item is None:
+                continue
+            link = item if item.tag == "a" else item.find("a")
+            if link is not None and link.attrs.get("href") and "disabled" not in link.classes:
+                return urljoin(base_url, link.attrs["href"])
+    return None
+
+
+def iter_document_pages(company_name, session=None, base_url=CMF_URL):
+    """
+    Submit the exposed filter for company_name and walk the pager lazily.
+    Yields (company_label, [(pdf_url, pdf_name)]) per listing page; nothing if the company is unknown.
+    The caller can stop early (e.g. once it reaches known documents).
+    """
+    session = session or new_session()
+    root, page_url = _get(session, base_url)
+    select = _company_select(root)
+    if select is None:
+        raise ValueError("Liste des sociétés introuvable dans la page CMF")
+
+    value, label = _match_company(_company_options(select), company_name)
+    if value is None:
+        return
+
+    action, params = _form_params(root, select)
+    params[select.attrs.get("name", "field_societesape_value")] = value
+    url = urljoin(page_url, action) if action else page_url
+
+    seen_pages = set()
+    root, page_url = _get(session, url, params)
+    for _ in range(MAX_PAGES):
+        yield label, parse_document_rows(root, page_url)
+        next_url = _next_page_url(root, page_url)
+        if not next_url or next_url in seen_pages:
+            break
+        seen_pages.add(next_url)
+        page = parse_qs(urlparse(next_url).query).get("page", ["?"])[0]
+        logging.info(f"CMF HTTP: page {page} pour {label}")
+        root, page_url = _get(session, next_url)
+
+
+def fetch_document_rows(company_name, session=None, base_url=CMF_URL):
+    """
+    All listing rows of company_name.
+    Returns (company_label, [(pdf_url, pdf_name)]), or (None, []) if the company is unknown.
+    """
+    label, rows = None, []
+    for label, page_rows in iter_document_pages(company_name, session, base_url):
+        rows.extend(page_rows)
+    return label, rows
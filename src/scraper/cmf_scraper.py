@@ -3,29 +3,23 @@ CMF Website Scraper Module
 Handles interaction with the CMF website for company and document retrieval
 """
 import time
-from selenium import webdriver
+import logging
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
-import os
 import re
 
 from src.utils.helpers import extract_year_from_text
+from src.scraper import cmf_http
+from src.scraper.driver_pool import build_driver, get_driver_pool
+from src.database.document_catalog import DocumentCatalog
+from src.utils.metrics import instrument, annotate, count
 
 
 def init_driver():
-    """Initialize Chrome WebDriver with headless options"""
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    service = Service(ChromeDriverManager().install(), log_path=os.devnull)
-    return webdriver.Chrome(service=service, options=chrome_options)
+    """Initialize Chrome WebDriver with headless options (cached chromedriver path)"""
+    return build_driver()
 
 def extract_year_from_text(text):
     if not text:
@@ -46,10 +40,24 @@ def extract_year_from_text(text):
             return str(1900 + year_2d)  # fallback if somehow >25
     
     return None
-def get_all_companies(driver):
+def _make_document(pdf_url, pdf_name, company_name):
+    """Document dict of a listing row, or None when no year can be read"""
+    year = extract_year_from_text(pdf_url) or extract_year_from_text(pdf_name)
+    if year and year.isdigit():
+        return {
+            "url": pdf_url,
+            "nom": pdf_name,
+            "annee": year,
+            "societe": company_name
+        }
+    logging.debug(f"Document ignoré '{pdf_name}' (URL : {pdf_url}) - année lue : {year}")
+    return None
+
+
+def get_all_companies(driver, base_url=cmf_http.CMF_URL):
     """Fetch all companies from the CMF dropdown"""
     print("⏳ Chargement de la liste des sociétés...")
-    driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
+    driver.get(base_url)
     wait = WebDriverWait(driver, 20)
     
     try:
@@ -66,14 +74,14 @@ def get_all_companies(driver):
         return []
 
 
-def select_company_and_submit(driver, company_name):
+def select_company_and_submit(driver, company_name, base_url=cmf_http.CMF_URL):
     """Select company in dropdown and submit the form"""
     print(f"\n🔄 Sélection de '{company_name}' sur le site CMF...")
     try:
         wait = WebDriverWait(driver, 20)
         
         # Refresh the page to avoid stale elements
-        driver.get("https://www.cmf.tn/consultation-des-tats-financier-des-soci-t-s-faisant-ape")
+        driver.get(base_url)
         time.sleep(2)
         
         # Click dropdown
@@ -138,17 +146,9 @@ def scrape_document_list(driver, company_name):
                     pdf_name = row.find_element(
                         By.CSS_SELECTOR, ".field-name-field-p-riode .field-item").text.strip()
                     
-                    year = extract_year_from_text(pdf_url) or extract_year_from_text(pdf_name)
-                    
-                    if year and year.isdigit():
-                        pdfs.append({
-                            "url": pdf_url,
-                            "nom": pdf_name,
-                            "annee": year,
-                            "societe": company_name
-                        })
-                    else:
-                        print(f"DEBUG: Skipped document '{pdf_name}' (URL: {pdf_url}) - Year extracted: {year}")
+                    document = _make_document(pdf_url, pdf_name, company_name)
+                    if document:
+                        pdfs.append(document)
                 except (NoSuchElementException, StaleElementReferenceException):
                     continue
             
@@ -167,3 +167,126 @@ def scrape_document_list(driver, company_name):
     except Exception as e:
         print(f"❌ ERREUR : {str(e)}")
         return []
+
+
+# ==========================================
+# HTTP fast path (Selenium as fallback)
+# ==========================================
+
+def get_all_companies_fast(session=None, base_url=cmf_http.CMF_URL):
+    """Company list over plain HTTP; falls back to headless Chrome"""
+    try:
+        companies = cmf_http.fetch_companies(session, base_url)
+        if companies:
+            return companies
+        print("⚠️ Liste HTTP vide, bascule sur Selenium...")
+    except Exception as e:
+        print(f"⚠️ Mode HTTP indisponible ({e}), bascule sur Selenium...")
+
+    with get_driver_pool().driver() as driver:
+        return get_all_companies(driver, base_url)
+
+
+@instrument("scrape")
+def find_company_documents(company_name, session=None, driver=None, base_url=cmf_http.CMF_URL):
+    """
+    Resolve company_name against the CMF dropdown and list its documents.
+    Uses the HTTP client first; Selenium (driver, or one from the pool) if it fails or
+    finds the company without any listing row (markup change).
+    Returns (target_societe, documents) or (None, []) if the company is unknown.
+    """
+    try:
+        target_societe, rows = cmf_http.fetch_document_rows(company_name, session, base_url)
+        if target_societe is None:
+            print(f"❌ Société non trouvée : {company_name}")
+            return None, []
+        if rows:
+            documents = [d for d in (_make_document(url, name, target_societe) for url, name in rows) if d]
+            print(f"✅ {len(documents)} documents trouvés au total (HTTP).")
+            annotate(mode="http")
+            count("documents", len(documents))
+            return target_societe, documents
+        print(f"⚠️ Aucune ligne .views-row en HTTP pour {target_societe}, bascule sur Selenium...")
+    except Exception as e:
+        print(f"⚠️ Mode HTTP indisponible ({e}), bascule sur Selenium...")
+
+    pooled = driver is None
+    if pooled:
+        driver = get_driver_pool().acquire()
+    try:
+        # Same resolution as the HTTP path (exact, then partial): both pick the same company
+        target_societe = cmf_http.match_company(get_all_companies(driver, base_url), company_name)
+        if target_societe is None:
+            print(f"❌ Société non trouvée : {company_name}")
+            return None, []
+        if not select_company_and_submit(driver, target_societe, base_url):
+            return target_societe, []
+        documents = scrape_document_list(driver, target_societe)
+        annotate(mode="selenium")
+        count("documents", len(documents))
+        return target_societe, documents
+    finally:
+        if pooled:
+            get_driver_pool().release(driver)
+
+
+# ==========================================
+# Incremental sync against the local catalog
+# ==========================================
+
+def _head_validators(session, url):
+    """(ETag, Last-Modified) of a PDF, without downloading it"""
+    try:
+        response = session.head(url, allow_redirects=True, timeout=cmf_http.REQUEST_TIMEOUT)
+        return response.headers.get("ETag"), response.headers.get("Last-Modified")
+    except Exception as e:
+        print(f"⚠️ HEAD impossible pour {url} : {e}")
+        return None, None
+
+
+def sync_company_documents(company_name, catalog=None, session=None, full=False, fetch_validators=True,
+                           base_url=cmf_http.CMF_URL):
+    """
+    Delta discovery for one company.
+    Walks the listing page by page (newest first) and stops after the first page
+    holding a document already in the catalog, unless full=True.
+    Returns (target_societe, new_documents); new documents are added to the catalog.
+    """
+    catalog = catalog or DocumentCatalog()
+    session = session or cmf_http.new_session()
+    target_societe = None
+    new_documents = []
+
+    for target_societe, rows in cmf_http.iter_document_pages(company_name, session, base_url):
+        reached_known = False
+        for url, name in rows:
+            if catalog.is_known(url):
+                reached_known = True
+                catalog.add({"url": url})
+                continue
+            document = _make_document(url, name, target_societe)
+            if not document:
+                continue
+            etag, last_modified = _head_validators(session, url) if fetch_validators else (None, None)
+            if catalog.add(document, etag, last_modified):
+                new_documents.append(document)
+        if reached_known and not full:
+            break
+
+    if target_societe is None:
+        print(f"❌ Société non trouvée : {company_name}")
+    else:
+        print(f"✅ {len(new_documents)} nouveau(x) document(s) pour {target_societe}")
+    return target_societe, new_documents
+
+
+def check_document_updates(catalog, documents, session=None):
+    """Known documents whose ETag / Last-Modified changed since the last sync (re-published files)"""
+    session = session or cmf_http.new_session()
+    changed = []
+    for document in documents:
+        etag, last_modified = _head_validators(session, document["url"])
+        if catalog.update_validators(document["url"], etag, last_modified):
+            changed.append(document)
+    return changed
+
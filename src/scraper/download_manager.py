@@ -0,0 +1,240 @@
+"""
+Download Manager Module
+Concurrent, resumable PDF downloads:
+- one pooled requests.Session shared by a bounded thread pool
+- chunked writes to "<file>.part", atomic rename once complete
+- HTTP Range resume of an interrupted .part, retry with exponential backoff
+- SHA-256 recorded next to each file ("<file>.sha256", sha256sum format)
+- every completed file is checked to be a whole PDF before it replaces dest_path
+"""
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+CHUNK_SIZE = 256 * 1024
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 90
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 1.0
+DEFAULT_WORKERS = 4
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)", re.IGNORECASE)
+
+
+class DownloadError(Exception):
+    """Download failed and should not be retried"""
+
+
+def _sha256_file(path, h=None):
+    h = h or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h
+
+
+def checksum_path(path):
+    return path + ".sha256"
+
+
+def read_checksum(path):
+    """Recorded SHA-256 of a downloaded file, or None"""
+    try:
+        with open(checksum_path(path), encoding="utf-8") as f:
+            return f.read().split()[0]
+    except (OSError, IndexError):
+        return None
+
+
+def _write_checksum(path, digest):
+    with open(checksum_path(path), "w", encoding="utf-8") as f:
+        f.write(f"{digest}  {os.path.basename(path)}\n")
+
+
+def parse_content_range(value):
+    """(start, end, total or None) of a Content-Range header, None if it cannot be read"""
+    m = _CONTENT_RANGE.match((value or "").strip())
+    if not m:
+        return None
+    total = m.group(3)
+    return int(m.group(1)), int(m.group(2)), None if total == "*" else int(total)
+
+
+def is_pdf(path):
+    """Header %PDF-: rejects HTML error pages served with a 200"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(5) == b"%PDF-"
+    except OSError:
+        return False
+
+
+def is_complete_pdf(path):
+    """Header %PDF and %%EOF in the tail: rejects truncated files from older runs"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            if f.read(5) != b"%PDF-":
+                return False
+            f.seek(max(0, size - 2048))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+class DownloadManager:
+    """Thread-safe downloader over a pooled session"""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, retries=MAX_RETRIES, backoff=BACKOFF_SECONDS,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), session=None):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    def download(self, url, dest_path):
+        """
+        Download url to dest_path; returns dest_path or None.
+        An existing complete file is reused (its checksum is recorded if missing).
+        """
+        with self._lock_for(dest_path):
+            if os.path.exists(dest_path):
+                if read_checksum(dest_path) or is_complete_pdf(dest_path):
+                    if not read_checksum(dest_path):
+                        _write_checksum(dest_path, _sha256_file(dest_path).hexdigest())
+                    print(f"✓ PDF déjà existant : {dest_path}")
+                    return dest_path
+                logging.warning(f"Fichier incomplet, nouveau téléchargement : {dest_path}")
+                os.remove(dest_path)
+
+            os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+            for attempt in range(self.retries + 1):
+                try:
+                    digest = self._fetch(url, dest_path)
+                    _write_checksum(dest_path, digest)
+                    print(f"✓ PDF téléchargé : {dest_path}")
+                    return dest_path
+                except DownloadError as e:
+                    logging.error(f"Téléchargement abandonné {url} : {e}")
+                    print(f"❌ Erreur téléchargement : {e}")
+                    return None
+                except (requests.RequestException, OSError) as e:
+                    if attempt >= self.retries:
+                        logging.error(f"Téléchargement échoué après {attempt + 1} essais {url} : {e}")
+                        print(f"❌ Erreur téléchargement : {e}")
+                        return None
+                    delay = self.backoff * (2 ** attempt)
+                    logging.warning(f"Téléchargement interrompu ({e}), reprise dans {delay:.1f}s : {url}")
+                    time.sleep(delay)
+        return None
+
+    def _fetch(self, url, dest_path):
+        """One attempt; resumes from the .part file when the server supports Range"""
+        part_path = dest_path + ".part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+            if response.status_code == 416 and offset:
+                # .part already holds the whole file
+                if not is_complete_pdf(part_path):
+                    self._discard(part_path)
+                    raise requests.ConnectionError(f"Reprise refusée (HTTP 416) sur un .part incomplet : {url}")
+                os.replace(part_path, dest_path)
+                return _sha256_file(dest_path).hexdigest()
+            if response.status_code in RETRY_STATUS:
+                raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            if response.status_code >= 400:
+                raise DownloadError(f"HTTP {response.status_code} pour {url}")
+
+            expected = response.headers.get("Content-Length")
+            expected = int(expected) if expected and expected.isdigit() else None
+
+            if response.status_code == 206:
+                content_range = parse_content_range(response.headers.get("Content-Range"))
+                if content_range is None or content_range[0] != offset:
+                    # Not the bytes that follow the .part: appending would corrupt the file
+                    self._discard(part_path)
+                    raise requests.ConnectionError(
+                        f"Content-Range inattendu ({response.headers.get('Content-Range')}) pour l'offset {offset}")
+                if content_range[2] is not None:
+                    expected = content_range[2] - offset
+
+            if response.status_code == 206 and offset:
+                mode = "ab"
+                h = _sha256_file(part_path)
+            else:
+                # Server ignored the Range header: start over
+                mode, offset = "wb", 0
+                h = hashlib.sha256()
+
+            expected = offset + expected if expected is not None else None
+
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        h.update(chunk)
+
+        size = os.path.getsize(part_path)
+        if expected is not None and size < expected:
+            raise requests.ConnectionError(f"Téléchargement tronqué ({size}/{expected} octets)")
+
+        if not is_pdf(part_path):
+            self._discard(part_path)
+            raise DownloadError(f"Le contenu reçu n'est pas un PDF : {url}")
+        if not is_complete_pdf(part_path):
+            self._discard(part_path)
+            raise requests.ConnectionError(f"PDF incomplet (pas de %%EOF), nouveau téléchargement : {url}")
+
+        os.replace(part_path, dest_path)
+        return h.hexdigest()
+
+    @staticmethod
+    def _discard(part_path):
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+
+    def download_many(self, items):
+        """
+        items: iterable of (url, dest_path).
+        Downloads concurrently and returns the paths (None on failure) in input order.
+        """
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda item: self.download(*item), items))
+
+
+_MANAGER = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_download_manager():
+    """Process-wide manager (shared session and connection pool)"""
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            _MANAGER = DownloadManager()
+        return _MANAGER
@@ -0,0 +1,204 @@
+"""
+WebDriver Pool Module
+Launches headless Chrome instances once per batch and lends them to scraping jobs.
+The chromedriver binary path is resolved once (ChromeDriverManager) and cached on
+disk, so later runs skip the "LATEST chromedriver version" lookup. When Chrome
+refuses to start a session with the cached driver (e.g. after a Chrome upgrade),
+the cache is dropped and the driver resolved again.
+"""
+import os
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+
+
+DRIVER_PATH_CACHE = Path(__file__).resolve().parents[2] / "cache" / "chromedriver_path.txt"
+DEFAULT_POOL_SIZE = int(os.environ.get("CMF_DRIVER_POOL_SIZE", "2"))
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def _env_driver_path():
+    env_path = os.environ.get("CMF_CHROMEDRIVER")
+    return env_path if env_path and os.path.exists(env_path) else None
+
+
+def get_driver_path(refresh=False):
+    """
+    chromedriver path, resolved at most once per machine.
+    Order: CMF_CHROMEDRIVER env var, in-process value, on-disk cache, ChromeDriverManager.
+    refresh=True skips the in-process and on-disk values (stale driver).
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if not refresh and _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        env_path = _env_driver_path()
+        if env_path:
+            _driver_path = env_path
+            return _driver_path
+
+        if not refresh:
+            try:
+                cached = DRIVER_PATH_CACHE.read_text(encoding="utf-8").strip()
+                if cached and os.path.exists(cached):
+                    _driver_path = cached
+                    return _driver_path
+            except OSError:
+                pass
+
+        # Loaded only on a cache miss: the HTTP path never needs webdriver_manager
+        from webdriver_manager.chrome import ChromeDriverManager
+        _driver_path = ChromeDriverManager().install()
+        try:
+            DRIVER_PATH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            DRIVER_PATH_CACHE.write_text(_driver_path, encoding="utf-8")
+        except OSError as e:
+            logging.warning(f"Chemin chromedriver non mis en cache : {e}")
+        return _driver_path
+
+
+def invalidate_driver_path():
+    """Forget the cached chromedriver path (in-process and on disk)"""
+    global _driver_path
+    with _driver_path_lock:
+        _driver_path = None
+        try:
+            DRIVER_PATH_CACHE.unlink()
+        except OSError:
+            pass
+
+
+def build_driver(window_size=None):
+    """New headless Chrome using the cached driver binary"""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    if window_size:
+        chrome_options.add_argument(f"--window-size={window_size}")
+    try:
+        service = Service(get_driver_path(), log_path=os.devnull)
+        return webdriver.Chrome(service=service, options=chrome_options)
+    except WebDriverException as e:
+        if _env_driver_path():
+            raise
+        # Typically "This version of ChromeDriver only supports Chrome version N"
+        logging.warning(f"Chrome refuse le chromedriver en cache, nouvelle résolution : {e}")
+        invalidate_driver_path()
+        service = Service(get_driver_path(refresh=True), log_path=os.devnull)
+        return webdriver.Chrome(service=service, options=chrome_options)
+
+
+class DriverPool:
+    """
+    Up to `size` Chrome instances, created on first demand and reused.
+    Drivers are reset (cookies, storage, blank page) before going back to the pool;
+    a driver that fails the reset is quit and replaced.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, window_size="1920,1080"):
+        self.size = max(1, size)
+        self.window_size = window_size
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DriverPool fermé")
+            if len(self._all) < self.size:
+                driver = build_driver(self.window_size)
+                self._all.append(driver)
+                return driver
+
+        return self._idle.get(timeout=timeout)
+
+    def release(self, driver):
+        if self._closed:
+            self._quit(driver)
+            return
+        try:
+            driver.delete_all_cookies()
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass
+        try:
+            driver.get("about:blank")
+        except Exception as e:
+            logging.warning(f"Driver inutilisable, remplacé : {e}")
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """with pool.driver() as driver: ..."""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._all:
+                self._all.remove(driver)
+        self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Quit every browser of the pool"""
+        with self._lock:
+            self._closed = True
+            drivers, self._all = self._all, []
+        for driver in drivers:
+            self._quit(driver)
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_driver_pool(size=None):
+    """Process-wide pool, created on first use"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None or _POOL._closed:
+            _POOL = DriverPool(size or DEFAULT_POOL_SIZE)
+        return _POOL
+
+
+def close_driver_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+            _POOL = None
+
+
+atexit.register(close_driver_pool)
@@ -1,40 +1,75 @@
 """
 PDF Downloader Module
-Handles downloading PDFs from URLs
+Handles downloading PDFs from URLs into the content-addressed PDF store
 """
 import os
 import re
-import requests
 
+from src.scraper.download_manager import get_download_manager, read_checksum, checksum_path, is_complete_pdf
+from src.utils.pdf_store import get_pdf_store
+from src.utils.metrics import instrument, count
 
+
+def pdf_filename(societe, nom, annee):
+    """Standardized PDF file name"""
+    safe_societe = re.sub(r'[^\w\s-]', '_', societe).replace(' ', '_')
+    safe_nom = re.sub(r'[^\w\s-]', '_', nom).replace(' ', '_')
+    return f"{safe_societe}_{safe_nom}_{annee}.pdf"
+
+
+def download_to_store(url, filename):
+    """
+    Return the store path of filename, downloading it only if the store does not know it.
+    Legacy copies left in the working directory are indexed instead of downloaded again.
+    """
+    store = get_pdf_store()
+    stored = store.lookup(filename)
+    if stored:
+        print(f"✓ PDF déjà existant : {filename}")
+        count("store_hits")
+        return stored
+
+    legacy_path = os.path.join(os.getcwd(), filename)
+    if os.path.exists(legacy_path) and is_complete_pdf(legacy_path):
+        print(f"✓ PDF déjà existant : {legacy_path}")
+        count("store_hits")
+        return store.add_file(legacy_path, filename, url)
+
+    incoming = get_download_manager().download(url, str(store.incoming_dir / filename))
+    if not incoming:
+        return None
+    sha256 = read_checksum(incoming)
+    path = store.add_file(incoming, filename, url, move=True, sha256=sha256)
+    count("downloads")
+    count("bytes", os.path.getsize(path))
+    if os.path.exists(checksum_path(incoming)):
+        os.remove(checksum_path(incoming))
+    return path
+
+
+@instrument("download")
 def download_pdf(url, societe, nom, annee):
-    """Download PDF from URL and save with structured filename"""
+    """Download PDF from URL into the PDF store (streamed, resumable, deduplicated)"""
     try:
-        safe_societe = re.sub(r'[^\w\s-]', '_', societe).replace(' ', '_')
-        safe_nom = re.sub(r'[^\w\s-]', '_', nom).replace(' ', '_')
-        filename = f"{safe_societe}_{safe_nom}_{annee}.pdf"
-        filepath = os.path.join(os.getcwd(), filename)
-        
-        if os.path.exists(filepath):
-            print(f"✓ PDF déjà existant : {filepath}")
-            return filepath
-        
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
-        print(f"✓ PDF téléchargé : {filepath}")
-        return filepath
+        return download_to_store(url, pdf_filename(societe, nom, annee))
     except Exception as e:
         print(f"❌ Erreur téléchargement : {str(e)}")
         return None
 
 
+def download_pdfs(documents):
+    """
+    Download several documents (dicts with url, societe, nom, annee) concurrently.
+    Returns the local paths in the same order (None for failures).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    manager = get_download_manager()
+    with ThreadPoolExecutor(max_workers=manager.max_workers) as executor:
+        return list(executor.map(lambda d: download_pdf(d['url'], d['societe'], d['nom'], d['annee']), documents))
+
+
 def get_local_pdf_path(societe, nom, annee):
-    """Generate local PDF path without downloading"""
-    safe_societe = re.sub(r'[^\w\s-]', '_', societe).replace(' ', '_')
-    safe_nom = re.sub(r'[^\w\s-]', '_', nom).replace(' ', '_')
-    filename = f"{safe_societe}_{safe_nom}_{annee}.pdf"
-    return os.path.join(os.getcwd(), filename)
+    """Local PDF path without downloading (store object if known, else the legacy working-directory path)"""
+    filename = pdf_filename(societe, nom, annee)
+    return get_pdf_store().lookup(filename) or os.path.join(os.getcwd(), filename)
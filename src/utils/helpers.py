@@ -1,9 +1,14 @@
 """
 Utility helper functions
 """
+import os
 import re
+import hashlib
+from datetime import date
 from urllib.parse import urlparse, urlencode, parse_qs
 
+from src.utils.numbers import parse_number
+
 
 def extract_year_from_text(text):
     """Extract year from text using various patterns"""
@@ -28,6 +33,10 @@ def extract_year_from_text(text):
     return None
 
 
+# Trailing group of numbers (including spaces as thousands separators)
+_TRAILING_NUMBERS_RE = re.compile(r'\s+([\d\s.,]+)$')
+
+
 def extract_trailing_numbers(text):
     """
     Extracts numerical values from the end of a string.
@@ -36,37 +45,25 @@ def extract_trailing_numbers(text):
     if not text:
         return text, []
 
-    # Match trailing group of numbers (including spaces as thousands separators)
     # We look for groups of digits potentially separated by spaces or dots
     # e.g., "123 456" or "123.456" or "123"
-    pattern = r'\s+([\d\s.,]+)$'
-    match = re.search(pattern, text)
+    match = _TRAILING_NUMBERS_RE.search(text)
     
     if match:
-        potential_num_str = match.group(1).strip()
-        # Clean the number string
-        cleaned_num = re.sub(r'[\s.]', '', potential_num_str).replace(',', '.')
-        
-        # Verify if it's actually a number
-        try:
-            val = float(cleaned_num)
-            # If successful, return the text without the number and the number itself
-            remaining_text = text[:match.start()].strip()
-            return remaining_text, [val]
-        except ValueError:
-            pass
-            
+        # "." groups thousands here ("50.000"), "," is the decimal mark
+        val = parse_number(match.group(1), dot_thousands=True)
+        if val is not None:
+            # Return the text without the number and the number itself
+            return text[:match.start()].strip(), [val]
+
     return text, []
 
 
 def clean_number(text):
-    """Clean and convert text to number"""
+    """Clean and convert text to number (int), the text itself if it is not an amount"""
     if isinstance(text, str):
-        cleaned = re.sub(r'\s+', '', text).replace(',', '.').rstrip('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        try:
-            return int(float(cleaned))
-        except ValueError:
-            return text
+        value = parse_number(text)
+        return text if value is None else int(value)
     return int(text) if isinstance(text, (int, float)) else text
 
 
@@ -79,3 +76,44 @@ def normalize_url(url):
         query_params.pop('token', None)
     new_query = urlencode(query_params, doseq=True)
     return parsed_url._replace(query=new_query).geturl()
+
+
+def period_end_from_name(nom, annee=None):
+    """
+    Closing date of a filing from its name ("Etats financiers au 31/12/2023",
+    "... au 30/06"), as an ISO string; the year defaults to annee. None if absent.
+    """
+    match = re.search(r'\b(\d{1,2})/(\d{1,2})(?:/(\d{4}|\d{2}))?\b', nom or '')
+    if not match:
+        return None
+    day, month, year = match.groups()
+    if year:
+        year = int(year) + 2000 if len(year) == 2 else int(year)
+    else:
+        try:
+            year = int(annee)
+        except (TypeError, ValueError):
+            return None
+    try:
+        return date(year, int(month), int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+_SHA256_MEMO = {}
+
+
+def file_sha256(path):
+    """SHA-256 of a file, memoized on (path, mtime, size)"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _SHA256_MEMO.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _SHA256_MEMO[key] = digest
+    return digest
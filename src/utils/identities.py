@@ -0,0 +1,456 @@
+"""
+Identities Module
+Declarative accounting identities ("CP avant affectation = CP1 + … + CP6",
+"TOTAL = Σ branches", "NET = BRUT - AMORT_PROV") loaded from config/identities.json
+(override with CMF_IDENTITIES, .yaml accepted when PyYAML is installed) and evaluated
+over a statement in one pass. Adding a rule is a config edit.
+
+A statement is a matrix of amounts: rows (with a key such as the code and a label such
+as the description) x value columns. An identity is
+
+    target - Σ coef * term = residual, within tolerance
+
+- axis "rows": target and terms are rows, one residual per column
+- axis "columns": target and terms are columns, one residual per row
+
+Selectors (target and terms):
+    "CP1"               exact row key / column name
+    "re:PA\\d"          every key / column name matching the regex (fullmatch), summed
+    "label:avant aff"   first row whose label contains the regex (case-insensitive)
+    "*"                 every other row / column
+
+Terms are a list (coefficient 1) or a {selector: coefficient} mapping. Empty cells:
+    empty_target  "zero" (counts as 0) | "skip" (not evaluated) | "fail" (even with empty terms)
+    empty_terms   "zero" | "skip" (any empty term: not evaluated) | "skip_all" (only when all are)
+A target that matches nothing makes the identity not applicable.
+
+At load the identities of a statement type are sorted along their dependency graph
+(an identity depends on those whose target is one of its terms; cycles are rejected).
+Per row / column layout the selectors are resolved once into a coefficient matrix
+(cached), then all row identities are one product A @ X and all column identities one
+product X @ W. The report gives the residuals of each identity and flags the failures
+that an upstream identity already explains (same column / row failing upstream).
+
+    identities = get_identities("passif")
+    report = identities.evaluate(Statement(keys, labels, columns, values))
+    report["cp_avant_affectation"].residuals
+    report.failures()   # [(identity, position, residual, inherited), ...]
+"""
+import os
+import re
+import json
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.numbers import parse_numbers
+
+
+DEFAULT_CONFIG = Path(__file__).resolve().parents[2] / "config" / "identities.json"
+
+AXES = ("rows", "columns")
+EMPTY_TARGET = ("zero", "skip", "fail")
+EMPTY_TERMS = ("zero", "skip", "skip_all")
+
+# Compiled layouts kept per identity set
+_LAYOUT_CACHE_SIZE = 64
+
+
+class Selector:
+    """A parsed selector, matched against row keys / labels or column names"""
+    __slots__ = ("text", "kind", "value", "pattern")
+
+    def __init__(self, text):
+        self.text = text
+        if text == "*":
+            self.kind, self.value, self.pattern = "all", None, None
+        elif text.startswith("re:"):
+            self.kind, self.value = "regex", text[3:]
+            self.pattern = re.compile(self.value)
+        elif text.startswith("label:"):
+            self.kind, self.value = "label", text[6:]
+            self.pattern = re.compile(self.value, re.IGNORECASE)
+        else:
+            self.kind, self.value, self.pattern = "exact", text, None
+
+    def resolve(self, names, labels=None, exclude=()):
+        """Positions matched in names (row keys / column names), labels for "label:" selectors"""
+        if self.kind == "exact":
+            found = next((i for i, name in enumerate(names) if name == self.value), None)
+            return [] if found is None else [found]
+        if self.kind == "regex":
+            return [i for i, name in enumerate(names)
+                    if isinstance(name, str) and self.pattern.fullmatch(name)]
+        if self.kind == "label":
+            texts = labels if labels is not None else names
+            found = next((i for i, text in enumerate(texts)
+                          if isinstance(text, str) and self.pattern.search(text)), None)
+            return [] if found is None else [found]
+        return [i for i in range(len(names)) if i not in exclude]
+
+    def may_match(self, other):
+        """True if this selector can select the row / column targeted by other (load-time graph)"""
+        if self.kind == "all" or self.text == other.text:
+            return True
+        if other.kind == "exact":
+            return (self.kind == "regex" and bool(self.pattern.fullmatch(other.value))) \
+                or (self.kind == "label" and bool(self.pattern.search(other.value)))
+        return False
+
+    def __repr__(self):
+        return f"Selector({self.text!r})"
+
+
+class Identity:
+    """One identity of the config; unknown keys are kept in meta (labels, comments, ...)"""
+
+    def __init__(self, name, target, terms, axis="rows", tolerance=None,
+                 empty_target="zero", empty_terms="zero", **meta):
+        if axis not in AXES:
+            raise ValueError(f"Identité {name} : axe inconnu {axis!r} (attendu : {AXES})")
+        if empty_target not in EMPTY_TARGET or empty_terms not in EMPTY_TERMS:
+            raise ValueError(f"Identité {name} : empty_target / empty_terms invalide")
+        self.name = name
+        self.axis = axis
+        self.target = Selector(target)
+        if isinstance(terms, dict):
+            self.terms = [(Selector(text), float(coef)) for text, coef in terms.items()]
+        elif isinstance(terms, str):
+            self.terms = [(Selector(terms), 1.0)]
+        else:
+            self.terms = [(Selector(text), 1.0) for text in terms]
+        self.tolerance = tolerance
+        self.empty_target = empty_target
+        self.empty_terms = empty_terms
+        self.meta = meta
+        self.depends_on = ()
+
+    def __repr__(self):
+        terms = " + ".join(f"{coef:g}*{sel.text}" for sel, coef in self.terms)
+        return f"Identity({self.name}: {self.target.text} = {terms})"
+
+
+def _no_nan(items):
+    """NaN keys / labels -> None (NaN != NaN would defeat the layout cache)"""
+    return [None if isinstance(item, float) and item != item else item for item in items]
+
+
+class Statement:
+    """
+    Amounts of a statement: row keys, row labels, value column names, (rows x columns)
+    values (parsed with parse_numbers; search: first amount of each text cell)
+    """
+
+    def __init__(self, keys, labels, columns, values, search=False):
+        self.keys = _no_nan(keys)
+        self.labels = _no_nan(labels) if labels is not None else self.keys
+        self.columns = list(columns)
+        values = np.asarray(values)
+        self.values, _ = parse_numbers(values.reshape(len(self.keys), len(self.columns)), search=search)
+
+    @classmethod
+    def from_frame(cls, df, columns, key=None, label=None, search=False):
+        """Statement of a DataFrame: key / label columns (default: first column), value columns"""
+        key = key if key is not None else df.columns[0]
+        label = label if label is not None else key
+        return cls(df[key].tolist(), df[label].tolist(), columns, df[list(columns)].to_numpy(), search)
+
+    def layout(self):
+        return (tuple(self.keys), tuple(self.labels), tuple(self.columns))
+
+
+class IdentityResult:
+    """Residuals of one identity: one per column (axis rows) or per row (axis columns)"""
+    __slots__ = ("identity", "target", "terms", "absent", "residuals", "evaluated", "failed", "inherited",
+                 "tolerance")
+
+    def __init__(self, identity, target, terms, absent, residuals, evaluated, failed, inherited, tolerance):
+        self.identity = identity
+        self.target = target          # row / column position of the target, None if not applicable
+        self.terms = terms            # positions of the terms
+        self.absent = absent          # selectors (target included) matching nothing in the statement
+        self.residuals = residuals    # NaN where not evaluated
+        self.evaluated = evaluated
+        self.failed = failed
+        self.inherited = inherited    # failed where an upstream identity fails too
+        self.tolerance = tolerance
+
+    @property
+    def name(self):
+        return self.identity.name
+
+    @property
+    def applicable(self):
+        return self.target is not None
+
+    @property
+    def ok(self):
+        return not self.failed.any()
+
+    def failed_positions(self):
+        return np.flatnonzero(self.failed).tolist()
+
+
+class IdentityReport:
+    """Results by identity name, in dependency order"""
+
+    def __init__(self, statement, results):
+        self.statement = statement
+        self.results = results
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def __iter__(self):
+        return iter(self.results.values())
+
+    @property
+    def ok(self):
+        return all(result.ok for result in self.results.values())
+
+    def failures(self, include_inherited=True):
+        """[(identity name, position, residual, inherited), ...]"""
+        out = []
+        for result in self.results.values():
+            for pos in result.failed_positions():
+                inherited = bool(result.inherited[pos])
+                if include_inherited or not inherited:
+                    out.append((result.name, pos, float(result.residuals[pos]), inherited))
+        return out
+
+    def summary(self):
+        """One line per identity"""
+        lines = []
+        for result in self.results.values():
+            if not result.applicable:
+                lines.append(f"{result.name:<32} n/a")
+                continue
+            worst = np.nanmax(np.abs(result.residuals)) if result.evaluated.any() else float("nan")
+            status = "OK" if result.ok else f"{int(result.failed.sum())} écart(s)"
+            lines.append(f"{result.name:<32} {status:<14} max |résidu| = {worst:g}")
+        return "\n".join(lines)
+
+
+class CompiledLayout:
+    """Selectors of an identity set resolved on one row / column layout"""
+
+    def __init__(self, identity_set, statement):
+        n_rows, n_cols = len(statement.keys), len(statement.columns)
+        self.by_axis = {}
+        for axis in AXES:
+            identities = [i for i in identity_set.identities if i.axis == axis]
+            size = n_rows if axis == "rows" else n_cols
+            # (identities x positions): target +1, terms -coef
+            coefs = np.zeros((len(identities), size))
+            members = np.zeros((len(identities), size), dtype=bool)
+            targets = []
+            terms = []
+            absent = []
+            unresolved = np.zeros(len(identities))
+            for k, identity in enumerate(identities):
+                names = statement.keys if axis == "rows" else statement.columns
+                labels = statement.labels if axis == "rows" else None
+                found = identity.target.resolve(names, labels)
+                target = found[0] if found else None
+                targets.append(target)
+                missing = [] if found else [identity.target.text]
+                positions = []
+                for selector, coef in identity.terms:
+                    excluded = () if target is None else (target,)
+                    matched = selector.resolve(names, labels, exclude=excluded)
+                    if not matched:
+                        # A term matching nothing counts as one empty term
+                        missing.append(selector.text)
+                        unresolved[k] += 1
+                    for pos in matched:
+                        coefs[k, pos] -= coef
+                        members[k, pos] = True
+                        positions.append(pos)
+                terms.append(positions)
+                absent.append(missing)
+                if target is not None:
+                    coefs[k, target] += 1.0
+            self.by_axis[axis] = (identities, coefs, members, unresolved, targets, terms, absent)
+
+
+class IdentitySet:
+    """Identities of one statement type, sorted along their dependency graph"""
+
+    def __init__(self, name, identities, tolerance=0.0):
+        self.name = name
+        self.tolerance = float(tolerance)
+        by_name = {}
+        for identity in identities:
+            if identity.name in by_name:
+                raise ValueError(f"{name} : identité en double {identity.name}")
+            by_name[identity.name] = identity
+        for identity in by_name.values():
+            identity.depends_on = tuple(
+                other.name for other in by_name.values()
+                if other is not identity and other.axis == identity.axis
+                and any(selector.may_match(other.target) for selector, _ in identity.terms
+                        if selector.kind != "all"))
+        self.identities = self._topological_order(by_name)
+        self._layouts = {}
+        self._lock = threading.Lock()
+
+    def _topological_order(self, by_name):
+        order, state = [], {}
+
+        def visit(identity, path):
+            if state.get(identity.name) == "done":
+                return
+            if state.get(identity.name) == "visiting":
+                raise ValueError(f"Cycle dans les identités {self.name} : {' -> '.join(path + [identity.name])}")
+            state[identity.name] = "visiting"
+            for dep in identity.depends_on:
+                visit(by_name[dep], path + [identity.name])
+            state[identity.name] = "done"
+            order.append(identity)
+
+        for identity in by_name.values():
+            visit(identity, [])
+        return order
+
+    def __iter__(self):
+        return iter(self.identities)
+
+    def __getitem__(self, name):
+        return next(identity for identity in self.identities if identity.name == name)
+
+    def compile(self, statement):
+        """Coefficient matrices of the statement layout (cached per layout)"""
+        key = statement.layout()
+        with self._lock:
+            layout = self._layouts.get(key)
+        if layout is None:
+            layout = CompiledLayout(self, statement)
+            with self._lock:
+                if len(self._layouts) >= _LAYOUT_CACHE_SIZE:
+                    self._layouts.pop(next(iter(self._layouts)))
+                self._layouts[key] = layout
+        return layout
+
+    def evaluate(self, statement, tolerance=None):
+        """IdentityReport of every identity over the statement; tolerance overrides the config"""
+        layout = self.compile(statement)
+        values = statement.values
+        empty = np.isnan(values)
+        filled = np.where(empty, 0.0, values)
+
+        results = {}
+        for axis in AXES:
+            identities, coefs, members, unresolved, targets, terms, absent = layout.by_axis[axis]
+            if not identities:
+                continue
+            if axis == "rows":
+                residuals = coefs @ filled                           # (identities x columns)
+                empty_terms = members.astype(np.float64) @ empty     # empty terms per column
+                target_empty = np.array([empty[t] if t is not None else np.ones(values.shape[1], bool)
+                                         for t in targets]).reshape(len(identities), -1)
+            else:
+                residuals = (filled @ coefs.T).T                     # (identities x rows)
+                empty_terms = (empty @ members.T.astype(np.float64)).T
+                target_empty = np.array([empty[:, t] if t is not None else np.ones(values.shape[0], bool)
+                                         for t in targets]).reshape(len(identities), -1)
+            empty_terms = empty_terms + unresolved[:, None]
+            n_terms = members.sum(axis=1) + unresolved
+
+            for k, identity in enumerate(identities):
+                tol = tolerance if tolerance is not None else (
+                    identity.tolerance if identity.tolerance is not None else self.tolerance)
+                size = residuals.shape[1]
+                if targets[k] is None:
+                    evaluated = np.zeros(size, dtype=bool)
+                    failed = np.zeros(size, dtype=bool)
+                    residual = np.full(size, np.nan)
+                else:
+                    evaluated = np.ones(size, dtype=bool)
+                    if identity.empty_terms == "skip":
+                        evaluated &= empty_terms[k] == 0
+                    elif identity.empty_terms == "skip_all":
+                        evaluated &= empty_terms[k] < n_terms[k]
+                    forced = np.zeros(size, dtype=bool)
+                    if identity.empty_target == "skip":
+                        evaluated &= ~target_empty[k]
+                    elif identity.empty_target == "fail":
+                        # An empty target fails whatever the terms
+                        forced = target_empty[k]
+                        evaluated |= forced
+                    residual = np.where(evaluated & ~forced, residuals[k], np.nan)
+                    with np.errstate(invalid="ignore"):
+                        failed = forced | (np.abs(residual) > tol)
+                results[identity.name] = [targets[k], terms[k], absent[k], residual, evaluated, failed, tol]
+
+        ordered = {}
+        for identity in self.identities:
+            if identity.name not in results:
+                continue
+            target, term_positions, missing, residual, evaluated, failed, tol = results[identity.name]
+            inherited = np.zeros_like(failed)
+            for dep in identity.depends_on:
+                if dep in ordered and ordered[dep].target is not None and ordered[dep].target in term_positions:
+                    inherited |= failed & ordered[dep].failed
+            ordered[identity.name] = IdentityResult(identity, target, term_positions, missing, residual,
+                                                    evaluated, failed, inherited, tol)
+        return IdentityReport(statement, ordered)
+
+    def evaluate_frame(self, df, columns, key=None, label=None, tolerance=None):
+        return self.evaluate(Statement.from_frame(df, columns, key=key, label=label), tolerance)
+
+
+# ---------------- Config ----------------
+
+def _read_config(path):
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError(f"PyYAML requis pour lire {path} (pip install pyyaml)")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def load_identities(path=None):
+    """{statement type: IdentitySet} from the config file"""
+    path = path or os.environ.get("CMF_IDENTITIES") or DEFAULT_CONFIG
+    config = _read_config(path)
+    default_tolerance = config.get("tolerance", 0.0)
+    sets = {}
+    for statement, spec in config.get("statements", {}).items():
+        identities = [Identity(**entry) for entry in spec.get("identities", [])]
+        sets[statement] = IdentitySet(statement, identities, spec.get("tolerance", default_tolerance))
+    logging.info(f"Identités chargées depuis {path} : "
+                 + ", ".join(f"{name} ({len(s.identities)})" for name, s in sets.items()))
+    return sets
+
+
+_identities = None
+_identities_lock = threading.Lock()
+
+
+def get_identities(statement=None):
+    """Identity sets loaded once per process; one set with statement"""
+    global _identities
+    if _identities is None:
+        with _identities_lock:
+            if _identities is None:
+                _identities = load_identities()
+    if statement is None:
+        return _identities
+    try:
+        return _identities[statement]
+    except KeyError:
+        raise KeyError(f"Aucune identité configurée pour '{statement}' ({sorted(_identities)})")
+
+
+def reset_identities():
+    """Reload the config on the next get_identities (after editing the file)"""
+    global _identities
+    with _identities_lock:
+        _identities = None
@@ -0,0 +1,400 @@
+"""
+Metrics Module
+Stage instrumentation: spans around scraping, download, page search, OCR, table
+extraction, structuring, validation, DB insert and export.
+
+    with span("ocr", page=3) as s:
+        ...
+        s.count("pages_ocr")
+
+Every finished span is appended as one JSON line to CMF_METRICS_LOG
+(outputs/metrics.jsonl of the repo by default, "off" to disable) with its duration, counts
+and the hits / misses of the registered caches (OCR, tables, raster) during the span.
+Spans are also aggregated in-process; prometheus_text() renders them in the
+Prometheus text format, written at exit to CMF_METRICS_PROM when it is set.
+"""
+import os
+import json
+import time
+import atexit
+import logging
+import itertools
+import threading
+import functools
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def _env_path(name, default):
+    value = os.environ.get(name, default)
+    if value is None or str(value).strip().lower() in ("", "0", "off", "false", "none"):
+        return None
+    return Path(value)
+
+
+METRICS_LOG = _env_path("CMF_METRICS_LOG", Path(__file__).resolve().parents[2] / "outputs" / "metrics.jsonl")
+METRICS_PROM = _env_path("CMF_METRICS_PROM", None)
+
+# Duration buckets (seconds) of the Prometheus histogram
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_local = threading.local()
+_ids = itertools.count(1)
+_write_lock = threading.Lock()
+_caches = {}
+
+
+# ============================================================
+# Caches
+# ============================================================
+
+def register_cache(name, cache, hits="hits", misses="misses"):
+    """Expose the hit / miss counters of a cache object (attribute names) to the spans"""
+    _caches[name] = (cache, hits, misses)
+
+
+def _cache_counters():
+    counters = {}
+    for name, (cache, hits, misses) in list(_caches.items()):
+        counters[name] = (getattr(cache, hits, 0), getattr(cache, misses, 0))
+    return counters
+
+
+def _ratio(hits, misses):
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+def cache_stats():
+    """{cache: {hits, misses, hit_ratio}} of the registered caches since process start"""
+    return {
+        name: {"hits": hits, "misses": misses, "hit_ratio": _ratio(hits, misses)}
+        for name, (hits, misses) in _cache_counters().items()
+    }
+
+
+# ============================================================
+# Spans
+# ============================================================
+
+class Span:
+    """One timed stage; counts are free-form integers (pages_ocr, rows_inserted, ...)"""
+
+    def __init__(self, name, attrs=None, parent=None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.counts = {}
+        self.span_id = next(_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.status = "ok"
+        self.error = None
+        self.duration = None
+        self._start = None
+        self._cache_start = None
+
+    def count(self, key, n=1):
+        self.counts[key] = self.counts.get(key, 0) + n
+        return self
+
+    def set(self, key, value):
+        self.attrs[key] = value
+        return self
+
+    def start(self):
+        self._cache_start = _cache_counters()
+        self._start = time.perf_counter()
+        return self
+
+    def finish(self, error=None):
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        return self
+
+    def cache_deltas(self):
+        deltas = {}
+        for name, (hits, misses) in _cache_counters().items():
+            hits0, misses0 = (self._cache_start or {}).get(name, (0, 0))
+            d_hits, d_misses = hits - hits0, misses - misses0
+            if d_hits or d_misses:
+                deltas[name] = {"hits": d_hits, "misses": d_misses, "hit_ratio": _ratio(d_hits, d_misses)}
+        return deltas
+
+    def to_record(self):
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "t": round(time.time(), 3),
+            "event": "span",
+            "name": self.name,
+            "duration_s": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs,
+            "counts": self.counts,
+            "cache": self.cache_deltas(),
+            "span_id": f"{os.getpid()}-{self.span_id}",
+            "parent_id": f"{os.getpid()}-{self.parent_id}" if self.parent_id else None,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+        }
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a stage; nested spans record their parent"""
+    stack = _stack()
+    current = Span(name, attrs, stack[-1] if stack else None).start()
+    stack.append(current)
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        stack.pop()
+        current.finish(error)
+        _emit(current)
+
+
+def count(key, n=1):
+    """Add n to a counter of the innermost active span (no-op outside a span)"""
+    current = current_span()
+    if current is not None:
+        current.count(key, n)
+
+
+def annotate(**attrs):
+    """Set attributes of the innermost active span (no-op outside a span)"""
+    current = current_span()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def instrument(name, count_result=None, **attrs):
+    """
+    Decorator form of span(). count_result: counter name set to len(result)
+    when the function returns a sized result (rows extracted, documents found, ...).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **attrs) as s:
+                result = fn(*args, **kwargs)
+                if count_result and result is not None and hasattr(result, "__len__"):
+                    s.count(count_result, len(result))
+                if result is None or result is False:
+                    s.set("empty_result", True)
+                return result
+        return wrapper
+    return decorator
+
+
+def _emit(finished):
+    record = finished.to_record()
+    get_registry().observe(record)
+    if METRICS_LOG is None:
+        return
+    try:
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with _write_lock:
+            METRICS_LOG.parent.mkdir(parents=True, exist_ok=True)
+            # One write per line in append mode: lines of parallel batch workers do not interleave
+            with open(METRICS_LOG, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        logging.warning(f"Metrics : écriture impossible dans {METRICS_LOG} ({e})")
+
+
+# ============================================================
+# Aggregation / Prometheus
+# ============================================================
+
+class StageStats:
+    __slots__ = ("count", "errors", "total", "max", "buckets", "counts")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.counts = {}
+
+
+class MetricsRegistry:
+    """Per-stage duration histogram, error count and counters; cache totals of the root spans"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.caches = {}
+
+    def observe(self, record):
+        duration = record["duration_s"]
+        with self._lock:
+            stats = self.stages.setdefault(record["name"], StageStats())
+            stats.count += 1
+            stats.total += duration
+            stats.max = max(stats.max, duration)
+            if record.get("status") == "error":
+                stats.errors += 1
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+            for key, n in (record.get("counts") or {}).items():
+                stats.counts[key] = stats.counts.get(key, 0) + n
+            # Nested spans would count the same lookups twice
+            if not record.get("parent_id"):
+                for name, delta in (record.get("cache") or {}).items():
+                    totals = self.caches.setdefault(name, [0, 0])
+                    totals[0] += delta.get("hits", 0)
+                    totals[1] += delta.get("misses", 0)
+
+    def cache_stats(self):
+        return {
+            name: {"hits": hits, "misses": misses, "hit_ratio": _ratio(hits, misses)}
+            for name, (hits, misses) in self.caches.items()
+        }
+
+    def summary(self):
+        """[(stage, count, errors, total_s, mean_s, max_s, counts)] by total time, largest first"""
+        with self._lock:
+            rows = [(name, s.count, s.errors, s.total, s.total / s.count if s.count else 0.0, s.max, dict(s.counts))
+                    for name, s in self.stages.items()]
+        return sorted(rows, key=lambda r: r[3], reverse=True)
+
+
+_REGISTRY = None
+
+
+def get_registry():
+    """Process-wide registry of the finished spans"""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = MetricsRegistry()
+    return _REGISTRY
+
+
+def read_spans(path=None, since=None):
+    """Span records of a JSON-lines log (optionally only those finished at or after epoch `since`)"""
+    path = Path(path) if path else METRICS_LOG
+    records = []
+    if path is None or not path.exists():
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("event") != "span":
+                continue
+            if since is not None and record.get("t", 0) < since:
+                continue
+            records.append(record)
+    return records
+
+
+def aggregate(records):
+    """Registry built from span records (e.g. the log lines of every batch worker)"""
+    registry = MetricsRegistry()
+    for record in records:
+        registry.observe(record)
+    return registry
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def prometheus_text(registry=None, caches=None):
+    """Prometheus text exposition of a registry (the live one and its caches by default)"""
+    if registry is None:
+        registry = get_registry()
+        caches = cache_stats() if caches is None else caches
+    caches = registry.cache_stats() if caches is None else caches
+
+    lines = [
+        "# HELP cmf_stage_duration_seconds Duration of the instrumented pipeline stages",
+        "# TYPE cmf_stage_duration_seconds histogram",
+    ]
+    with registry._lock:
+        stages = sorted(registry.stages.items())
+        for name, s in stages:
+            stage = _label(name)
+            for bound, n in zip(BUCKETS, s.buckets):
+                lines.append(f'cmf_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {n}')
+            lines.append(f'cmf_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {s.count}')
+            lines.append(f'cmf_stage_duration_seconds_sum{{stage="{stage}"}} {_number(round(s.total, 6))}')
+            lines.append(f'cmf_stage_duration_seconds_count{{stage="{stage}"}} {s.count}')
+
+        lines += ["# HELP cmf_stage_errors_total Stages that raised", "# TYPE cmf_stage_errors_total counter"]
+        for name, s in stages:
+            lines.append(f'cmf_stage_errors_total{{stage="{_label(name)}"}} {s.errors}')
+
+        lines += ["# HELP cmf_stage_items_total Counters recorded by the stages (pages, rows, ...)",
+                  "# TYPE cmf_stage_items_total counter"]
+        for name, s in stages:
+            for key, n in sorted(s.counts.items()):
+                lines.append(f'cmf_stage_items_total{{stage="{_label(name)}",item="{_label(key)}"}} {n}')
+
+    lines += ["# HELP cmf_cache_hits_total Cache hits", "# TYPE cmf_cache_hits_total counter"]
+    lines += [f'cmf_cache_hits_total{{cache="{_label(n)}"}} {c["hits"]}' for n, c in sorted(caches.items())]
+    lines += ["# HELP cmf_cache_misses_total Cache misses", "# TYPE cmf_cache_misses_total counter"]
+    lines += [f'cmf_cache_misses_total{{cache="{_label(n)}"}} {c["misses"]}' for n, c in sorted(caches.items())]
+    lines += ["# HELP cmf_cache_hit_ratio Hits / (hits + misses)", "# TYPE cmf_cache_hit_ratio gauge"]
+    lines += [f'cmf_cache_hit_ratio{{cache="{_label(n)}"}} {c["hit_ratio"]}'
+              for n, c in sorted(caches.items()) if c["hit_ratio"] is not None]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, registry=None, caches=None):
+    """Write the Prometheus dump atomically (node_exporter textfile collector friendly)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(prometheus_text(registry, caches), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def format_summary(registry=None, caches=None):
+    """Plain-text table of where the time went, largest stages first"""
+    registry = registry or get_registry()
+    caches = registry.cache_stats() if caches is None else caches
+    lines = [f"{'stage':<20} {'n':>5} {'err':>4} {'total':>10} {'mean':>9} {'max':>9}  counts"]
+    for name, n, errors, total, mean, longest, counts in registry.summary():
+        detail = " ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        lines.append(f"{name:<20} {n:>5} {errors:>4} {total:>9.2f}s {mean:>8.3f}s {longest:>8.3f}s  {detail}")
+    for name, c in sorted(caches.items()):
+        ratio = "-" if c["hit_ratio"] is None else f"{c['hit_ratio']:.0%}"
+        lines.append(f"cache {name:<14} hits={c['hits']} misses={c['misses']} hit_ratio={ratio}")
+    return "\n".join(lines)
+
+
+def _dump_at_exit():
+    if METRICS_PROM is not None and get_registry().stages:
+        try:
+            write_prometheus(METRICS_PROM)
+        except OSError as e:
+            logging.warning(f"Metrics : dump Prometheus impossible ({e})")
+
+
+atexit.register(_dump_at_exit)
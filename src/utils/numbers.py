@@ -0,0 +1,227 @@
+"""
+Numbers Module
+One parser for the French-formatted amounts of the financial tables, on a single cell
+(parse_number) or on a whole column (parse_numbers: pandas Series / NumPy array ->
+float64 values + validity mask).
+
+Rules:
+- spaces, NBSP and narrow NBSP are thousands separators: "1 234 567" -> 1234567
+- "," alone is the decimal mark ("12,5"); several "." or "," are thousands separators
+  ("1.234.567", "30,522,402"); with both, the last one is the decimal mark ("1.234,56",
+  "1,234.56"). Thousands groups must have 3 digits, so "31.12.2024" is not an amount
+- "(1 234)" and a leading dash (any of DASH_CHARS) are negatives; a dash alone is empty
+- strict mode (default): the cell is the amount, optionally followed by a unit or a note
+  letter ("12 300 DT", "1 234 a"); search mode takes the first amount of the text
+- dot_thousands: every "." is a thousands separator and "," the decimal mark, as the OCR'd
+  passif rows and B.py always read them ("50.000" -> 50000, "1 234.567" -> 1234567)
+- bool, NaN and cells without digits are invalid (NaN, mask False)
+
+parse_numbers parses each distinct cell once (pd.factorize) and broadcasts the results.
+Short plain amounts ("1 234", "(56)", "-12,5") are parsed together on a NumPy matrix
+of code points; only the other cells go through the regex path one by one. Numeric
+columns are converted without any parsing.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# Hyphen, non-breaking hyphen, figure dash, en dash, em dash, minus sign
+DASH_CHARS = frozenset({"-", "\u2010", "\u2011", "\u2012", "\u2013", "\u2014", "\u2212"})
+
+# Spaces inside an amount (thousands separators, NBSP, narrow NBSP, line breaks)
+SPACE_CHARS = " \t\r\n\u00a0\u202f\u2009\u2007"
+
+# Whitespace removed, every dash mapped to "-"
+_NORMALIZE = str.maketrans(
+    {**{ch: None for ch in SPACE_CHARS},
+     **{ch: "-" for ch in DASH_CHARS if ch != "-"}})
+
+_STRICT_RE = re.compile(r"([-+]?)(\d[\d.,]*)[^\W\d_]*\.?")
+_SEARCH_RE = re.compile(r"(-?)(\d[\d.,]*)")
+# Vectorized path: cells up to this length, at most this many digits (exact in float64)
+_FAST_WIDTH = 32
+_FAST_MAX_DIGITS = 15
+_POW10 = 10.0 ** np.arange(_FAST_MAX_DIGITS + 1)
+
+# Character classes of the vectorized path, by code point (beyond the table: other)
+_OTHER, _SPACE, _DIGIT, _DASH, _SEP, _OPEN, _CLOSE = range(7)
+_CLASSES = np.zeros(max(map(ord, SPACE_CHARS + "".join(DASH_CHARS))) + 2, dtype=np.uint8)
+_CLASSES[[0] + [ord(ch) for ch in SPACE_CHARS]] = _SPACE  # 0: padding of the matrix
+_CLASSES[ord("0"):ord("9") + 1] = _DIGIT
+_CLASSES[[ord(ch) for ch in DASH_CHARS]] = _DASH
+_CLASSES[[ord(","), ord(".")]] = _SEP
+_CLASSES[ord("(")] = _OPEN
+_CLASSES[ord(")")] = _CLOSE
+
+
+def _grouped(digits, sep):
+    """True if digits is "1.234.567"-like for the thousands separator sep"""
+    groups = digits.split(sep)
+    return 1 <= len(groups[0]) <= 3 and all(len(g) == 3 for g in groups[1:])
+
+
+def _to_float(token, dot_thousands=False):
+    """Digits with "." / "," separators -> float, None if ambiguous (e.g. a date 31.12.2024)"""
+    token = token.rstrip(".,")
+    if dot_thousands:
+        token = token.replace(".", "")
+    commas, dots = token.count(","), token.count(".")
+    if commas and dots:
+        decimal = "," if token.rfind(",") > token.rfind(".") else "."
+        thousands = "." if decimal == "," else ","
+        integer, _, fraction = token.rpartition(decimal)
+        if thousands in fraction or not _grouped(integer, thousands):
+            return None
+        token = f"{integer.replace(thousands, '')}.{fraction}"
+    elif commas > 1 or dots > 1:
+        sep = "," if commas else "."
+        if not _grouped(token, sep):
+            return None
+        token = token.replace(sep, "")
+    elif commas:
+        token = token.replace(",", ".")
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def _parse_text(text, search, dot_thousands=False):
+    s = text.translate(_NORMALIZE)
+    if not s:
+        return None
+    negative = False
+    if s[0] == "(" and s[-1] == ")":
+        negative = True
+        s = s[1:-1]
+    match = _SEARCH_RE.search(s) if search else _STRICT_RE.fullmatch(s)
+    if not match:
+        return None
+    value = _to_float(match.group(2), dot_thousands)
+    if value is None:
+        return None
+    if match.group(1) == "-":
+        negative = True
+    return -value if negative else value
+
+
+_parse_text_cached = lru_cache(maxsize=65536)(_parse_text)
+
+
+def parse_number(value, search=False, dot_thousands=False):
+    """Amount of one cell as a float, None if the cell is not an amount"""
+    if value is None or isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        return None if value != value else value
+    return _parse_text_cached(str(value), search, dot_thousands)
+
+
+def parse_numbers(values, search=False, dot_thousands=False):
+    """
+    Vectorized parse_number over a Series / array (any shape).
+    Returns (float64 array of the same shape, bool mask of the parsed cells).
+    """
+    arr = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+    shape = arr.shape
+
+    if arr.dtype.kind in "iuf":
+        out = arr.astype(np.float64).reshape(shape)
+        return out, ~np.isnan(out)
+
+    flat = arr.reshape(-1).astype(object, copy=False)
+    codes, uniques = pd.factorize(flat, use_na_sentinel=True)
+    table = np.full(len(uniques) + 1, np.nan)  # last slot: code -1 (None / NaN)
+    if len(uniques):
+        table[:-1] = _parse_uniques(uniques, search, dot_thousands)
+    out = table[codes].reshape(shape)
+    return out, ~np.isnan(out)
+
+
+def _parse_plain(texts, width):
+    """
+    Vectorized parse of texts (at most width characters) holding a plain amount: digits
+    and spaces, at most one "," / "." between digits, an optional leading dash, optional
+    parentheses. The texts are viewed as a matrix of code points; returns (values, ok).
+    Other texts (ok False) need _parse_text; for plain ones both give the same float.
+    """
+    n = len(texts)
+    codes = np.array(texts, dtype=f"U{width}").view(np.uint32).reshape(n, width)
+    classes = _CLASSES[np.minimum(codes, len(_CLASSES) - 1)]
+    rows = np.arange(n)
+    columns = np.arange(width)
+
+    space = classes == _SPACE
+    digit = classes == _DIGIT
+    dash = classes == _DASH
+    sep = classes == _SEP
+    opening, closing = classes == _OPEN, classes == _CLOSE
+    ok = ~(classes == _OTHER).any(axis=1)
+
+    # Parentheses: "(" first and ")" last significant character, or none
+    significant = ~space
+    first = significant.argmax(axis=1)
+    last = width - 1 - significant[:, ::-1].argmax(axis=1)
+    paren = opening[rows, first] & closing[rows, last]
+    ok &= (opening.sum(axis=1) == paren) & (closing.sum(axis=1) == paren)
+
+    # Dash: only right after the optional "(" (first significant character otherwise)
+    n_dash = dash.sum(axis=1)
+    after_paren = np.where(paren, (significant & (columns > first[:, None])).argmax(axis=1), first)
+    ok &= (n_dash == 0) | ((n_dash == 1) & dash[rows, after_paren])
+
+    # Digits before and after the single separator
+    digits_after = np.cumsum(digit[:, ::-1], axis=1, dtype=np.int8)[:, ::-1]  # at or after each position
+    n_digits = digits_after[:, 0]
+    n_sep = sep.sum(axis=1)
+    frac_digits = np.where(n_sep == 1, digits_after[rows, sep.argmax(axis=1)], 0)
+    ok &= (n_digits >= 1) & (n_digits <= _FAST_MAX_DIGITS) & (n_sep <= 1)
+    ok &= (n_sep == 0) | ((frac_digits >= 1) & (frac_digits < n_digits))
+
+    # Exact integer mantissa (< 2**53), one correctly rounded division
+    rank = np.minimum(digits_after - 1, _FAST_MAX_DIGITS).clip(0)
+    mantissa = np.where(digit, (codes - 48) * _POW10[rank], 0.0).sum(axis=1)
+    values = mantissa / _POW10[np.minimum(frac_digits, _FAST_MAX_DIGITS)]
+    values = np.where(paren | (n_dash > 0), -values, values)
+    return values, ok
+
+
+def _parse_uniques(uniques, search, dot_thousands=False):
+    """float64 array of the distinct cells: short plain amounts vectorized, the rest cell by cell"""
+    result = np.full(len(uniques), np.nan)
+    if pd.api.types.infer_dtype(uniques, skipna=False) == "string":
+        lengths = np.fromiter(map(len, uniques), dtype=np.int64, count=len(uniques))
+    else:
+        lengths = np.fromiter((len(u) if type(u) is str else _FAST_WIDTH + 1 for u in uniques),
+                              dtype=np.int64, count=len(uniques))
+    fast = lengths <= _FAST_WIDTH
+    fast_positions = np.flatnonzero(fast)
+    if len(fast_positions):
+        width = max(1, int(lengths[fast_positions].max()))
+        texts = uniques[fast_positions].tolist()
+        if dot_thousands:
+            # Dots only group thousands: dropped, "," stays the single decimal mark
+            texts = [text.replace(".", "") for text in texts]
+        values, ok = _parse_plain(texts, width)
+        result[fast_positions[ok]] = values[ok]
+        fast[fast_positions[~ok]] = False
+
+    for i in np.flatnonzero(~fast):
+        value = uniques[i]
+        if type(value) is str:
+            parsed = _parse_text(value, search, dot_thousands)
+        else:
+            parsed = parse_number(value, search)
+        if parsed is not None:
+            result[i] = parsed
+    return result
+
+
+def to_numeric_series(series, search=False, default=np.nan, dot_thousands=False):
+    """Series of floats (default where the cell is not an amount), same index"""
+    values, mask = parse_numbers(series, search, dot_thousands)
+    return pd.Series(np.where(mask, values, default), index=series.index, name=series.name)
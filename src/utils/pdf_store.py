@@ -0,0 +1,172 @@
+"""
+PDF Store Module
+Content-addressed storage of the downloaded PDFs (sha256 -> file) with a name index.
+Identical reports re-published under another name or by another company are stored
+once; output folders receive hardlinks instead of copies.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.helpers import file_sha256
+
+
+DEFAULT_STORE_DIR = Path(os.environ.get(
+    "CMF_PDF_STORE",
+    Path(__file__).resolve().parents[2] / "pdf_store"
+))
+
+
+class PdfStore:
+    """
+    Layout:
+        objects/<2 first hex chars>/<sha256>.pdf   (read-only)
+        incoming/                                  (downloads in progress)
+        index.sqlite                               (name -> sha256, url)
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.incoming_dir = self.root / "incoming"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.incoming_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(str(self.root / "index.sqlite"), timeout=30, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS pdf_name (
+                name TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                url TEXT,
+                added_at TEXT NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS ix_pdf_name_sha ON pdf_name (sha256)")
+        self.connection.commit()
+
+    def object_path(self, sha256):
+        return self.objects_dir / sha256[:2] / f"{sha256}.pdf"
+
+    def lookup(self, name):
+        """Object path stored under name, or None"""
+        with self._lock:
+            row = self.connection.execute("SELECT sha256 FROM pdf_name WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        path = self.object_path(row[0])
+        return str(path) if path.exists() else None
+
+    def name_for(self, path):
+        """Readable file name of a stored object (first indexed name), else its basename"""
+        sha256 = Path(path).stem
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT name FROM pdf_name WHERE sha256 = ? ORDER BY added_at LIMIT 1", (sha256,)
+            ).fetchone()
+        return row[0] if row else os.path.basename(path)
+
+    def add_file(self, src_path, name=None, url=None, move=False, sha256=None):
+        """
+        Store src_path and index it under name. Returns the object path.
+        move=True removes the source once stored; otherwise the object is a copy: a
+        hardlink would share the inode, so the chmod below would make the caller's file
+        read-only and a later write to it would change the stored object.
+        """
+        sha256 = sha256 or file_sha256(src_path)
+        dest = self.object_path(sha256)
+        name = name or os.path.basename(src_path)
+
+        with self._lock:
+            if dest.exists():
+                if move:
+                    os.remove(src_path)
+            else:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                if move:
+                    os.replace(src_path, dest)
+                else:
+                    _copy_atomic(src_path, dest, self.incoming_dir)
+                if os.name != "nt":
+                    os.chmod(dest, 0o444)
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pdf_name (name, sha256, url, added_at) VALUES (?, ?, ?, ?)",
+                (name, sha256, url, datetime.now().isoformat(timespec="seconds"))
+            )
+            self.connection.commit()
+        return str(dest)
+
+    def import_directory(self, directory):
+        """Index the PDFs already present in directory (e.g. the legacy files in the repo root)"""
+        imported = 0
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                self.add_file(entry.path, entry.name)
+                imported += 1
+        return imported
+
+    def materialize(self, object_path, dest_dir, name=None):
+        """
+        Expose a stored PDF in dest_dir under its readable name.
+        Hardlink when possible (no extra bytes on disk), copy otherwise.
+        """
+        name = name or self.name_for(object_path)
+        dest = os.path.join(dest_dir, name)
+        os.makedirs(dest_dir, exist_ok=True)
+        if os.path.exists(dest):
+            try:
+                if os.path.samefile(dest, object_path):
+                    return dest
+            except OSError:
+                pass
+            os.remove(dest)
+        _link_or_copy(object_path, dest)
+        return dest
+
+
+def _link_or_copy(src, dest):
+    try:
+        os.link(src, dest)
+    except OSError as e:
+        # Other volume / filesystem without hardlinks
+        logging.info(f"Hardlink impossible ({e}), copie de {src}")
+        shutil.copy2(src, dest)
+
+
+def _copy_atomic(src, dest, tmp_dir):
+    """Copy src to dest through a temporary file, so dest is never seen half written"""
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=tmp_dir)
+    os.close(fd)
+    try:
+        shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_pdf_store():
+    """Process-wide store instance"""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = PdfStore()
+        return _STORE
+
+
+def is_store_object(path):
+    """True if path points inside the store objects directory"""
+    try:
+        return Path(path).resolve().is_relative_to(get_pdf_store().objects_dir.resolve())
+    except (OSError, ValueError):
+        return False
@@ -0,0 +1,166 @@
+"""
+Pipeline Module
+In-process DAG runner: stages are plain functions with declared dependencies.
+A stage starts as soon as the stages it requires have succeeded; independent
+stages run concurrently in a thread pool and exchange their outputs (DataFrames,
+paths, return codes) in memory.
+
+    pipeline = Pipeline("annexes", [
+        Stage("tables", extract),
+        Stage("excel", export, requires=["tables"]),
+        Stage("validation", validate, requires=["tables"]),
+        Stage("next", run_next, requires=["validation"], when=lambda inputs: inputs["validation"] == 0),
+    ])
+    results = pipeline.run(context)
+
+A stage function receives (context, inputs): the shared context dict and the
+outputs of its dependencies by stage name. A stage whose dependency failed or was
+skipped, or whose `when` predicate is false, is skipped; a stage can also skip
+itself (nothing to do) by raising SkipStage.
+"""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from src.utils.metrics import span
+
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+
+class SkipStage(Exception):
+    """Raised by a stage function with nothing to produce (its dependents are skipped)"""
+
+
+class Stage:
+    """One node of the pipeline"""
+
+    def __init__(self, name, fn, requires=(), when=None):
+        self.name = name
+        self.fn = fn
+        self.requires = tuple(requires)
+        self.when = when
+
+
+class StageResult:
+    __slots__ = ("name", "status", "output", "error", "seconds")
+
+    def __init__(self, name, status, output=None, error=None, seconds=0.0):
+        self.name = name
+        self.status = status
+        self.output = output
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return self.status == STATUS_OK
+
+    def __repr__(self):
+        return f"StageResult({self.name!r}, {self.status!r}, {self.seconds:.2f}s)"
+
+
+class Pipeline:
+    """Set of stages checked for unknown dependencies and cycles at construction"""
+
+    def __init__(self, name, stages, max_workers=4):
+        self.name = name
+        self.stages = {}
+        self.max_workers = max_workers
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Étape en double : {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in self.stages.values():
+            unknown = [dep for dep in stage.requires if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"Étape {stage.name} : dépendance(s) inconnue(s) {unknown}")
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle dans le pipeline {self.name} : {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self.stages[name].requires:
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def _blocked(self, stage, results):
+        """Skip reason if a dependency did not succeed or `when` is false, else None"""
+        for dep in stage.requires:
+            if not results[dep].ok:
+                return f"{dep} {results[dep].status}"
+        if stage.when is not None:
+            inputs = {dep: results[dep].output for dep in stage.requires}
+            if not stage.when(inputs):
+                return "condition non remplie"
+        return None
+
+    def _execute(self, stage, context, inputs):
+        start = time.perf_counter()
+        with span("pipeline_stage", pipeline=self.name, stage=stage.name) as s:
+            try:
+                output = stage.fn(context, inputs)
+            except SkipStage as e:
+                print(f"ℹ️ Étape {stage.name} ignorée ({e})")
+                s.set("skipped", True)
+                return StageResult(stage.name, STATUS_SKIPPED, error=str(e), seconds=time.perf_counter() - start)
+            except Exception as e:
+                logging.error(f"Pipeline {self.name} : étape {stage.name} en échec : {e}")
+                print(f"❌ Étape {stage.name} en échec : {e}")
+                s.set("failed", True)
+                return StageResult(stage.name, STATUS_FAILED, error=str(e), seconds=time.perf_counter() - start)
+        return StageResult(stage.name, STATUS_OK, output, seconds=time.perf_counter() - start)
+
+    def run(self, context=None):
+        """Run every stage; returns {stage name: StageResult}"""
+        context = {} if context is None else context
+        results = {}
+        pending = list(self.order)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"pipeline-{self.name}") as executor:
+            while pending or running:
+                # Start every stage whose dependencies are resolved (topological order kept)
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if any(dep not in results for dep in stage.requires):
+                        continue
+                    pending.remove(name)
+                    reason = self._blocked(stage, results)
+                    if reason:
+                        print(f"ℹ️ Étape {name} ignorée ({reason})")
+                        logging.info(f"Pipeline {self.name} : étape {name} ignorée ({reason})")
+                        results[name] = StageResult(name, STATUS_SKIPPED, error=reason)
+                        continue
+                    inputs = {dep: results[dep].output for dep in stage.requires}
+                    running[executor.submit(self._execute, stage, context, inputs)] = name
+
+                if not running:
+                    # Skips may have unblocked more stages
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return results
+
+
+def summarize(results):
+    """One line per stage, in completion order"""
+    lines = []
+    for result in results.values():
+        detail = f" ({result.error})" if result.error else ""
+        lines.append(f"{result.status:<8} {result.seconds:>7.2f}s  {result.name}{detail}")
+    return "\n".join(lines)
@@ -0,0 +1,63 @@
+"""
+Validation Report Module
+Headless side of the Excel validators (B.py, NorVal12, NorVal13): instead of opening
+Excel and waiting for Ctrl+S, a validator writes the cells to correct to a JSON
+report next to the workbook and returns a status code.
+
+    STATUS_VALID (0)    every check passes
+    STATUS_INVALID (1)  corrections to make, listed in <workbook>.corrections.json
+    STATUS_ERROR (2)    the workbook could not be validated (missing, unreadable, ...)
+
+CMF_HEADLESS=1 turns the interactive loops into one headless pass (batch, server).
+"""
+import os
+import json
+import logging
+from datetime import datetime
+
+
+STATUS_VALID = 0
+STATUS_INVALID = 1
+STATUS_ERROR = 2
+
+STATUS_LABELS = {STATUS_VALID: "Valide", STATUS_INVALID: "Invalide", STATUS_ERROR: "Erreur"}
+
+
+def is_headless():
+    """True when CMF_HEADLESS is set (1 / true / yes / on)"""
+    return os.environ.get("CMF_HEADLESS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def report_path(workbook_path):
+    base, _ = os.path.splitext(os.path.abspath(workbook_path))
+    return f"{base}.corrections.json"
+
+
+def correction(row, column, category=None, value=None, message=None, **extra):
+    """One cell to correct (Excel row / column, 1-based); extra: validator-specific fields"""
+    return {"row": int(row), "column": int(column), "category": category, "value": value,
+            "message": message, **extra}
+
+
+def write_corrections_report(workbook_path, validator, status, corrections=(), output=None, error=None):
+    """Writes <workbook>.corrections.json (overwritten at each pass) and returns its path"""
+    path = report_path(workbook_path)
+    report = {
+        "workbook": os.path.abspath(workbook_path),
+        "output": os.path.abspath(output) if output else None,
+        "validator": validator,
+        "status": STATUS_LABELS.get(status, str(status)),
+        "status_code": status,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "corrections": list(corrections),
+    }
+    if error:
+        report["error"] = str(error)
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    except OSError as e:
+        logging.error(f"Rapport de corrections non écrit ({path}) : {e}")
+        return None
+    logging.info(f"{validator} : {report['status']}, {len(report['corrections'])} correction(s) -> {path}")
+    return path
@@ -0,0 +1,270 @@
+"""
+Watcher Module
+Waits for workbooks to be saved without busy loops: Linux inotify (through ctypes,
+no extra dependency) when available, an mtime scan every poll_interval otherwise.
+
+    # revalidate each changed workbook once it has been quiet for 2 s
+    watch(["outputs/COMAR"], lambda path: validate(path), debounce=2.0)
+
+    # interactive loops: block until the user saved the file in Excel
+    wait_for_save("12NV2024.xlsx")
+
+Directories are watched, not files: Excel and LibreOffice save through a temporary
+file renamed over the workbook, which replaces the watched inode. Bursts of events
+(temp file, rename, lock file) are debounced per path. The files the handler writes
+(the workbook revalidated in place, its output) are remembered by (mtime, size), so
+the handler's own saves do not trigger another validation.
+"""
+import os
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:  # pragma: no cover - ctypes is missing on some minimal builds
+    ctypes = None
+
+
+WORKBOOK_SUFFIXES = (".xlsx", ".xlsm")
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (then len bytes of name)
+
+
+def is_workbook(path):
+    """True for .xlsx / .xlsm files, except Excel (~$) and LibreOffice (.~lock) lock files"""
+    name = os.path.basename(path)
+    return name.lower().endswith(WORKBOOK_SUFFIXES) and not name.startswith(("~$", ".~lock"))
+
+
+def signature(path):
+    """(mtime_ns, size) of a file, None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _split(paths):
+    """{directory: set of file names, empty = every file} of files / directories to watch"""
+    dirs = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            dirs[path] = set()
+        else:
+            names = dirs.setdefault(os.path.dirname(path), {os.path.basename(path)})
+            if names:
+                names.add(os.path.basename(path))
+    return dirs
+
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None and ctypes is not None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            _libc = libc if hasattr(libc, "inotify_init1") else False
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+def inotify_available():
+    return os.name == "posix" and _load_libc() is not None
+
+
+class InotifyWatcher:
+    """Changed files of the watched directories, from one inotify descriptor"""
+
+    def __init__(self, paths):
+        libc = _load_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify indisponible")
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._dirs = {}
+        self._names = _split(paths)
+        for directory in self._names:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                self.close()
+                raise OSError(err, f"inotify_add_watch {directory}")
+            self._dirs[wd] = directory
+
+    def read(self, timeout):
+        """Paths changed within timeout seconds (empty set on timeout)"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events lost: every watched file is a candidate
+                for directory, names in self._names.items():
+                    changed.update(os.path.join(directory, n) for n in (names or os.listdir(directory)))
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or mask & IN_IGNORED or not name:
+                continue
+            names = self._names[directory]
+            if not names or name in names:
+                changed.add(os.path.join(directory, name))
+        return changed
+
+    def close(self):
+        if self._fd is not None and self._fd >= 0:
+            os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PollingWatcher:
+    """Same interface as InotifyWatcher, by comparing (mtime, size) every poll_interval"""
+
+    def __init__(self, paths, poll_interval=1.0):
+        self._names = _split(paths)
+        self.poll_interval = poll_interval
+        self._seen = self._scan()
+
+    def _scan(self):
+        seen = {}
+        for directory, names in self._names.items():
+            try:
+                candidates = names or os.listdir(directory)
+            except OSError:
+                continue
+            for name in candidates:
+                path = os.path.join(directory, name)
+                sig = signature(path)
+                if sig is not None:
+                    seen[path] = sig
+        return seen
+
+    def read(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            time.sleep(max(0.0, min(self.poll_interval, deadline - time.monotonic())))
+            seen = self._scan()
+            changed = {path for path, sig in seen.items() if self._seen.get(path) != sig}
+            self._seen = seen
+            if changed or time.monotonic() >= deadline:
+                return changed
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def make_watcher(paths, poll_interval=1.0):
+    """InotifyWatcher on Linux, PollingWatcher elsewhere (or when inotify fails, e.g. watch limit)"""
+    if inotify_available():
+        try:
+            return InotifyWatcher(paths)
+        except OSError as e:
+            logging.warning(f"inotify indisponible ({e}), surveillance par scrutation")
+    return PollingWatcher(paths, poll_interval)
+
+
+def watch(paths, handler, debounce=1.0, match=is_workbook, stop=None, poll_interval=1.0):
+    """
+    Calls handler(path) for each changed file of paths (files or directories) once no
+    event came for debounce seconds. handler may return the paths it wrote: their
+    current state is not reported again. Runs until stop (threading.Event) is set.
+    """
+    stop = stop or threading.Event()
+    pending = {}   # path -> time of the last event
+    handled = {}   # path -> signature left by the handler
+    with make_watcher(paths, poll_interval) as watcher:
+        logging.info(f"Surveillance de {', '.join(os.path.abspath(p) for p in paths)} "
+                     f"({type(watcher).__name__}, debounce {debounce}s)")
+        while not stop.is_set():
+            now = time.monotonic()
+            timeout = min([debounce - (now - t) for t in pending.values()] + [1.0])
+            for path in watcher.read(max(0.0, timeout)):
+                if match is None or match(path):
+                    pending[path] = time.monotonic()
+
+            now = time.monotonic()
+            for path in [p for p, t in pending.items() if now - t >= debounce]:
+                del pending[path]
+                sig = signature(path)
+                if sig is None or handled.get(path) == sig:
+                    continue
+                try:
+                    written = handler(path) or ()
+                except Exception as e:
+                    logging.error(f"Erreur de validation pour {path} : {e}")
+                    written = ()
+                if isinstance(written, (str, os.PathLike)):
+                    written = (written,)
+                for out in {path, *map(os.fspath, written)}:
+                    handled[os.path.abspath(out)] = signature(out)
+
+
+def wait_for_save(path, timeout=None, debounce=0.5, poll_interval=1.0):
+    """
+    Blocks until path has been saved (its (mtime, size) changed and stayed the same for
+    debounce seconds). Returns False on timeout.
+    """
+    path = os.path.abspath(path)
+    initial = signature(path)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    changed_at = None
+    with make_watcher([path], poll_interval) as watcher:
+        while True:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return False
+            wait = 1.0 if changed_at is None else max(0.0, debounce - (now - changed_at))
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            if watcher.read(wait):
+                changed_at = time.monotonic()
+            elif changed_at is not None and time.monotonic() - changed_at >= debounce:
+                sig = signature(path)
+                if sig is not None and sig != initial:
+                    return True
+                changed_at = None
@@ -0,0 +1,64 @@
+"""
+Annexes 12/13 pipeline without a database (CMF_DB_BACKEND unset): the extraction,
+export and validation stages run, the database stages are skipped, not failed.
+PDF parsing, Excel export and NorVal are replaced by stubs.
+"""
+import pandas as pd
+import pytest
+
+E = pytest.importorskip("annexes1213.Extraction1213")
+
+from src.utils.pipeline import STATUS_OK, STATUS_SKIPPED
+
+
+@pytest.fixture
+def annexes(tmp_path, monkeypatch):
+    monkeypatch.delenv("CMF_DB_BACKEND", raising=False)
+    pdf_path = tmp_path / "etats_financiers_2024.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n%%EOF\n")
+    table = pd.DataFrame({"Libellé": ["Primes acquises", "Total"], "2024": ["1 234", "1 234"]})
+
+    def no_database():
+        raise AssertionError("connexion base sans CMF_DB_BACKEND")
+
+    monkeypatch.setattr(E, "create_cmf_database_and_table", no_database)
+    monkeypatch.setattr(E, "search_sections_in_pdf", lambda path: {"Annexe_12": (5, False)})
+    monkeypatch.setattr(E, "extract_native_pdf", lambda path, page: [("Tableau 1", table)])
+    monkeypatch.setattr(E, "export_to_excel",
+                        lambda tables, name, societe: (True, str(tmp_path / name)))
+    monkeypatch.setattr(E, "export_statement", lambda *args, **kwargs: None)
+    monkeypatch.setattr(E.NorVal12, "run_from_dataframe", lambda df, out_path, ann="12": 0)
+    monkeypatch.setattr(E, "_find_latest_nv_file", lambda folder, ann, year: None)
+    return {"societe": "STAR", "annee": 2024, "documents": None, "pdf_path": str(pdf_path),
+            "pdf_url": "https://www.cmf.tn/sites/default/files/star_2024.pdf",
+            "pdf_nom": "Etats financiers au 31/12/2024"}
+
+
+def test_database_stages_skipped_without_backend(annexes):
+    results = E.build_annexes_pipeline().run(annexes)
+
+    for name in ("document_record", "annexe12_db", "annexe13_db"):
+        assert results[name].status == STATUS_SKIPPED, name
+    assert results["document_record"].error == "DB désactivée"
+    for name in ("document", "sections", "annexe12_tables", "annexe12_excel", "annexe12_validation"):
+        assert results[name].status == STATUS_OK, name
+
+
+def test_run_annexes_succeeds_without_backend(annexes):
+    assert E.run_annexes(annexes["societe"], annexes["annee"], pdf_path=annexes["pdf_path"],
+                         pdf_url=annexes["pdf_url"], pdf_nom=annexes["pdf_nom"]) == 0
+
+
+@pytest.mark.parametrize("headless, opened", [("1", False), ("", True)])
+def test_nv_opened_in_excel_only_when_interactive(annexes, tmp_path, monkeypatch, headless, opened):
+    nv_path = tmp_path / "12NV2024.xlsx"
+    nv_path.write_bytes(b"")
+    calls = []
+    monkeypatch.setenv("CMF_HEADLESS", headless)
+    monkeypatch.setattr(E, "_find_latest_nv_file", lambda folder, ann, year: str(nv_path))
+    monkeypatch.setattr(E, "_open_in_excel_2010", lambda path: calls.append(path) or True)
+
+    results = E.build_annexes_pipeline().run(annexes)
+
+    assert results["annexe12_validation"].status == STATUS_OK
+    assert calls == ([str(nv_path)] if opened else [])
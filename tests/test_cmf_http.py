@@ -0,0 +1,190 @@
+"""
+CMF discovery against saved HTML pages of the listing, served by a local http.server:
+HTTP client, find_company_documents (with its Selenium fallback) and the catalog sync.
+"""
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from src.scraper import cmf_http, cmf_scraper
+from src.database.document_catalog import DocumentCatalog
+
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "cmf"
+LISTING_PATH = "/consultation-des-tats-financier-des-soci-t-s-faisant-ape"
+STAR = "Sté. TUNISIENNE D'ASSURANCES ET DE REASSURANCES - STAR -"
+
+
+class CmfHandler(SimpleHTTPRequestHandler):
+    """The exposed form without a company, the results pages (?page=N) once one is selected"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.requests.append(self.path)
+        if url.path != LISTING_PATH:
+            self.send_error(404)
+            return
+        if query.get("field_societesape_value", ["All"])[0] == "All":
+            name = "listing.html"
+        else:
+            name = self.server.results.format(page=query.get("page", ["0"])[0])
+        body = (FIXTURES / name).read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cmf_server():
+    servers = []
+
+    def start(results="results_page{page}.html"):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), CmfHandler)
+        server.results = results
+        server.requests = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        server.base_url = f"http://127.0.0.1:{server.server_port}{LISTING_PATH}"
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def requested_pages(server):
+    return {parse_qs(urlparse(path).query).get("page", ["0"])[0] for path in server.requests}
+
+
+class NoDriverPool:
+    def acquire(self, timeout=None):
+        raise AssertionError("Selenium ne doit pas être utilisé")
+
+
+def test_fetch_companies(cmf_server):
+    server = cmf_server()
+    assert cmf_http.fetch_companies(base_url=server.base_url) == [
+        STAR, "Sté. TUNISIENNE D'ASSURANCES - LLOYD TUNISIEN -", "SOTUVER"]
+
+
+def test_fetch_document_rows_walks_the_pager(cmf_server):
+    server = cmf_server()
+    label, rows = cmf_http.fetch_document_rows("star", base_url=server.base_url)
+    assert label == STAR
+    assert [name for _, name in rows] == [
+        "Etats financiers au 31/12/2024", "Etats financiers consolidés au 31/12/2024",
+        "Etats financiers au 31/12/2023", "Etats financiers au 31/12/2022", "Rapport du conseil"]
+    assert rows[0][0] == f"http://127.0.0.1:{server.server_port}/sites/default/files/etats/STAR_EF_2024.pdf"
+    assert requested_pages(server) == {"0", "1"}
+
+
+def test_find_company_documents_over_http(cmf_server, monkeypatch, capsys):
+    server = cmf_server()
+    monkeypatch.setattr(cmf_scraper, "get_driver_pool", NoDriverPool)
+    societe, documents = cmf_scraper.find_company_documents("STAR", base_url=server.base_url)
+    assert societe == STAR
+    assert "DEBUG" not in capsys.readouterr().out
+    # The row without a year is dropped
+    assert [(d["annee"], d["nom"]) for d in documents] == [
+        ("2024", "Etats financiers au 31/12/2024"), ("2024", "Etats financiers consolidés au 31/12/2024"),
+        ("2023", "Etats financiers au 31/12/2023"), ("2022", "Etats financiers au 31/12/2022")]
+    assert all(d["societe"] == STAR for d in documents)
+
+
+def test_unknown_company(cmf_server, monkeypatch):
+    server = cmf_server()
+    monkeypatch.setattr(cmf_scraper, "get_driver_pool", NoDriverPool)
+    assert cmf_scraper.find_company_documents("INCONNUE", base_url=server.base_url) == (None, [])
+
+
+def test_no_listing_rows_falls_back_to_selenium(cmf_server, monkeypatch):
+    server = cmf_server(results="results_changed_markup.html")
+    calls = []
+
+    class FakePool:
+        def acquire(self, timeout=None):
+            return "driver"
+
+        def release(self, driver):
+            calls.append("release")
+
+    def fake_companies(driver, base_url):
+        calls.append(("companies", base_url))
+        return [STAR]
+
+    def fake_submit(driver, company, base_url):
+        calls.append(("submit", company))
+        return True
+
+    document = {"url": "http://x/STAR_EF_2024.pdf", "nom": "Etats financiers au 31/12/2024",
+                "annee": "2024", "societe": STAR}
+    monkeypatch.setattr(cmf_scraper, "get_driver_pool", FakePool)
+    monkeypatch.setattr(cmf_scraper, "get_all_companies", fake_companies)
+    monkeypatch.setattr(cmf_scraper, "select_company_and_submit", fake_submit)
+    monkeypatch.setattr(cmf_scraper, "scrape_document_list", lambda driver, company: [document])
+
+    assert cmf_scraper.find_company_documents("STAR", base_url=server.base_url) == (STAR, [document])
+    assert calls == [("companies", server.base_url), ("submit", STAR), "release"]
+
+
+@pytest.mark.parametrize("wanted, expected", [
+    ("comar", "COMAR"),
+    (" Comar Vie ", "COMAR VIE"),
+    ("assurances comar", "ASSURANCES COMAR VIE"),
+    ("GAT", None),
+])
+def test_match_company_exact_then_partial(wanted, expected):
+    assert cmf_http.match_company(["ASSURANCES COMAR VIE", "COMAR VIE", "COMAR"], wanted) == expected
+
+
+def test_selenium_fallback_resolves_like_http(cmf_server, monkeypatch):
+    # "COMAR" also appears in "COMAR VIE", listed first: the exact label wins on both paths
+    server = cmf_server(results="results_changed_markup.html")
+    submitted = []
+
+    class FakePool:
+        def acquire(self, timeout=None):
+            return "driver"
+
+        def release(self, driver):
+            pass
+
+    monkeypatch.setattr(cmf_http, "fetch_document_rows", lambda name, session, base_url: ("COMAR", []))
+    monkeypatch.setattr(cmf_scraper, "get_driver_pool", FakePool)
+    monkeypatch.setattr(cmf_scraper, "get_all_companies", lambda driver, base_url: ["COMAR VIE", "COMAR"])
+    monkeypatch.setattr(cmf_scraper, "select_company_and_submit",
+                        lambda driver, company, base_url: submitted.append(company) or True)
+    monkeypatch.setattr(cmf_scraper, "scrape_document_list", lambda driver, company: [])
+
+    assert cmf_scraper.find_company_documents("comar", base_url=server.base_url) == ("COMAR", [])
+    assert submitted == ["COMAR"]
+
+
+def test_sync_stops_at_known_documents(cmf_server, tmp_path):
+    server = cmf_server()
+    catalog = DocumentCatalog(tmp_path / "catalog.sqlite")
+    try:
+        societe, new = cmf_scraper.sync_company_documents("STAR", catalog, fetch_validators=False,
+                                                          base_url=server.base_url)
+        assert societe == STAR
+        assert sorted(d["annee"] for d in new) == ["2022", "2023", "2024", "2024"]
+        assert len(catalog.pending_database(STAR)) == 4
+
+        server.requests.clear()
+        societe, new = cmf_scraper.sync_company_documents("STAR", catalog, fetch_validators=False,
+                                                          base_url=server.base_url)
+        assert new == []
+        # First results page already known: page 2 is not fetched
+        assert requested_pages(server) == {"0"}
+    finally:
+        catalog.close()
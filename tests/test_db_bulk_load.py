@@ -0,0 +1,109 @@
+"""
+Bulk loading of several extraction jobs through the SQLite stand-in of the database:
+row counts, re-runs replacing rows, one transaction per batch.
+"""
+import pytest
+
+from src.database import db_manager
+
+
+def passif(n):
+    return [
+        {"level": 1, "code": f"CP{i}", "description": f"Ligne {i}", "is_total": False,
+         "category": "CAPITAUX PROPRES", "subcategory": None, "values": [1000 * i, 900 * i]}
+        for i in range(1, n + 1)
+    ]
+
+
+def actif(n):
+    return [{"DESIGNATION": f"AC{i} Actif {i}", "BRUT": f"{i} 000", "AMORT_PROV": float("nan"),
+             "NET_N": 1000.0 * i, "NET_N1": None} for i in range(1, n + 1)]
+
+
+def extraction(societe, annee, n_passif=3, n_actif=2):
+    return {
+        "societe": societe,
+        "document": {"nom": f"Etats financiers au 31/12/{annee}", "annee": annee,
+                     "url": f"https://www.cmf.tn/sites/default/files/{societe}_{annee}.pdf"},
+        "passif": passif(n_passif),
+        "actif": actif(n_actif) if n_actif else None,
+    }
+
+
+class CountingConnection:
+    """Pooled connection wrapper counting commits"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+        self.connection.commit()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+@pytest.fixture
+def database(tmp_path):
+    connection, cursor = db_manager.create_sqlite_database(str(tmp_path / "cmf.db"))
+    yield CountingConnection(connection), cursor
+    cursor.close()
+    connection.close()
+
+
+def table_count(cursor, table):
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def test_loads_several_documents_in_one_transaction(database):
+    connection, cursor = database
+    batch = [extraction("STAR", 2023), extraction("STAR", 2024, n_passif=4),
+             extraction("LLOYD", 2024, n_actif=0)]
+
+    assert db_manager.bulk_load_extractions(connection, batch) == 3
+    assert connection.commits == 1
+    assert table_count(cursor, "document") == 3
+    assert table_count(cursor, "financial_data_capitaux_passifs") == 10
+    assert table_count(cursor, "financial_data_actif") == 4
+
+    doc_id = db_manager.get_document_id(cursor, "STAR", "Etats financiers au 31/12/2024", 2024)
+    cursor.execute("SELECT value_brut, value_amort_prov FROM financial_data_actif "
+                   "WHERE document_id = ? ORDER BY code", (doc_id,))
+    assert cursor.fetchall() == [(1000, None), (2000, None)]
+
+
+def test_reload_replaces_the_rows_of_the_documents(database):
+    connection, cursor = database
+    db_manager.bulk_load_extractions(connection, [extraction("STAR", 2023), extraction("STAR", 2024)])
+
+    assert db_manager.bulk_load_extractions(connection, [extraction("STAR", 2024, n_passif=1)]) == 1
+    assert table_count(cursor, "document") == 2
+    assert table_count(cursor, "financial_data_capitaux_passifs") == 4
+    assert table_count(cursor, "financial_data_actif") == 4
+
+
+def test_failing_document_rolls_back_the_whole_batch(database):
+    connection, cursor = database
+    broken = extraction("LLOYD", 2024)
+    del broken["passif"][0]["code"]
+
+    assert db_manager.bulk_load_extractions(connection, [extraction("STAR", 2024), broken]) is None
+    assert connection.commits == 0
+    assert table_count(cursor, "document") == 0
+    assert table_count(cursor, "financial_data_capitaux_passifs") == 0
+    assert table_count(cursor, "financial_data_actif") == 0
+
+
+def test_bulk_insert_passif_of_existing_documents(database):
+    connection, cursor = database
+    db_manager.bulk_load_extractions(connection, [extraction("STAR", 2023), extraction("STAR", 2024)])
+    cursor.execute("SELECT id FROM document ORDER BY id")
+    doc_ids = [row[0] for row in cursor.fetchall()]
+
+    assert db_manager.bulk_insert_financial_data_capitaux_passifs(
+        connection, [(doc_id, passif(5)) for doc_id in doc_ids]) == 10
+    assert connection.commits == 2
+    assert table_count(cursor, "financial_data_capitaux_passifs") == 10
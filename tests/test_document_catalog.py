@@ -0,0 +1,46 @@
+"""
+Catalog marking after a successful batch job: explicit jobs (batch_main --job) carry
+the user's spelling of the company, resolved to the CMF label like the dropdown.
+"""
+import pytest
+
+from src.database.document_catalog import DocumentCatalog
+
+
+STAR = "Sté. TUNISIENNE D'ASSURANCES ET DE REASSURANCES - STAR -"
+STAR_VIE = "STAR VIE"
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = DocumentCatalog(tmp_path / "catalog.sqlite")
+    for societe, annee in ((STAR, 2024), (STAR, 2023), (STAR_VIE, 2024)):
+        catalog.add({"url": f"https://www.cmf.tn/files/{societe[-6:]}_{annee}.pdf",
+                     "societe": societe, "nom": f"Etats financiers au 31/12/{annee}", "annee": annee})
+    yield catalog
+    catalog.close()
+
+
+def pending(catalog):
+    return sorted((d["societe"], d["annee"]) for d in catalog.pending_database())
+
+
+@pytest.mark.parametrize("typed", [STAR, STAR.lower(), "reassurances - star"])
+def test_mark_year_resolves_the_typed_company(catalog, typed):
+    assert catalog.mark_year_in_database(typed, 2024) == 1
+    assert pending(catalog) == sorted([(STAR, 2023), (STAR_VIE, 2024)])
+
+
+def test_exact_label_wins_over_partial_match(catalog):
+    # "ASSURANCES STAR VIE" sorts first and contains "star vie": the exact label wins
+    catalog.add({"url": "https://www.cmf.tn/files/ASV_2024.pdf", "societe": "ASSURANCES STAR VIE",
+                 "nom": "Etats financiers au 31/12/2024", "annee": 2024})
+    assert catalog.resolve_societe("star vie") == STAR_VIE
+    assert catalog.mark_year_in_database("Star Vie", 2024) == 1
+    assert ("ASSURANCES STAR VIE", 2024) in pending(catalog)
+    assert (STAR_VIE, 2024) not in pending(catalog)
+
+
+def test_unknown_company_marks_nothing(catalog):
+    assert catalog.mark_year_in_database("GAT", 2024) == 0
+    assert len(pending(catalog)) == 3
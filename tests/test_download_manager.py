@@ -0,0 +1,141 @@
+"""
+DownloadManager against a local http.server: Range resume of a .part file, restart
+from zero on a Content-Range mismatch, retry with backoff on 5xx, rejection of
+truncated PDFs and of HTML pages served with a 200.
+"""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.scraper import download_manager
+from src.scraper.download_manager import DownloadManager, read_checksum
+
+
+PDF = b"%PDF-1.4\n" + b"".join(b"%d 0 obj << /Page %d >> endobj\n" % (i, i) for i in range(2000)) + b"%%EOF\n"
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves server.responses in order (the last one is repeated); a response is a
+    (status, body, headers) tuple or "range" to honour the Range header"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get("Range"))
+        response = server.responses[min(len(server.requests), len(server.responses)) - 1]
+        if response == "range":
+            response = self._range(server.content)
+        status, body, headers = response
+        self.send_response(status)
+        for name, value in {"Content-Length": str(len(body)), **headers}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _range(self, content):
+        requested = self.headers.get("Range")
+        if not requested:
+            return 200, content, {"Content-Type": "application/pdf"}
+        start = int(requested.split("=")[1].rstrip("-"))
+        return 206, content[start:], {"Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"}
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = []
+    httpd.responses = ["range"]
+    httpd.content = PDF
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/rapport.pdf"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(download_manager.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.fixture
+def manager():
+    manager = DownloadManager(max_workers=1, retries=2, backoff=0.5, timeout=(5, 5))
+    yield manager
+    manager.session.close()
+
+
+def assert_downloaded(dest):
+    with open(dest, "rb") as f:
+        assert f.read() == PDF
+    assert read_checksum(str(dest)) == hashlib.sha256(PDF).hexdigest()
+    assert not (dest.parent / (dest.name + ".part")).exists()
+
+
+def test_resumes_from_part_file(server, manager, tmp_path):
+    dest = tmp_path / "STAR_2024.pdf"
+    (tmp_path / "STAR_2024.pdf.part").write_bytes(PDF[:5000])
+
+    assert manager.download(server.url, str(dest)) == str(dest)
+    assert server.requests == ["bytes=5000-"]
+    assert_downloaded(dest)
+
+
+def test_content_range_mismatch_restarts_from_zero(server, manager, tmp_path, sleeps):
+    dest = tmp_path / "STAR_2024.pdf"
+    (tmp_path / "STAR_2024.pdf.part").write_bytes(PDF[:5000])
+    # Asked for bytes=5000-, the server sends the file from the start anyway
+    wrong = (206, PDF, {"Content-Range": f"bytes 0-{len(PDF) - 1}/{len(PDF)}"})
+    server.responses = [wrong, "range"]
+
+    assert manager.download(server.url, str(dest)) == str(dest)
+    assert server.requests == ["bytes=5000-", None]
+    assert sleeps == [0.5]
+    assert_downloaded(dest)
+
+
+def test_retries_5xx_with_exponential_backoff(server, manager, tmp_path, sleeps):
+    dest = tmp_path / "STAR_2024.pdf"
+    unavailable = (503, b"Service Unavailable", {})
+    server.responses = [unavailable, unavailable, "range"]
+
+    assert manager.download(server.url, str(dest)) == str(dest)
+    assert len(server.requests) == 3
+    assert sleeps == [0.5, 1.0]
+    assert_downloaded(dest)
+
+
+def test_gives_up_after_the_last_retry(server, manager, tmp_path, sleeps):
+    server.responses = [(502, b"Bad Gateway", {})]
+
+    assert manager.download(server.url, str(tmp_path / "STAR_2024.pdf")) is None
+    assert len(server.requests) == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_rejects_truncated_pdf_without_eof(server, manager, tmp_path, sleeps):
+    dest = tmp_path / "STAR_2024.pdf"
+    server.content = PDF[:-len(b"%%EOF\n")]
+
+    assert manager.download(server.url, str(dest)) is None
+    assert len(server.requests) == 3
+    assert server.requests == [None, None, None]  # the bad .part is not resumed
+    assert not dest.exists()
+    assert not (tmp_path / "STAR_2024.pdf.part").exists()
+
+
+def test_rejects_html_page_served_as_200(server, manager, tmp_path, sleeps):
+    dest = tmp_path / "STAR_2024.pdf"
+    server.responses = [(200, b"<html><body>Erreur</body></html>", {"Content-Type": "text/html"})]
+
+    assert manager.download(server.url, str(dest)) is None
+    assert len(server.requests) == 1
+    assert sleeps == []
+    assert not dest.exists()
@@ -0,0 +1,48 @@
+"""
+Amount parsing of src.utils.numbers and its helpers: the OCR'd passif rows
+(extract_trailing_numbers) and B.py read "." as a thousands separator.
+"""
+import numpy as np
+import pytest
+
+from src.utils.helpers import extract_trailing_numbers
+from src.utils.numbers import parse_number, parse_numbers
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Dettes 50.000", ("Dettes", [50000.0])),
+    ("Résultat 1 234.567", ("Résultat", [1234567.0])),
+    ("Capital social 50 000 000", ("Capital social", [50000000.0])),
+    ("Réserves 1.234,5", ("Réserves", [1234.5])),
+    ("Résultat (1.234)", ("Résultat (1.234)", [])),
+    ("Capitaux propres", ("Capitaux propres", [])),
+])
+def test_extract_trailing_numbers_dot_thousands(text, expected):
+    assert extract_trailing_numbers(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("50.000", 50000.0),
+    ("1 234.567", 1234567.0),
+    ("(1.234)", -1234.0),
+    ("12,5", 12.5),
+    ("1.234.567,89", 1234567.89),
+])
+def test_parse_number_dot_thousands(text, expected):
+    assert parse_number(text, dot_thousands=True) == expected
+
+
+def test_parse_number_default_keeps_single_dot_decimal():
+    assert parse_number("50.000") == 50.0
+    assert parse_number("(1.234)") == -1.234
+    assert parse_number("1.234.567") == 1234567.0
+
+
+def test_parse_numbers_search_dot_thousands():
+    # B.validate_excel: first amount of cells with letters / symbols, vectorized and regex paths
+    texts = np.array(["50.000", "1 234.567", "(1.234)", "1.234 DT", "Total : 9.999.999 a", None], dtype=object)
+    values, parsed = parse_numbers(texts, search=True, dot_thousands=True)
+    assert parsed.tolist() == [True, True, True, True, True, False]
+    assert values[:5].tolist() == [50000.0, 1234567.0, -1234.0, 1234.0, 9999999.0]
+    for text, value in zip(texts[:5], values[:5]):
+        assert parse_number(text, search=True, dot_thousands=True) == value
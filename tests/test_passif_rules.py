@@ -0,0 +1,102 @@
+"""
+Table-driven checks of the passif row classifier (src.extraction.passif_rules), on
+representative rows: title, sections, totals, CP1-CP6, PA codes, value-only rows and
+OCR rows whose amounts are glued to the description.
+"""
+import pytest
+
+from src.extraction.passif_rules import classify, match_rule, tokenize_row
+
+
+# (row, current section) -> (rule, (level, code, description, is_total, category, subcategory, extra_values))
+CASES = [
+    (["CAPITAUX PROPRES ET LE PASSIF", "", ""], None,
+     "title", (0, "", "CAPITAUX PROPRES ET LE PASSIF", False, "TITRE", "", [])),
+    (["CAPITAUX PROPRES", ""], None,
+     "section", (1, "", "CAPITAUX PROPRES", False, "SECTION", "CAPITAUX PROPRES", [])),
+    (["PASSIF:", ""], "CAPITAUX PROPRES",
+     "section", (1, "", "PASSIF:", False, "SECTION", "PASSIF", [])),
+
+    # Totals: first TOTAL_RULES match, else a level 3 total of the current section
+    (["TOTAL DES CAPITAUX PROPRES ET DU PASSIF", "98 765 432", "87 654 321"], "PASSIF",
+     "total", (1, "", "TOTAL DES CAPITAUX PROPRES ET DU PASSIF", True, "TOTAL GÉNÉRAL", "", [])),
+    (["Total capitaux propres avant résultat", "12 345 678", "11 000 000"], "CAPITAUX PROPRES",
+     "total", (2, "", "Total capitaux propres avant résultat", True, "TOTAL",
+               "Capitaux Propres - Avant Résultat", [])),
+    (["Total capitaux propres avant affectation", "13 000 000"], "CAPITAUX PROPRES",
+     "total", (2, "", "Total capitaux propres avant affectation", True, "TOTAL",
+               "Capitaux Propres - Avant Affectation", [])),
+    (["Total du passif", "1 000"], "PASSIF",
+     "total", (2, "", "Total du passif", True, "TOTAL", "Total Passif", [])),
+    (["Total des provisions techniques", "4 321"], "PASSIF",
+     "total", (3, "", "Total des provisions techniques", True, "TOTAL", "PASSIF", [])),
+
+    # CP1-CP6: level 2, subcategory from the code
+    (["CP1", "Capital social", "50 000 000", "50 000 000"], "CAPITAUX PROPRES",
+     "code", (2, "CP1", "Capital social", False, "CAPITAUX PROPRES", "Capital social", [])),
+    (["CP2", "Réserves et primes liées au capital", "1 234"], "CAPITAUX PROPRES",
+     "code", (2, "CP2", "Réserves et primes liées au capital", False, "CAPITAUX PROPRES",
+              "Réserves et primes", [])),
+    (["CP3", "Rachat d'actions propres", "(56)"], "CAPITAUX PROPRES",
+     "code", (2, "CP3", "Rachat d'actions propres", False, "CAPITAUX PROPRES", "Rachat d'actions", [])),
+    (["CP4", "Autres capitaux propres", "-"], "CAPITAUX PROPRES",
+     "code", (2, "CP4", "Autres capitaux propres", False, "CAPITAUX PROPRES", "Autres capitaux propres", [])),
+    (["CP5", "Résultats reportés", "7 890"], "CAPITAUX PROPRES",
+     "code", (2, "CP5", "Résultats reportés", False, "CAPITAUX PROPRES", "Résultat reporté", [])),
+    (["CP6", "Résultat de l'exercice", "2 345 678"], "CAPITAUX PROPRES",
+     "code", (2, "CP6", "Résultat de l'exercice", False, "CAPITAUX PROPRES", "Résultat de l'exercice", [])),
+
+    # PA codes: parents level 2, children level 3
+    (["PA3", "Provisions techniques brutes", "1 234"], "PASSIF",
+     "code", (2, "PA3", "Provisions techniques brutes", False, "PASSIF", "Provisions techniques brutes", [])),
+    (["PA310", "Provision pour primes non acquises", "56"], "PASSIF",
+     "code", (3, "PA310", "Provision pour primes non acquises", False, "PASSIF",
+              "Provisions techniques brutes", [])),
+    (["PA6", ""], "PASSIF",
+     "code_alone", (2, "PA6", "", False, "PASSIF", "", [])),
+    # Description rows read the first two columns: an amount in the second is an extra value
+    (["Dettes nées d'opérations de réassurance", "321"], "PASSIF",
+     "description", (2, "", "Dettes nées d'opérations de réassurance", False, "PASSIF", "", [321.0])),
+    (["Autres passifs financiers", ""], None,
+     "description", (2, "", "Autres passifs financiers", False, "AUTRE", "", [])),
+
+    # OCR rows: the whole line in one cell, amounts at the end ("." groups thousands)
+    (["CP6 Résultat de l'exercice 1.234.567", ""], "CAPITAUX PROPRES",
+     "code", (2, "CP6", "Résultat de l'exercice", False, "CAPITAUX PROPRES", "Résultat de l'exercice",
+              [1234567.0])),
+    (["CP1 Capital social 50 000 000", ""], "CAPITAUX PROPRES",
+     "code", (2, "CP1", "Capital social", False, "CAPITAUX PROPRES", "Capital social", [50000000.0])),
+    (["PA5 Dettes pour dépôts en espèces 50.000", ""], "PASSIF",
+     "code", (2, "PA5", "Dettes pour dépôts en espèces", False, "PASSIF", "Dettes pour dépôts", [50000.0])),
+    (["Total du passif 1 234.567", ""], "PASSIF",
+     "total", (2, "", "Total du passif", True, "TOTAL", "Total Passif", [1234567.0])),
+    (["Dettes envers les cessionnaires 50.000", ""], "PASSIF",
+     "description", (2, "", "Dettes envers les cessionnaires", False, "PASSIF", "", [50000.0])),
+    (["TOTAL DES CAPITAUX PROPRES ET DU PASSIF 123.456.789", ""], "PASSIF",
+     "total", (1, "", "TOTAL DES CAPITAUX PROPRES ET DU PASSIF", True, "TOTAL GÉNÉRAL", "", [123456789.0])),
+]
+
+
+@pytest.mark.parametrize("row, section, rule_name, expected", CASES,
+                         ids=[f"{case[2]}:{case[0][0][:30]}" for case in CASES])
+def test_classify(row, section, rule_name, expected):
+    tokens = tokenize_row(row)
+    rule, _ = match_rule(tokens)
+    assert rule.name == rule_name
+    assert classify(tokens, section) == expected
+
+
+@pytest.mark.parametrize("row", [
+    ["1 234", "5 678"],          # amounts only: attributed in post-processing
+    ["PA3", "1 234", "987"],     # parent code + amounts
+    ["", "", ""],
+])
+def test_value_only_and_blank_rows(row):
+    assert classify(tokenize_row(row), "PASSIF") is None
+
+
+def test_tokens_type_each_cell_once():
+    tokens = tokenize_row(["CP1", "Capital social", "50 000 000", "(1 234)", "-"])
+    assert tokens.amounts() == [50000000, -1234]
+    assert tokens.full_text == "CP1 Capital social -"
+    assert not tokens.is_value_only
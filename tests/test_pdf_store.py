@@ -0,0 +1,52 @@
+"""
+PdfStore imports: a file imported without move stays the caller's (own inode, still
+writable); the stored object keeps the content it was indexed with.
+"""
+import os
+import stat
+
+import pytest
+
+from src.utils.helpers import file_sha256
+from src.utils.pdf_store import PdfStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PdfStore(tmp_path / "store")
+    yield store
+    store.connection.close()
+
+
+@pytest.fixture
+def legacy_pdf(tmp_path):
+    path = tmp_path / "legacy" / "STAR_2023.pdf"
+    path.parent.mkdir()
+    path.write_bytes(b"%PDF-1.4\nrapport STAR 2023\n%%EOF\n")
+    return path
+
+
+def test_import_copies_and_leaves_the_source_writable(store, legacy_pdf):
+    sha256 = file_sha256(str(legacy_pdf))
+    object_path = store.add_file(str(legacy_pdf))
+
+    assert not os.path.samefile(object_path, legacy_pdf)
+    assert legacy_pdf.stat().st_mode & stat.S_IWUSR
+    assert store.lookup("STAR_2023.pdf") == object_path
+    assert list(store.incoming_dir.iterdir()) == []
+
+    # Writing to the legacy file no longer changes the content-addressed object
+    legacy_pdf.write_bytes(b"%PDF-1.4\nmodifie\n%%EOF\n")
+    assert file_sha256(object_path) == sha256
+
+
+def test_import_directory_keeps_the_sources(store, legacy_pdf):
+    assert store.import_directory(str(legacy_pdf.parent)) == 1
+    assert legacy_pdf.exists()
+
+
+def test_move_removes_the_source(store, legacy_pdf):
+    object_path = store.add_file(str(legacy_pdf), move=True)
+
+    assert not legacy_pdf.exists()
+    assert os.path.basename(object_path) == f"{file_sha256(object_path)}.pdf"
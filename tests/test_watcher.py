@@ -0,0 +1,217 @@
+"""
+Workbook watcher in a temp directory, with PollingWatcher and InotifyWatcher (when the
+platform has it): bursts of saves debounced into one validation, the handler's own
+writes not reported again, IN_Q_OVERFLOW and the polling fallback; plus the routing
+and error report of validation_service.
+"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.utils import watcher
+from src.utils.validation_report import STATUS_ERROR, STATUS_VALID, report_path
+
+
+DEBOUNCE = 0.3
+POLL = 0.05
+
+BACKENDS = ["polling", pytest.param("inotify", marks=pytest.mark.skipif(
+    not watcher.inotify_available(), reason="inotify indisponible"))]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    if request.param == "polling":
+        monkeypatch.setattr(watcher, "inotify_available", lambda: False)
+    return request.param
+
+
+class Watching:
+    """watch() on a thread; handler calls recorded as (path, time)"""
+
+    def __init__(self, paths, handler):
+        self.calls = []
+        self.stop = threading.Event()
+
+        def record(path):
+            self.calls.append((path, time.monotonic()))
+            return handler(path)
+
+        self.thread = threading.Thread(target=watcher.watch, args=(paths, record),
+                                       kwargs={"debounce": DEBOUNCE, "stop": self.stop, "poll_interval": POLL},
+                                       daemon=True)
+        self.thread.start()
+        time.sleep(0.2)  # watcher set up before the first write
+
+    def paths(self):
+        return [path for path, _ in self.calls]
+
+    def close(self):
+        self.stop.set()
+        self.thread.join(5)
+
+
+def save(path, content):
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def settle():
+    time.sleep(DEBOUNCE * 4)
+
+
+def test_burst_of_saves_debounced_into_one_call(tmp_path, backend):
+    workbook = tmp_path / "12NV2024.xlsx"
+    session = Watching([str(tmp_path)], lambda path: None)
+    try:
+        last_write = None
+        for i in range(4):
+            save(workbook, b"version %d" % i)
+            last_write = time.monotonic()
+            time.sleep(DEBOUNCE / 4)
+        save(tmp_path / "~$12NV2024.xlsx", b"lock")  # Excel lock file: ignored
+        save(tmp_path / "notes.txt", b"texte")
+        settle()
+    finally:
+        session.close()
+
+    assert session.paths() == [str(workbook)]
+    assert session.calls[0][1] - last_write >= DEBOUNCE * 0.9
+
+
+def test_handler_writes_do_not_trigger_another_validation(tmp_path, backend):
+    workbook = tmp_path / "12E2024.xlsx"
+    output = tmp_path / "12NV2024.xlsx"
+
+    def validate(path):
+        # Revalidated in place, and a normalized copy written next to it
+        save(path, open(path, "rb").read() + b" corrige")
+        save(output, b"normalise")
+        return [str(output)]
+
+    session = Watching([str(tmp_path)], validate)
+    try:
+        save(workbook, b"saisie")
+        settle()
+        assert session.paths() == [str(workbook)]
+
+        # A real save by the user is validated again
+        save(workbook, b"nouvelle saisie")
+        settle()
+    finally:
+        session.close()
+
+    assert session.paths() == [str(workbook), str(workbook)]
+
+
+def test_watch_single_file(tmp_path, backend):
+    workbook = tmp_path / "output_STAR.xlsx"
+    other = tmp_path / "output_COMAR.xlsx"
+    save(workbook, b"initial")
+    session = Watching([str(workbook)], lambda path: None)
+    try:
+        save(other, b"autre")
+        save(workbook, b"sauve")
+        settle()
+    finally:
+        session.close()
+
+    assert session.paths() == [str(workbook)]
+
+
+@pytest.mark.skipif(not watcher.inotify_available(), reason="inotify indisponible")
+def test_inotify_queue_overflow_reports_every_file(tmp_path, monkeypatch):
+    for name in ("a.xlsx", "b.xlsx"):
+        save(tmp_path / name, b"x")
+    overflow = watcher._EVENT.pack(-1, watcher.IN_Q_OVERFLOW, 0, 0)
+    with watcher.InotifyWatcher([str(tmp_path)]) as w:
+        with monkeypatch.context() as m:
+            m.setattr(watcher.select, "select", lambda r, w_, x, timeout: (r, [], []))
+            m.setattr(watcher.os, "read", lambda fd, size: overflow)
+            changed = w.read(0.1)
+
+    assert changed == {str(tmp_path / "a.xlsx"), str(tmp_path / "b.xlsx")}
+
+
+def test_polling_fallback_when_inotify_fails(tmp_path, monkeypatch):
+    def failing(paths):
+        raise OSError(28, "inotify watch limit")
+
+    monkeypatch.setattr(watcher, "inotify_available", lambda: True)
+    monkeypatch.setattr(watcher, "InotifyWatcher", failing)
+    with watcher.make_watcher([str(tmp_path)], poll_interval=POLL) as w:
+        assert isinstance(w, watcher.PollingWatcher)
+        save(tmp_path / "13NV2024.xlsx", b"x")
+        assert w.read(1.0) == {str(tmp_path / "13NV2024.xlsx")}
+
+
+def test_wait_for_save(tmp_path, backend):
+    workbook = tmp_path / "13NV2024.xlsx"
+    save(workbook, b"initial")
+    timer = threading.Timer(0.2, save, args=(workbook, b"sauve dans Excel"))
+    timer.start()
+    try:
+        assert watcher.wait_for_save(str(workbook), timeout=5, debounce=0.2, poll_interval=POLL)
+    finally:
+        timer.join()
+    assert not watcher.wait_for_save(str(workbook), timeout=0.5, debounce=0.2, poll_interval=POLL)
+
+
+# ------------------------------------------------ validation_service
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    # The service forces CMF_HEADLESS=1 on import: restored after the test
+    monkeypatch.setenv("CMF_HEADLESS", "1")
+    monkeypatch.chdir(tmp_path)
+    import validation_service
+    return validation_service
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("12E2024.xlsx", ("annexe12", "E")),
+    ("13nv2023.xlsx", ("annexe13", "NV")),
+    ("STAR_13NV2024_20250101.xlsx", ("annexe13", "NV")),
+    ("output_STAR.xlsx", ("technique", None)),
+    ("1213E2024.xlsx", ("technique", None)),
+])
+def test_route(service, name, expected):
+    assert service.route(name) == expected
+
+
+def test_validation_error_writes_a_report(service, tmp_path, monkeypatch):
+    from annexes1213 import NorVal12
+
+    def broken(path, annexe_num=None):
+        raise ValueError("classeur illisible")
+
+    workbook = tmp_path / "12NV2024.xlsx"
+    save(workbook, b"pas un xlsx")
+    monkeypatch.setattr(NorVal12, "validate_headless", broken)
+
+    assert service.validate_workbook(str(workbook)) == (STATUS_ERROR, [])
+    with open(report_path(str(workbook)), encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["status_code"] == STATUS_ERROR
+    assert report["error"] == "classeur illisible"
+
+
+def test_service_handler_output_not_revalidated(service, tmp_path, monkeypatch, backend):
+    # 12E -> 12NV normalization: the NV written by the handler is not validated on its own
+    def normalize_and_validate(path):
+        nv_path = os.path.join(os.path.dirname(path), "12NV2024.xlsx")
+        save(nv_path, b"normalise")
+        return STATUS_VALID, [nv_path]
+
+    monkeypatch.setattr(service, "validate_workbook", normalize_and_validate)
+    session = Watching([str(tmp_path)], service._handle)
+    try:
+        save(tmp_path / "12E2024.xlsx", b"extrait")
+        settle()
+    finally:
+        session.close()
+
+    assert session.paths() == [str(tmp_path / "12E2024.xlsx")]
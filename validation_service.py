@@ -0,0 +1,109 @@
+"""
+Headless Validation Service
+Validates the Excel workbooks without Excel or Ctrl+S: one pass per workbook, a
+corrections report next to it (<workbook>.corrections.json) and a status code
+(0 valide, 1 invalide, 2 erreur). With --watch, every workbook saved in the watched
+folders is revalidated on its own (inotify on Linux, debounced), so corrections made
+on a server share are processed as they arrive.
+
+Routing by file name:
+    12E2024.xlsx / 13E2024.xlsx    normalized (NorVal12 / NorVal13) into 12NV / 13NV, then validated
+    12NV2024.xlsx / 13NV2024.xlsx  revalidated in place (NorVal12 / NorVal13)
+    other .xlsx                    technical result revalidated by B.py (output_<nom>.xlsx)
+
+Exemples :
+    python validation_service.py output_STAR.xlsx COMAR/12NV2024.xlsx
+    python validation_service.py --watch outputs/COMAR --watch . --debounce 2
+"""
+import os
+import re
+import sys
+import logging
+import argparse
+
+os.environ["CMF_HEADLESS"] = "1"
+
+from src.utils.validation_report import STATUS_ERROR, STATUS_LABELS, write_corrections_report
+from src.utils.watcher import is_workbook, watch
+
+
+_ANNEXE_RE = re.compile(r"(?:^|[^0-9])(12|13)(E|NV)(20\d{2})", re.IGNORECASE)
+
+
+def route(path):
+    """("annexe12" | "annexe13" | "technique", "E" | "NV" | None) d'un classeur"""
+    m = _ANNEXE_RE.search(os.path.basename(path))
+    if m:
+        return f"annexe{m.group(1)}", m.group(2).upper()
+    return "technique", None
+
+
+def validate_workbook(path):
+    """Une passe headless ; retourne (code, fichiers écrits)"""
+    path = os.path.abspath(path)
+    kind, stage = route(path)
+    try:
+        if kind == "technique":
+            import B
+            return B.validate_headless(path), [B.output_path(path)]
+
+        from annexes1213 import NorVal12, NorVal13
+        ann = kind[-2:]
+        # 12E2024 / 13E2024 -> 12NV2024 / 13NV2024 dans le même dossier
+        nv_path = NorVal12._output_nv_path_from_input(path, ann, NorVal12._extract_year_from_name(path))
+        if kind == "annexe12":
+            if stage == "E":
+                nv_path = NorVal12.normalize_excel(path, nv_path)
+                return NorVal12.validate_headless(nv_path, annexe_num=ann), [nv_path]
+            return NorVal12.validate_headless(path, annexe_num=ann), []
+
+        if stage == "E":
+            NorVal13.normalize_excel_annexe13_keep_style(path, nv_path)
+            return NorVal13.validate_headless(nv_path), [nv_path]
+        return NorVal13.validate_headless(path), []
+    except Exception as e:
+        logging.error(f"Validation impossible pour {path} : {e}")
+        write_corrections_report(path, kind, STATUS_ERROR, error=e)
+        return STATUS_ERROR, []
+
+
+def _handle(path):
+    code, written = validate_workbook(path)
+    print(f"{'✅' if code == 0 else '❌'} {os.path.basename(path)} : {STATUS_LABELS.get(code, code)}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validation des classeurs Excel sans Excel ni Ctrl+S")
+    parser.add_argument("files", nargs="*", help="Classeurs à valider une fois")
+    parser.add_argument("--watch", action="append", default=[],
+                        help="Dossier (ou classeur) à surveiller ; chaque classeur sauvegardé est revalidé")
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="Secondes sans écriture avant de revalider un classeur")
+    parser.add_argument("--poll", type=float, default=1.0, help="Intervalle de scrutation sans inotify")
+    args = parser.parse_args(argv)
+
+    if not args.files and not args.watch:
+        parser.error("préciser des classeurs ou --watch DOSSIER")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    worst = 0
+    for path in args.files:
+        if not is_workbook(path):
+            print(f"⚠️ Ignoré (pas un classeur .xlsx) : {path}")
+            continue
+        code, _ = validate_workbook(path)
+        print(f"{'✅' if code == 0 else '❌'} {os.path.basename(path)} : {STATUS_LABELS.get(code, code)}")
+        worst = max(worst, code)
+
+    if args.watch:
+        try:
+            watch(args.watch, _handle, debounce=args.debounce, poll_interval=args.poll)
+        except KeyboardInterrupt:
+            print("Surveillance arrêtée.")
+    return worst
+
+
+if __name__ == "__main__":
+    sys.exit(main())